@@ -0,0 +1,144 @@
+"""
+Benchmark the follower diff paths: the original set-based implementation, the SQL
+anti-join in SnapshotStore and the vectorized id-array engine used by UnfollowersDetector.
+
+    python benchmarks/bench_diff.py --sizes 1000 100000 1000000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.diff_engine import difference, to_id_array  # noqa: E402
+from services.snapshot_store import SnapshotStore, FOLLOWERS  # noqa: E402
+
+
+class User:
+    __slots__ = ('pk', 'username', 'full_name', 'is_verified', 'follower_count')
+
+    def __init__(self, pk: str):
+        self.pk = pk
+        self.username = f"user_{pk}"
+        self.full_name = f"User {pk}"
+        self.is_verified = False
+        self.follower_count = int(pk) % 5000
+
+
+def make_accounts(size: int, churn: float = 0.01, seed: int = 42):
+    """Current followers/following plus a previous follower list differing by churn"""
+    rng = random.Random(seed)
+    ids = rng.sample(range(10 ** 9, 10 ** 11), int(size * 1.5))
+    followers = {str(uid): User(str(uid)) for uid in ids[:size]}
+    # Half of the accounts followed are followers, half are not
+    following = {str(uid): User(str(uid)) for uid in ids[size // 2:size]}
+
+    changed = max(1, int(size * churn))
+    previous = list(followers)[changed:] + [str(uid) for uid in ids[size:size + changed]]
+    return followers, following, previous
+
+
+def set_not_following_back(followers, following):
+    not_following_back = set(following.keys()) - set(followers.keys())
+    return [
+        {
+            'user_id': uid,
+            'username': following[uid].username,
+            'full_name': following[uid].full_name or 'No name',
+            'is_verified': getattr(following[uid], 'is_verified', False),
+            'follower_count': getattr(following[uid], 'follower_count', 0)
+        }
+        for uid in not_following_back
+    ]
+
+
+def set_unfollowers(current, previous):
+    return [{'user_id': uid} for uid in set(previous) - set(current.keys())]
+
+
+def vectorized_not_following_back(followers, following, display=50):
+    ids = difference(to_id_array(following.keys(), len(following)), to_id_array(followers.keys(), len(followers)))
+    return len(ids), [following[str(uid)].username for uid in ids[:display]]
+
+
+def vectorized_unfollowers(current, previous_ids, display=50):
+    ids = difference(previous_ids, to_id_array(current.keys(), len(current)))
+    return len(ids), ids[:display]
+
+
+def timed(func, *args, repeat: int = 3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(func, *args) -> int:
+    """Peak bytes allocated while func runs (including its result)"""
+    tracemalloc.start()
+    result = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        followers, following, previous = make_accounts(size)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SnapshotStore(Path(tmp) / "bench.db")
+            users = {uid: {'username': f"user_{uid}", 'full_name': None} for uid in previous}
+            snapshot_id = store.save_snapshot('bench', users, {})
+
+            row = {
+                'size': size,
+                'not_following_back': {
+                    'set': timed(set_not_following_back, followers, following, repeat=repeat),
+                    'vectorized': timed(vectorized_not_following_back, followers, following, repeat=repeat),
+                },
+                'not_following_back_peak_mb': {
+                    'set': peak_memory(set_not_following_back, followers, following) / 2 ** 20,
+                    'vectorized': peak_memory(vectorized_not_following_back, followers, following) / 2 ** 20,
+                },
+                'unfollowers': {
+                    'set': timed(set_unfollowers, followers, previous, repeat=repeat),
+                    'sql': timed(store.removed_since, snapshot_id, followers.keys(), FOLLOWERS, repeat=repeat),
+                    'vectorized': timed(lambda: vectorized_unfollowers(
+                        followers, store.id_array(snapshot_id, FOLLOWERS)), repeat=repeat),
+                },
+            }
+            store.close()
+
+        results.append(row)
+        for name, paths in row.items():
+            if name == 'size':
+                continue
+            if name.endswith('_mb'):
+                timings = "  ".join(f"{path}={mb:9.1f}MB" for path, mb in paths.items())
+            else:
+                timings = "  ".join(f"{path}={seconds * 1000:9.1f}ms" for path, seconds in paths.items())
+            print(f"{size:>9,}  {name:<28} {timings}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
@@ -0,0 +1,121 @@
+"""
+Benchmark low-engagers scoring: the per-follower dict with a full sort against the
+follower x post EngagementMatrix with vectorized scores and argpartition selection.
+
+Engagement is synthetic: every post gets likes from --like-rate and comments from
+--comment-rate of the followers, with a long tail of followers who never engage.
+
+    python benchmarks/bench_engagement.py --followers 500000 --posts 200
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import numpy as np  # noqa: E402
+from services.engagement_matrix import EngagementMatrix, bottom_k  # noqa: E402
+
+
+class Media:
+    __slots__ = ('pk', 'taken_at')
+
+    def __init__(self, pk: str, taken_at: datetime):
+        self.pk = pk
+        self.taken_at = taken_at
+
+
+def make_engagement(followers: int, posts: int, like_rate: float, comment_rate: float, seed: int = 42):
+    """Follower ids, media and per post {user_id: count} for likers and comments"""
+    rng = np.random.default_rng(seed)
+    ids = np.unique(rng.integers(10 ** 9, 10 ** 11, size=int(followers * 1.01)))
+    ids = rng.permutation(ids)[:followers]
+    now = datetime.now(timezone.utc)
+    media_list = [Media(str(3 * 10 ** 18 + i), now - timedelta(days=i * 2)) for i in range(posts)]
+    # Engagement is skewed: some followers engage on most posts, many on none
+    affinity = rng.pareto(1.5, size=followers)
+    affinity /= affinity.mean()
+    engagement = []
+    for media in media_list:
+        for kind, rate in (('likers', like_rate), ('comments', comment_rate)):
+            hit = rng.random(followers) < np.minimum(1.0, affinity * rate)
+            engagement.append((media.pk, kind, {str(uid): 1 for uid in ids[hit]}))
+    return [str(uid) for uid in ids], media_list, engagement
+
+
+def dict_bottom(follower_ids, engagement, top: int):
+    """The original low-engagers path"""
+    engagement_count = {uid: 0 for uid in follower_ids}
+    for _, _, counts in engagement:
+        for uid, count in counts.items():
+            if uid in engagement_count:
+                engagement_count[uid] += count
+    return sorted(engagement_count.items(), key=lambda x: x[1])[:top]
+
+
+def matrix_build(follower_ids, media_list, engagement, representation: str):
+    matrix = EngagementMatrix(follower_ids, media_list, representation=representation)
+    for media_pk, kind, counts in engagement:
+        matrix.add(media_pk, kind, counts)
+    return matrix.build()
+
+
+def timed(func, *args):
+    """Result and wall time of func, then its peak traced allocation in a second run"""
+    started = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - started
+    # tracemalloc slows allocation down, so it must not overlap the timed run
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--followers', type=int, default=500000)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--like-rate', type=float, default=0.03)
+    parser.add_argument('--comment-rate', type=float, default=0.002)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    args = parser.parse_args()
+
+    follower_ids, media_list, engagement = make_engagement(args.followers, args.posts, args.like_rate,
+                                                           args.comment_rate)
+    engaged = sum(len(counts) for _, _, counts in engagement)
+    print(f"{args.followers:,} followers x {args.posts} posts, {engaged:,} likes and comments")
+
+    results = {}
+    _, seconds, peak = timed(dict_bottom, follower_ids, engagement, args.top)
+    results['dict_sort'] = {'seconds': seconds, 'peak_mb': peak / 2 ** 20}
+
+    for representation in ('sparse', 'dense'):
+        matrix, build_seconds, peak = timed(matrix_build, follower_ids, media_list, engagement, representation)
+        started = time.perf_counter()
+        scores = matrix.scores(1.0, 3.0, half_life_days=30)
+        score_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        bottom_k(scores, args.top)
+        select_seconds = time.perf_counter() - started
+        results[f'matrix_{representation}'] = {
+            'seconds': build_seconds + score_seconds + select_seconds, 'build_seconds': build_seconds,
+            'score_seconds': score_seconds, 'select_seconds': select_seconds,
+            'peak_mb': peak / 2 ** 20, 'matrix_mb': matrix.nbytes / 2 ** 20, 'density': matrix.density(),
+        }
+        del matrix
+
+    print(f"{'path':<16} {'total s':>9} {'build s':>9} {'score s':>9} {'select s':>9} {'peak MB':>9} {'matrix MB':>10}")
+    for name, row in results.items():
+        print(f"{name:<16} {row['seconds']:9.3f} {row.get('build_seconds', 0):9.3f} {row.get('score_seconds', 0):9.3f} "
+              f"{row.get('select_seconds', 0):9.4f} {row['peak_mb']:9.1f} {row.get('matrix_mb', 0):10.1f}")
+
+    if args.json:
+        args.json.write_text(json.dumps({'args': {k: str(v) for k, v in vars(args).items()}, 'results': results},
+                                        indent=2))
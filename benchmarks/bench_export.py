@@ -0,0 +1,83 @@
+"""
+Benchmark --export: the original json.dump(indent=2) of a materialized list against
+the streaming exporters in pkg.exporters (json, ndjson, csv, parquet if pyarrow is installed).
+
+Rows look like not-following-back results and are generated lazily, the way
+UnfollowersDetector hands them out, so peak memory shows what each path holds on to.
+
+    python benchmarks/bench_export.py --rows 1000000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pkg import exporters  # noqa: E402
+
+
+def make_rows(count: int):
+    for i in range(count):
+        uid = str(10 ** 10 + i * 7919)
+        yield {'user_id': uid, 'username': f"user_{uid}", 'full_name': f"User {uid[-5:]}",
+               'is_verified': i % 97 == 0, 'follower_count': i % 5000}
+
+
+def legacy_export(path: Path, count: int):
+    with open(path, 'w') as f:
+        json.dump({'generated_at': datetime.now().isoformat(), 'not_following_back': list(make_rows(count))},
+                  f, indent=2, default=str)
+
+
+def streaming_export(fmt: str):
+    def export(path: Path, count: int):
+        with exporters.open_exporter(fmt, path, {'generated_at': datetime.now().isoformat()},
+                                     'not_following_back') as exporter:
+            exporter.write_many(make_rows(count))
+    return export
+
+
+def measure(func, path: Path, count: int) -> dict:
+    started = time.perf_counter()
+    func(path, count)
+    seconds = time.perf_counter() - started
+    # tracemalloc slows allocation down, so it must not overlap the timed run
+    tracemalloc.start()
+    func(path, count)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 2 ** 20, 'file_mb': path.stat().st_size / 2 ** 20}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    args = parser.parse_args()
+
+    paths = {'legacy_json': legacy_export}
+    for fmt in exporters.FORMATS:
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("parquet skipped: pyarrow is not installed")
+                continue
+        paths[fmt] = streaming_export(fmt)
+
+    print(f"{args.rows:,} rows, JSON encoder: {'orjson' if exporters.orjson else 'json'}")
+    print(f"{'path':<12} {'seconds':>9} {'peak MB':>9} {'file MB':>9}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, func in paths.items():
+            results[name] = measure(func, Path(tmp) / f"export.{name}", args.rows)
+            row = results[name]
+            print(f"{name:<12} {row['seconds']:9.2f} {row['peak_mb']:9.1f} {row['file_mb']:9.1f}")
+
+    if args.json:
+        args.json.write_text(json.dumps({'rows': args.rows, 'results': results}, indent=2))
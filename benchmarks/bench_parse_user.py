@@ -0,0 +1,92 @@
+"""
+Benchmark parse_user: jmespath.search on every call (the original code), the
+precompiled PARSE_USER_EXPRESSION and the hand-written parse_user_fast.
+
+Payloads are synthetic web_profile_info users with captions, tagged users, locations
+and related profiles. Every parser's output is checked against the compiled expression
+before timing.
+
+    python benchmarks/bench_parse_user.py --profiles 2000 --posts 12
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import jmespath  # noqa: E402
+from pkg.insta_scrape import PARSE_USER_EXPRESSION, parse_user_fast  # noqa: E402
+from pkg.mock_backend import make_profile  # noqa: E402
+
+# The expression source, as parse_user used to pass it to jmespath.search per call
+EXPRESSION = PARSE_USER_EXPRESSION.expression
+
+
+def make_payloads(profiles: int, posts: int, seed: int = 42) -> list:
+    """Profiles with the optional fields populated the way real accounts vary"""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(profiles):
+        profile = make_profile(f"user{i}", posts)
+        for edge in profile["edge_felix_video_timeline"]["edges"]:
+            node = edge["node"]
+            node["edge_media_to_tagged_user"]["edges"] = [
+                {"node": {"user": {"username": f"tag{rng.randrange(10 ** 6)}"}}} for _ in range(rng.randrange(4))
+            ]
+            if rng.random() < 0.3:
+                node["location"] = {"name": f"City {rng.randrange(100)}"}
+            if rng.random() < 0.5:
+                node["accessibility_caption"] = "Photo by someone"
+        profile["edge_related_profiles"]["edges"] = [
+            {"node": {"username": f"related{rng.randrange(10 ** 6)}"}} for _ in range(rng.randrange(10))
+        ]
+        if rng.random() < 0.2:
+            profile["bio_links"] = []
+        payloads.append(profile)
+    return payloads
+
+
+PARSERS = {
+    'search': lambda data: jmespath.search(EXPRESSION, data),
+    'compiled': PARSE_USER_EXPRESSION.search,
+    'fast': parse_user_fast,
+}
+
+
+def bench(payloads: list, repeat: int) -> list:
+    expected = [PARSE_USER_EXPRESSION.search(data) for data in payloads]
+    results = []
+    for name, parse in PARSERS.items():
+        if [parse(data) for data in payloads] != expected:
+            raise AssertionError(f"{name} output differs from PARSE_USER_EXPRESSION")
+
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for data in payloads:
+                parse(data)
+            best = min(best, time.perf_counter() - started)
+        results.append({'parser': name, 'profiles': len(payloads), 'seconds': best,
+                        'profiles_per_second': len(payloads) / best})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=12, help='Timeline posts per profile')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    args = parser.parse_args()
+
+    results = bench(make_payloads(args.profiles, args.posts), args.repeat)
+    baseline = results[0]['seconds']
+    for result in results:
+        print(f"{result['parser']:>9}  {result['seconds'] * 1000:8.1f} ms  "
+              f"{result['profiles_per_second']:9.0f} profiles/s  {baseline / result['seconds']:5.1f}x")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
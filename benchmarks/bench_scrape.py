@@ -0,0 +1,59 @@
+"""
+Benchmark the async batch scraper against a local stand-in for web_profile_info.
+
+The stand-in (pkg.mock_backend.start_profile_server) answers every username with a
+synthetic profile after a fixed latency and can inject 429s, so no request ever
+reaches Instagram.
+
+    python benchmarks/bench_scrape.py --profiles 500 --concurrency 1 10 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pkg.insta_scrape import scrape_users  # noqa: E402
+from pkg.mock_backend import start_profile_server  # noqa: E402
+
+
+async def run_batch(base_url: str, profiles: int, concurrency: int, rate: float) -> dict:
+    usernames = [f"user{i}" for i in range(profiles)]
+    ok = failed = 0
+    started = time.perf_counter()
+    async for _, profile, error in scrape_users(usernames, concurrency=concurrency, rate=rate,
+                                                burst=concurrency, base_url=base_url):
+        if error is None:
+            ok += 1
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - started
+    return {'concurrency': concurrency, 'ok': ok, 'failed': failed, 'seconds': elapsed,
+            'profiles_per_second': profiles / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--latency', type=float, default=0.05, help='Stand-in response latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--rate', type=float, default=1000.0, help='Per-host request rate limit')
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    args = parser.parse_args()
+
+    server = start_profile_server(latency=args.latency, throttle_rate=args.error_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    results = []
+    for concurrency in args.concurrency:
+        result = asyncio.run(run_batch(base_url, args.profiles, concurrency, args.rate))
+        results.append(result)
+        print(f"concurrency={concurrency:>4}  ok={result['ok']:>6}  failed={result['failed']:>4}  "
+              f"{result['seconds']:7.2f}s  {result['profiles_per_second']:8.1f} profiles/s")
+    server.shutdown()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
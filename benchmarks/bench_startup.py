@@ -0,0 +1,103 @@
+"""
+CLI startup budget: how long `import main` takes and which modules it pulls in.
+
+Each measurement runs in a fresh interpreter. The check fails (exit 1) when importing
+src/main.py takes longer than --budget-ms, or when it loads one of the heavy modules
+that only the commands using them should import (instagrapi, httpx, numpy, ...).
+The slowest imports from `python -X importtime` are listed to show what to defer.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 150 --repeat 10 --json startup.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Modules a bare `import main` must not load; they belong to the commands that need them
+HEAVY_MODULES = [
+    'instagrapi', 'pydantic', 'requests', 'httpx', 'jmespath', 'numpy', 'Cryptodome', 'asyncio',
+    'rich.progress', 'rich.prompt', 'pkg.instagrapi', 'pkg.mock_backend', 'pkg.insta_scrape',
+    'services.unfollower_detector', 'services.engagement_analyzer', 'services.snapshot_store', 'pkg.exporters',
+    'orjson', 'pyarrow',
+]
+
+IMPORT_MAIN = f"""
+import json, sys, time
+sys.path.insert(0, {str(SRC)!r})
+started = time.perf_counter()
+import main
+print(json.dumps({{'seconds': time.perf_counter() - started,
+                  'loaded': [name for name in {HEAVY_MODULES!r} if name in sys.modules]}}))
+"""
+
+
+def import_main() -> dict:
+    result = subprocess.run([sys.executable, "-c", IMPORT_MAIN], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def command_seconds(args: list) -> float:
+    started = time.perf_counter()
+    subprocess.run(args, capture_output=True, check=True)
+    return time.perf_counter() - started
+
+
+def slowest_imports(limit: int) -> list:
+    """Top-level imports of main by cumulative time, from -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=SRC,
+                            capture_output=True, text=True, check=True)
+    rows, children = [], []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # A module is listed after everything it imported; main's own imports sit one level below it
+        if depth == 0:
+            if name.strip() == 'main':
+                rows = children
+            children = []
+        elif depth == 1:
+            children.append({'module': name.strip(), 'cumulative_ms': int(parts[1]) / 1000})
+    return sorted(rows, key=lambda row: row['cumulative_ms'], reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=200, help='Maximum time to import src/main.py')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    args = parser.parse_args()
+
+    runs = [import_main() for _ in range(args.repeat)]
+    import_ms = min(run['seconds'] for run in runs) * 1000
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    interpreter_ms = min(command_seconds([sys.executable, "-c", "pass"]) for _ in range(args.repeat)) * 1000
+    help_ms = min(command_seconds([sys.executable, str(SRC / "main.py"), "--help"]) for _ in range(args.repeat)) * 1000
+    slowest = slowest_imports(10)
+
+    print(f"import main        {import_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"main.py --help     {help_ms:8.1f} ms  (bare interpreter {interpreter_ms:.1f} ms)")
+    print("slowest imports:")
+    for row in slowest:
+        print(f"  {row['module']:<30} {row['cumulative_ms']:8.1f} ms")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import main took {import_ms:.1f} ms, budget is {args.budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"import main loaded heavy modules: {', '.join(loaded)}")
+
+    if args.json:
+        args.json.write_text(json.dumps({'import_ms': import_ms, 'help_ms': help_ms, 'interpreter_ms': interpreter_ms,
+                                         'budget_ms': args.budget_ms, 'heavy_modules_loaded': loaded,
+                                         'slowest_imports': slowest, 'failures': failures}, indent=2))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
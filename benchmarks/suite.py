@@ -0,0 +1,218 @@
+"""
+Reproducible benchmark suite for the fetch, snapshot, diff and parse hot paths.
+
+Accounts are synthetic (pkg.mock_backend.SyntheticAccount), so results only depend on
+the code and the machine. Every size measures:
+
+  fetch_relationships      InstaClient.get_relationships against the mocked client
+  save_snapshot_keyframe   first save_followers_snapshot into an empty database
+  save_snapshot_delta      next save after 1% follower churn
+  load_latest_snapshot     UnfollowersDetector.load_latest_snapshot
+  find_not_following_back  diff plus building the 50 rows a command shows
+  find_unfollowers         "
+  find_new_followers       "
+  command_<name>           end-to-end `python src/main.py --mock ...` wall time
+
+plus parse_user throughput once. Results are written as JSON; --compare flags every
+benchmark that got slower than an earlier results file by more than --tolerance.
+
+    python benchmarks/suite.py --sizes 1000 100000 1000000 --json results.json
+    python benchmarks/suite.py --sizes 1000 100000 --compare results.json
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+from bench_parse_user import PARSERS, make_payloads  # noqa: E402
+from pkg.instagrapi import InstaClient  # noqa: E402
+from pkg.mock_backend import FakeClient, SyntheticAccount  # noqa: E402
+from pkg.rate_limiter import DEFAULT_LIMITS, RateLimiter  # noqa: E402
+from services import unfollower_detector  # noqa: E402
+from services.unfollower_detector import UnfollowersDetector  # noqa: E402
+
+# Rows a command renders from a diff result
+DISPLAY_ROWS = 50
+
+COMMANDS = {
+    'analytics': ['analytics'],
+    'not_following_back': ['not-following-back', '--limit', str(DISPLAY_ROWS)],
+    'track_unfollowers': ['track-unfollowers', '--save-snapshot'],
+}
+
+
+def measure(func, setup=None, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Best wall time of func over repeat runs and its peak traced allocation
+
+    setup() runs untimed before every call and its result is passed to func.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+
+    result = {'seconds': best}
+    if memory:
+        args = setup() if setup else ()
+        tracemalloc.start()
+        func(*args)
+        result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result
+
+
+def make_client(account: SyntheticAccount, checkpoint_dir: Path) -> InstaClient:
+    client = InstaClient(
+        rate_limiter=RateLimiter({name: (10 ** 6, 10 ** 6) for name in DEFAULT_LIMITS}),
+        checkpoint_dir=checkpoint_dir,
+        cache_ttl=0,
+        client_factory=lambda: FakeClient(account),
+    )
+    client.login(account.username, "offline", use_session=False)
+    return client
+
+
+def bench_size(size: int, repeat: int, tmp: Path) -> list:
+    following = min(size // 2, 7500)
+    before = SyntheticAccount(followers=size, following=following)
+    after = SyntheticAccount(followers=size, following=following, round=1)
+    client = make_client(before, tmp / "checkpoints")
+    results = []
+
+    def record(name: str, measured: dict):
+        results.append({'name': name, 'size': size, **measured})
+        memory = f"{measured['peak_mb']:9.1f} MB" if 'peak_mb' in measured else ""
+        print(f"{size:>9,}  {name:<26} {measured['seconds'] * 1000:10.1f} ms  {memory}", flush=True)
+
+    record('fetch_relationships', measure(client.get_relationships, repeat=repeat))
+    relationships = client.get_relationships()
+    followers, following_users = relationships['followers'], relationships['following']
+    current = make_client(after, tmp / "checkpoints").get_relationships()['followers']
+
+    runs = iter(range(10 ** 6))
+
+    def fresh_detector():
+        return UnfollowersDetector(client, tmp / f"keyframe_{next(runs)}"), followers, following_users
+
+    def detector_with_keyframe():
+        detector, *lists = fresh_detector()
+        detector.save_followers_snapshot(*lists)
+        return detector, current, following_users
+
+    record('save_snapshot_keyframe', measure(
+        lambda detector, *lists: detector.save_followers_snapshot(*lists), fresh_detector, repeat))
+    record('save_snapshot_delta', measure(
+        lambda detector, *lists: detector.save_followers_snapshot(*lists), detector_with_keyframe, repeat))
+
+    detector, *lists = fresh_detector()
+    detector.save_followers_snapshot(*lists)
+    record('load_latest_snapshot', measure(detector.load_latest_snapshot, repeat=repeat))
+    previous = detector.load_latest_snapshot()
+
+    record('find_not_following_back', measure(
+        lambda: list(detector.find_not_following_back(followers, following_users)[:DISPLAY_ROWS]), repeat=repeat))
+    record('find_unfollowers', measure(
+        lambda: list(detector.find_unfollowers(current, previous)[:DISPLAY_ROWS]), repeat=repeat))
+    record('find_new_followers', measure(
+        lambda: list(detector.find_new_followers(current, previous)[:DISPLAY_ROWS]), repeat=repeat))
+    detector.store.close()
+
+    for name, args in COMMANDS.items():
+        data_dir = tmp / f"command_{name}"
+
+        def run_command():
+            subprocess.run(
+                [sys.executable, str(ROOT / "src" / "main.py"), "--mock", "--mock-options", f"followers={size},following={following}",
+                 "--data-dir", str(data_dir), *args],
+                input="n\n", capture_output=True, text=True, check=True,
+            )
+
+        record(f"command_{name}", measure(run_command, repeat=repeat, memory=False))
+
+    return results
+
+
+def bench_parse(profiles: int, repeat: int) -> list:
+    payloads = make_payloads(profiles, posts=12)
+    results = []
+    for name in ('compiled', 'fast'):
+        measured = measure(lambda: [PARSERS[name](data) for data in payloads], repeat=repeat, memory=False)
+        measured['profiles_per_second'] = profiles / measured['seconds']
+        results.append({'name': f"parse_user_{name}", 'size': profiles, **measured})
+        print(f"{profiles:>9,}  parse_user_{name:<15} {measured['seconds'] * 1000:10.1f} ms  "
+              f"{measured['profiles_per_second']:9.0f} profiles/s", flush=True)
+    return results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def compare(results: list, baseline_path: Path, tolerance: float) -> list:
+    """Benchmarks slower than the baseline by more than tolerance (a share, 0.2 = 20%)"""
+    baseline = {(row['name'], row['size']): row for row in json.loads(baseline_path.read_text())['results']}
+    regressions = []
+    for row in results:
+        old = baseline.get((row['name'], row['size']))
+        if not old:
+            continue
+        ratio = row['seconds'] / old['seconds']
+        marker = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{row['size']:>9,}  {row['name']:<26} {old['seconds'] * 1000:10.1f} ms -> "
+              f"{row['seconds'] * 1000:10.1f} ms  {ratio:5.2f}x  {marker}")
+        if marker:
+            regressions.append({**row, 'baseline_seconds': old['seconds'], 'ratio': ratio})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--parse-profiles', type=int, default=2000, help='Profiles per parse_user run')
+    parser.add_argument('--json', type=Path, help='Write results to this file')
+    parser.add_argument('--compare', type=Path, help='Earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown against --compare')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    unfollower_detector.console.quiet = True
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            results += bench_size(size, args.repeat, Path(tmp) / str(size))
+    results += bench_parse(args.parse_profiles, args.repeat)
+
+    if args.json:
+        args.json.write_text(json.dumps({'environment': environment(), 'sizes': args.sizes,
+                                         'repeat': args.repeat, 'results': results}, indent=2))
+    if args.compare:
+        print()
+        sys.exit(1 if compare(results, args.compare, args.tolerance) else 0)
@@ -1,22 +1,33 @@
 
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 import click
 import getpass
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.prompt import Prompt, Confirm
 
-from pkg.instagrapi import InstaClient
-from services.unfollower_detector import UnfollowersDetector
+# Only light modules are imported here so --help, shell completion and the local
+# snapshot commands start fast. instagrapi, httpx, numpy and most of rich are
+# imported by the commands that use them; benchmarks/bench_startup.py keeps it so.
+from pkg import profiler
+from pkg.rate_limiter import DEFAULT_LIMITS, RateLimiter
+
+if TYPE_CHECKING:
+    from pkg.instagrapi import InstaClient
 
 console = Console()
 
+DATA_DIR = Path("instagram_data")
+
+# Offline backends answer instantly, only injected 429s should slow a run down
+OFFLINE_LIMITS = {name: (1000.0, 1000) for name in DEFAULT_LIMITS}
+
+@profiler.traced('render')
 def display_not_following_back(users: List[Dict], limit: int = None):
     """Display users who don't follow back"""
+    from rich.table import Table
     if not users:
         console.print("🎉 [green]Everyone you follow is following you back![/green]")
         return
@@ -51,8 +62,10 @@ def display_not_following_back(users: List[Dict], limit: int = None):
     if limit and len(users) > limit:
         console.print(f"... and {len(users) - limit} more")
 
+@profiler.traced('render')
 def display_unfollowers(users: List[Dict]):
     """Display users who unfollowed you"""
+    from rich.table import Table
     if not users:
         console.print("😇 [green]No one unfollowed you since last check![/green]")
         return
@@ -77,8 +90,10 @@ def display_unfollowers(users: List[Dict]):
     
     console.print(table)
 
+@profiler.traced('render')
 def display_new_followers(users: List[Dict]):
     """Display new followers"""
+    from rich.table import Table
     if not users:
         console.print("📈 [blue]No new followers since last check[/blue]")
         return
@@ -103,33 +118,33 @@ def display_new_followers(users: List[Dict]):
     
     console.print(table)
 
-def get_authenticated_client(username: str = None, password: str = None) -> InstaClient:
-    """Get authenticated Instagram client"""
-    if not username:
-        username = click.prompt("Enter Instagram username")
-    
-    if not password:
-        password = getpass.getpass("Enter Instagram password: ")
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Logging in to Instagram...", total=None)
-        
-        client = InstaClient()
-        success = client.login(username, password)
-        
-        if success:
-            progress.update(task, description="✅ Login successful!")
-            return client
-        else:
-            console.print("❌ [red]Login failed![/red]")
-            raise click.Abort()
+def fetch_relationships(client: 'InstaClient'):
+    """Fetch followers and following in parallel, report per-list timings and fail on errors"""
+    followers, following, _ = sync_relationships(client)
+    return followers, following
+
+def sync_relationships(client: 'InstaClient', known_followers=None, stop_after: int = 50):
+    """fetch_relationships with an optional incremental follower sync, also returns the sync report"""
+    relationships = client.get_relationships(known_followers=known_followers, stop_after=stop_after)
+    timings, sync = relationships['timings'], relationships['sync']
+    followers_text = (f"{len(relationships['followers']):,} newest followers ({sync['pages']} pages)"
+                      if sync['mode'] == 'incremental' else f"{len(relationships['followers']):,} followers")
+    console.print(
+        f"[dim]Fetched {followers_text} in {timings['followers']:.1f}s, "
+        f"{len(relationships['following']):,} following in {timings['following']:.1f}s[/dim]"
+    )
+
+    errors = {kind: error for kind, error in relationships['errors'].items() if error}
+    if errors:
+        # Comparing against a partial list would report everyone missing as unfollowed
+        raise RuntimeError("; ".join(f"failed to fetch {kind}: {error}" for kind, error in errors.items()))
+
+    return relationships['followers'], relationships['following'], sync
 
+@profiler.traced('render')
 def display_analytics(analytics: Dict):
     """Display analytics using rich formatting"""
+    from rich.table import Table
     table = Table(title="📊 Follower Analytics", show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan", no_wrap=True)
     table.add_column("Value", style="green", justify="right")
@@ -142,8 +157,10 @@ def display_analytics(analytics: Dict):
     
     console.print(table)
 
+@profiler.traced('render')
 def display_posts(posts: List, limit: int = 10):
     """Display posts using rich formatting"""
+    from rich.table import Table
     table = Table(title=f"📱 Recent Posts (Top {min(limit, len(posts))})", show_header=True)
     table.add_column("Post #", style="cyan", width=8)
     table.add_column("❤️ Likes", style="red", justify="right")
@@ -169,14 +186,34 @@ def display_posts(posts: List, limit: int = 10):
     
     console.print(table)
 
-def export_data(data: Dict, filename: str):
-    """Export data to JSON file"""
+@profiler.traced('export')
+def export_data(data, filename: str, records_key: Optional[str] = None, fields: Optional[List[str]] = None):
+    """
+    Export data in the --export-format format, streaming the records to the file
+    
+    Args:
+        data: A list of records, a single dict, or a dict holding its records under records_key
+        filename: File name prefix, a timestamp and the format's extension are appended
+        records_key: Key of data with the records (any iterable of dicts); the other keys are written as metadata
+        fields: CSV/Parquet columns, needed when records differ in their keys (defaults to the first record's keys)
+    """
+    from pkg.exporters import EXTENSIONS, dumps, open_exporter
+    
+    fmt = click.get_current_context().obj.get('export_format', 'json')
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    full_filename = f"{filename}_{timestamp}.json"
+    full_filename = f"{filename}_{timestamp}.{EXTENSIONS[fmt]}"
     
     try:
-        with open(full_filename, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        if isinstance(data, dict) and not records_key and fmt == 'json':
+            # A single small document, kept readable
+            Path(full_filename).write_bytes(dumps(data, indent=True))
+        else:
+            if records_key:
+                meta, records = {key: value for key, value in data.items() if key != records_key}, data[records_key]
+            else:
+                meta, records = {}, [data] if isinstance(data, dict) else data
+            with open_exporter(fmt, full_filename, meta, records_key, fields) as exporter:
+                exporter.write_many(records)
         console.print(f"✅ Data exported to [green]{full_filename}[/green]")
     except Exception as e:
         console.print(f"❌ Failed to export data: [red]{e}[/red]")
@@ -185,10 +222,35 @@ def export_data(data: Dict, filename: str):
 @click.group(invoke_without_command=True)
 @click.option('--username', '-u', help='Instagram username')
 @click.option('--password', '-p', help='Instagram password (will prompt if not provided)')
+@click.option('--fresh-login', is_flag=True, help='Ignore the stored session and do a full login')
+@click.option('--no-session-cache', is_flag=True, help='Do not store or reuse login sessions')
+@click.option('--cache-ttl', default=300, show_default=True, help='Seconds API results are reused within a run (0 disables)')
+@click.option('--data-dir', type=click.Path(file_okay=False, path_type=Path), default=None,
+              help='Directory for snapshots, sessions and caches (default: instagram_data, instagram_data/offline with --mock/--replay)')
+@click.option('--mock', is_flag=True, help='Run offline against a synthetic account')
+@click.option('--mock-options', default='', metavar='SPEC',
+              help='Synthetic account and injected faults, e.g. followers=100000,posts=30,round=1,latency=0.05,throttle=0.01')
+@click.option('--record', type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help='Append every Instagram API response to this file')
+@click.option('--replay', type=click.Path(exists=True, dir_okay=False, path_type=Path), default=None,
+              help='Run offline, answering API calls from a --record file')
+@click.option('--profile', is_flag=True, help='Print where the run spent its time (API calls, rate-limit sleep, rendering, ...)')
+@click.option('--profile-pstats', type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help='Also write a cProfile stats file (implies --profile)')
+@click.option('--profile-trace', type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help='Also write a Chrome trace file for Perfetto/speedscope flame graphs (implies --profile)')
+@click.option('--metrics-file', type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help='Write OpenMetrics counters and histograms here when the command finishes (node_exporter textfile)')
+@click.option('--metrics-port', type=int, default=None, help='Serve OpenMetrics on 127.0.0.1:PORT/metrics while the command runs')
+@click.option('--no-daemon', is_flag=True, help='Log in directly even if an `instaclient serve` daemon is running')
+@click.option('--export-format', type=click.Choice(['json', 'ndjson', 'csv', 'parquet']), default='json', show_default=True,
+              help='File format of --export; records are streamed, parquet needs pyarrow')
 @click.pass_context
-def cli(ctx, username, password):
+def cli(ctx, username, password, fresh_login, no_session_cache, cache_ttl, data_dir, mock, mock_options, record, replay,
+        profile, profile_pstats, profile_trace, metrics_file, metrics_port, no_daemon, export_format):
     """Instagram Analytics Tool - Analyze your Instagram profile"""
     if ctx.invoked_subcommand is None:
+        from rich.panel import Panel
         console.print(Panel.fit("🚀 Instagram Analytics Tool", style="bold blue"))
         console.print("Use --help to see available commands")
         return
@@ -197,27 +259,167 @@ def cli(ctx, username, password):
     ctx.ensure_object(dict)
     ctx.obj['username'] = username
     ctx.obj['password'] = password
+    ctx.obj['fresh_login'] = fresh_login
+    ctx.obj['session_cache'] = not no_session_cache
+    ctx.obj['cache_ttl'] = cache_ttl
+    ctx.obj['use_daemon'] = not no_daemon
+    ctx.obj['export_format'] = export_format
+    
+    mock_spec = {}
+    if mock or replay or mock_options:
+        from pkg.mock_spec import MOCK_USERNAME, parse_mock_spec
+        try:
+            mock_spec = parse_mock_spec(mock_options)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--mock-options')
+    # Faults in --mock-options also apply to --replay
+    ctx.obj['mock'] = mock_spec if mock or replay else None
+    ctx.obj['record'] = record
+    ctx.obj['replay'] = replay
+    ctx.obj['offline'] = bool(mock or replay)
+    ctx.obj['data_dir'] = data_dir or (DATA_DIR / "offline" if ctx.obj['offline'] else DATA_DIR)
+    if mock and not username:
+        ctx.obj['username'] = mock_spec.get('username', MOCK_USERNAME)
+    
+    if profile or profile_pstats or profile_trace:
+        start_profiling(ctx, profile_pstats, profile_trace)
+    if metrics_file or metrics_port is not None:
+        start_metrics(ctx, metrics_file, metrics_port)
 
-def get_authenticated_client(username, password):
-    """Get authenticated Instagram client"""
+def start_metrics(ctx, metrics_file: Path = None, metrics_port: int = None):
+    """Time the command and export the metrics registry while it runs and/or when it finishes"""
+    from pkg.metrics import REGISTRY
+    
+    command = ctx.invoked_subcommand
+    started = time.perf_counter()
+    server = None
+    if metrics_port is not None:
+        server = REGISTRY.serve(metrics_port)
+        console.print(f"📈 Metrics on [blue]http://127.0.0.1:{server.server_port}/metrics[/blue]")
+    
+    def finish():
+        REGISTRY.gauge("instaclient_run_duration_seconds", "Wall time of the last run of a command",
+                       ["command"]).set(time.perf_counter() - started, command=command)
+        REGISTRY.gauge("instaclient_last_run_timestamp_seconds", "Unix time the last run of a command finished",
+                       ["command"]).set(time.time(), command=command)
+        if server:
+            server.shutdown()
+            server.server_close()
+        if metrics_file:
+            REGISTRY.write_textfile(metrics_file)
+            console.print(f"📈 Metrics written to [green]{metrics_file}[/green]")
+    
+    ctx.call_on_close(finish)
+
+def start_profiling(ctx, pstats_path: Path = None, trace_path: Path = None):
+    """Record spans for the rest of the run and report them when the command finishes"""
+    import cProfile
+    
+    run_profiler = profiler.enable(profiler.Profiler())
+    stats_profiler = cProfile.Profile() if pstats_path else None
+    if stats_profiler:
+        stats_profiler.enable()
+    
+    def finish():
+        if stats_profiler:
+            stats_profiler.disable()
+            stats_profiler.dump_stats(pstats_path)
+        profiler.disable()
+        display_profile(run_profiler)
+        if pstats_path:
+            console.print(f"📄 cProfile stats written to [green]{pstats_path}[/green] (python -m pstats {pstats_path})")
+        if trace_path:
+            run_profiler.write_trace(trace_path)
+            console.print(f"🔥 Trace written to [green]{trace_path}[/green] (open in ui.perfetto.dev or speedscope)")
+    
+    ctx.call_on_close(finish)
+
+def display_profile(run_profiler: profiler.Profiler, limit: int = 25):
+    """Display the time breakdown of a profiled run"""
+    from rich.table import Table
+    table = Table(title=f"⏱️ Profile ({run_profiler.wall_seconds:.2f}s wall time)", show_header=True, header_style="bold magenta",
+                  caption="Self time is per thread, spans of worker threads overlap")
+    table.add_column("Span", style="cyan", overflow="fold")
+    table.add_column("Calls", justify="right", no_wrap=True)
+    table.add_column("Total s", justify="right", no_wrap=True)
+    table.add_column("Self s", style="green", justify="right", no_wrap=True)
+    table.add_column("Mean ms", justify="right", no_wrap=True)
+    table.add_column("Max ms", justify="right", no_wrap=True)
+    
+    for row in run_profiler.breakdown()[:limit]:
+        table.add_row(row['name'], f"{row['calls']:,}", f"{row['total']:.3f}", f"{row['self']:.3f}",
+                      f"{row['mean'] * 1000:.1f}", f"{row['max'] * 1000:.1f}")
+    console.print(table)
+    
+    counters = run_profiler.counters
+    console.print(
+        f"🌐 API calls: {int(counters.get('api_calls', 0)):,} | "
+        f"😴 Rate-limit sleep: {counters.get('sleep_seconds', 0):.2f}s | "
+        f"🚦 Throttled: {int(counters.get('throttled', 0))} (retried {int(counters.get('retries', 0))}) | "
+        f"📥 Received: {counters.get('bytes_received', 0) / 2 ** 20:.2f} MB"
+    )
+
+def get_data_dir() -> Path:
+    """Data directory of this run; offline runs keep their snapshots apart from real ones"""
+    return click.get_current_context().obj.get('data_dir', DATA_DIR)
+
+def get_authenticated_client(username, password, use_daemon: bool = True):
+    """
+    Get authenticated Instagram client, reusing the stored session when possible
+    
+    If an `instaclient serve` daemon for this data directory and account is running,
+    a thin client forwarding to its warm session is returned instead.
+    """
+    from pkg.daemon import SOCKET_NAME, RemoteInstaClient
+    
+    ctx = click.get_current_context()
+    if use_daemon and ctx.obj.get('use_daemon', True):
+        remote = RemoteInstaClient.connect(get_data_dir() / SOCKET_NAME)
+        if remote and (not username or username == remote.username):
+            console.print(f"[dim]⚡ Using daemon (pid {remote.daemon_pid}) logged in as @{remote.username}[/dim]")
+            return remote
+    
+    # Only a direct login pays for instagrapi (and numpy for the offline backend)
+    from rich.prompt import Prompt
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from pkg.instagrapi import Client, InstaClient
+    from pkg.session_store import SessionStore
+    
+    factory = Client
+    if ctx.obj.get('offline') or ctx.obj.get('record') or ctx.obj.get('replay'):
+        from pkg.mock_backend import client_factory
+        factory = client_factory(ctx.obj.get('mock'), ctx.obj.get('record'), ctx.obj.get('replay'))
+    
+    offline = ctx.obj.get('offline', False)
+    use_session_cache = ctx.obj.get('session_cache', True) and not offline
+    
     if not username:
         username = Prompt.ask("Enter Instagram username")
     
     if not password:
-        password = getpass.getpass("Enter Instagram password: ")
+        password = "offline" if offline else getpass.getpass("Enter Instagram password: ")
     
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console,
     ) as progress:
-        task = progress.add_task("Logging in to Instagram...", total=None)
+        task = progress.add_task("Logging in to Instagram..." if not offline else "Starting offline backend...", total=None)
         
-        client = InstaClient()
-        success = client.login(username, password)
+        client = InstaClient(
+            rate_limiter=RateLimiter(OFFLINE_LIMITS, base_backoff=0.5, max_backoff=5) if offline else None,
+            session_store=SessionStore(get_data_dir() / "sessions") if use_session_cache else None,
+            checkpoint_dir=get_data_dir() / "checkpoints",
+            cache_ttl=ctx.obj.get('cache_ttl', 300),
+            client_factory=factory
+        )
+        success = client.login(username, password, use_session=not ctx.obj.get('fresh_login'))
         
         if success:
-            progress.update(task, description="✅ Login successful!")
+            if client.session_restored:
+                progress.update(task, description="✅ Reused stored session!")
+            else:
+                progress.update(task, description="✅ Login successful!")
             return client
         else:
             console.print("❌ [red]Login failed![/red]")
@@ -228,6 +430,8 @@ def get_authenticated_client(username, password):
 @click.pass_context
 def analytics(ctx, export):
     """Get follower analytics"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
@@ -255,6 +459,8 @@ def analytics(ctx, export):
 @click.pass_context
 def posts(ctx, limit, export):
     """Get recent posts data"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
@@ -291,6 +497,9 @@ def posts(ctx, limit, export):
 @click.pass_context
 def user_info(ctx, export):
     """Get user profile information"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
@@ -344,6 +553,9 @@ def user_info(ctx, export):
 @click.pass_context
 def not_following_back(ctx, limit, export, sort_by_followers):
     """Find users who don't follow you back"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from services.unfollower_detector import UnfollowersDetector
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
@@ -353,19 +565,16 @@ def not_following_back(ctx, limit, export, sort_by_followers):
             console=console,
         ) as progress:
             # Get followers and following
-            task = progress.add_task("Fetching followers...", total=None)
-            followers = client.get_followers()
-            
-            progress.update(task, description="Fetching following...")
-            following = client.get_following()
+            task = progress.add_task("Fetching followers and following...", total=None)
+            followers, following = fetch_relationships(client)
             
             progress.update(task, description="Analyzing relationships...")
-            detector = UnfollowersDetector(client)
+            detector = UnfollowersDetector(client, get_data_dir())
             not_following = detector.find_not_following_back(followers, following)
         
         # Sort by follower count if requested
         if sort_by_followers:
-            not_following.sort(key=lambda x: x.get('follower_count', 0), reverse=True)
+            not_following.sort_by(lambda uid: getattr(following[uid], 'follower_count', 0) or 0, reverse=True)
         
         # Display results
         console.print(f"\n📊 Analysis complete!")
@@ -376,49 +585,115 @@ def not_following_back(ctx, limit, export, sort_by_followers):
         display_not_following_back(not_following, limit)
         
         if export:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"not_following_back_{timestamp}.json"
-            with open(filename, 'w') as f:
-                json.dump({
-                    'generated_at': datetime.now().isoformat(),
-                    'username': client.username,
-                    'total_following': len(following),
-                    'total_followers': len(followers),
-                    'not_following_back_count': len(not_following),
-                    'not_following_back': not_following
-                }, f, indent=2)
-            console.print(f"📁 Results exported to [green]{filename}[/green]")
+            export_data({
+                'generated_at': datetime.now().isoformat(),
+                'username': client.username,
+                'total_following': len(following),
+                'total_followers': len(followers),
+                'not_following_back_count': len(not_following),
+                'not_following_back': not_following
+            }, "not_following_back", records_key='not_following_back')
             
     except Exception as e:
         console.print(f"❌ Error: [red]{e}[/red]")
     finally:
         client.logout()
 
+def choose_sync(detector, previous_snapshot, sync: str, full_every: float):
+    """
+    Sync mode of a tracking run and why
+    
+    Returns:
+        Tuple: ('full' | 'incremental', reason)
+    """
+    if sync == 'full':
+        return 'full', "requested with --sync full"
+    if not previous_snapshot:
+        return 'full', "no previous snapshot"
+    if sync == 'auto':
+        last_full = detector.store.last_full_sync(detector.client.username)
+        if not last_full:
+            return 'full', "no full sync on record"
+        age = (datetime.now() - datetime.fromisoformat(last_full['taken_at'])).total_seconds() / 3600
+        if age >= full_every:
+            return 'full', f"reconciliation due, last full sync {age:.1f}h ago"
+    return 'incremental', f"--sync {sync}"
+
 @cli.command()
 @click.option('--save-snapshot', is_flag=True, help='Save current state as snapshot for future comparison')
+@click.option('--sync', type=click.Choice(['full', 'incremental', 'auto']), default='full', show_default=True,
+              help='full: fetch every follower; incremental: only the newest until known ones; '
+                   'auto: incremental with a full reconciliation every --full-every hours')
+@click.option('--full-every', default=24.0, show_default=True, help='Hours between full reconciliations with --sync auto')
+@click.option('--stop-after', default=50, show_default=True, help='Known followers in a row that end an incremental sync')
 @click.pass_context
-def track_unfollowers(ctx, save_snapshot):
+def track_unfollowers(ctx, save_snapshot, sync, full_every, stop_after):
     """Track who unfollowed you since last check"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.prompt import Confirm
+    from services.snapshot_store import FOLLOWERS
+    from services.unfollower_detector import UnfollowersDetector
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
-        detector = UnfollowersDetector(client)
+        detector = UnfollowersDetector(client, get_data_dir())
         
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console,
         ) as progress:
-            task = progress.add_task("Fetching current data...", total=None)
-            followers = client.get_followers()
-            following = client.get_following()
-            
-            progress.update(task, description="Loading previous snapshot...")
+            task = progress.add_task("Loading previous snapshot...", total=None)
             previous_snapshot = detector.load_latest_snapshot()
+            mode, reason = choose_sync(detector, previous_snapshot, sync, full_every)
+            
+            progress.update(task, description="Fetching current data...")
+            known_followers = None
+            if mode == 'incremental':
+                known_followers = {str(uid) for uid in detector.store.id_array(previous_snapshot['snapshot_id'], FOLLOWERS)}
+            followers, following, report = sync_relationships(client, known_followers, stop_after)
+            if mode == 'incremental' and report['mode'] == 'full':
+                reason = "incremental sync reached the end of the list"
+            mode = report['mode']
+            
+            if mode == 'incremental':
+                # One profile request tells whether anyone left since the last snapshot
+                info = client.get_user_info()
+                new_count = len(set(followers) - known_followers)
+                expected = previous_snapshot['followers_count'] + new_count
+                if info and info.follower_count < expected:
+                    missing = expected - info.follower_count
+                    if sync == 'auto':
+                        reason = f"follower count is {missing:,} below the last snapshot plus new followers"
+                        progress.update(task, description="Reconciling with a full fetch...")
+                        followers, following, report = sync_relationships(client)
+                        mode = report['mode']
+                    else:
+                        console.print(f"[yellow]Follower count suggests {missing:,} unfollowers since the last "
+                                      f"snapshot; run with --sync full to find them[/yellow]")
             
             progress.update(task, description="Analyzing changes...")
         
-        if previous_snapshot:
+        if mode == 'incremental':
+            pages = -(-previous_snapshot['followers_count'] // 200)
+            console.print(f"🔄 Sync: [blue]incremental[/blue] ({reason}), {report['pages']} pages "
+                          f"instead of ~{pages:,} for a full sync; unfollowers are found by full syncs")
+        else:
+            console.print(f"🔁 Sync: [blue]full[/blue] ({reason})")
+        
+        if previous_snapshot and mode == 'incremental':
+            new_followers = detector.find_new_followers(followers, previous_snapshot)
+            
+            console.print(f"\n📊 Changes since {previous_snapshot['datetime'][:19]}:")
+            console.print(f"📈 New followers: [green]{len(new_followers)}[/green]")
+            last_full = detector.store.last_full_sync(client.username)
+            if last_full:
+                console.print(f"🕒 Last full sync: {last_full['taken_at'][:19]}")
+            
+            display_new_followers(new_followers)
+            
+        elif previous_snapshot:
             # Find unfollowers and new followers
             unfollowers = detector.find_unfollowers(followers, previous_snapshot)
             new_followers = detector.find_new_followers(followers, previous_snapshot)
@@ -438,7 +713,7 @@ def track_unfollowers(ctx, save_snapshot):
         # Save new snapshot
         if save_snapshot or not previous_snapshot:
             if not previous_snapshot or Confirm.ask("Save current state as new snapshot?"):
-                detector.save_followers_snapshot(followers, following)
+                detector.save_followers_snapshot(followers, following, incremental=mode == 'incremental')
                 
     except Exception as e:
         console.print(f"❌ Error: [red]{e}[/red]")
@@ -448,60 +723,82 @@ def track_unfollowers(ctx, save_snapshot):
 @cli.command()
 @click.option("--posts", default=10, show_default=True, help="Number of recent posts to analyze")
 @click.option("--top", default=10, show_default=True, help="Show bottom N engaging followers")
+@click.option("--workers", default=4, show_default=True, help="Maximum concurrent likers/comments requests")
+@click.option("--refresh", is_flag=True, help="Fetch likers and comments of every post, ignoring the engagement cache")
+@click.option("--no-engagement-cache", is_flag=True, help="Neither read nor update the engagement cache")
+@click.option("--like-weight", default=1.0, show_default=True, help="Score of one like")
+@click.option("--comment-weight", default=1.0, show_default=True, help="Score of one comment")
+@click.option("--half-life", type=float, help="Days after which engagement on a post counts half (default: no decay)")
 @click.pass_context
-def low_engagers(ctx, posts, top):
+def low_engagers(ctx, posts, top, workers, refresh, no_engagement_cache, like_weight, comment_weight, half_life):
     """📉 Find followers who engage least (likes/comments)"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+    from rich.table import Table
+    from services.engagement_analyzer import EngagementAnalyzer
+    from services.engagement_matrix import bottom_k
+    from services.engagement_store import EngagementStore
+
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
+    store = None
+    
+    try:
+        console.print(f"🔍 Fetching last {posts} posts...")
+        media_list = client.get_user_posts(amount=posts)
+        if not media_list:
+            console.print("[red]No posts found.[/red]")
+            return
 
-    console.print(f"🔍 Fetching last {posts} posts...")
-    media_list = client.get_user_posts(amount=posts)
-    if not media_list:
-        console.print("[red]No posts found.[/red]")
-        return
+        followers = client.get_followers()
+
+        if not no_engagement_cache:
+            # --refresh: everything is due, but the fresh results still update the cache
+            store = EngagementStore(get_data_dir() / "engagement.db", **({'recent_days': float('inf')} if refresh else {}))
+        analyzer = EngagementAnalyzer(client, max_workers=workers, store=store)
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Fetching likers and comments...", total=len(media_list))
+            matrix = analyzer.engagement_matrix(
+                media_list,
+                followers.keys(),
+                on_progress=lambda media_pk, done, total: progress.update(
+                    task, completed=done,
+                    description=f"Fetched post {media_pk}" if media_pk else f"{done} posts from the engagement cache"
+                )
+            )
 
-    followers = client.get_followers()
-    engagement_count = {uid: 0 for uid in followers.keys()}
+        if store:
+            console.print(f"[dim]{len(media_list) - len(analyzer.cached_posts)} posts fetched, "
+                          f"{len(analyzer.cached_posts)} from the engagement cache ({store.db_path})[/dim]")
+        if analyzer.failed_posts:
+            console.print(f"[yellow]Warning: {len(analyzer.failed_posts)} posts could not be fetched and were skipped[/yellow]")
 
-    for media in media_list:
-        try:
-            likers = client.cl.media_likers(media.pk)
-        except Exception as e:
-            console.print(f"[yellow]Warning: Failed to fetch likers for post {media.pk}: {e}[/yellow]")
-            likers = []
+        scores = matrix.scores(like_weight, comment_weight, half_life)
+        likes, comments = matrix.totals('likers'), matrix.totals('comments')
 
-        try:
-            raw_comments = client.cl.media_comments(media.pk)
-        except Exception as e:
-            console.print(f"[yellow]Warning: Failed to fetch comments for post {media.pk}: {e}[/yellow]")
-            raw_comments = []
-
-        # Count likes
-        for user in likers:
-            if user.pk in engagement_count:
-                engagement_count[user.pk] += 1
-
-        # Count comments (safely)
-        for comment in raw_comments:
-            try:
-                if comment.user and comment.user.pk in engagement_count:
-                    engagement_count[comment.user.pk] += 1
-            except AttributeError:
-                console.print(f"[yellow]Skipping malformed comment[/yellow]")
-
-    # Sort by lowest engagement
-    least_engagers = sorted(engagement_count.items(), key=lambda x: x[1])[:top]
-
-    table = Table(title=f"🚨 Least Engaging Followers (Out of {len(followers)} followers)")
-    table.add_column("Username", style="cyan")
-    table.add_column("Full Name")
-    table.add_column("Engagements", justify="right")
-
-    for uid, count in least_engagers:
-        user = followers[uid]
-        table.add_row(user.username, user.full_name or "—", str(count))
+        table = Table(title=f"🚨 Least Engaging Followers (Out of {len(followers)} followers)")
+        table.add_column("Username", style="cyan")
+        table.add_column("Full Name")
+        table.add_column("Likes", justify="right")
+        table.add_column("Comments", justify="right")
+        table.add_column("Score", justify="right")
 
-    console.print(table)
-    client.logout()
+        for row in bottom_k(scores, top):
+            user = followers[str(matrix.user_ids[row])]
+            table.add_row(user.username, user.full_name or "—", str(likes[row]), str(comments[row]), f"{scores[row]:g}")
+
+        console.print(table)
+        
+    except Exception as e:
+        console.print(f"❌ Error finding low engagers: [red]{e}[/red]")
+    finally:
+        if store:
+            store.close()
+        client.logout()
 
 @cli.command()
 @click.option('--posts-limit', '-l', default=20, help='Number of posts to include in report (default: 20)')
@@ -509,6 +806,10 @@ def low_engagers(ctx, posts, top):
 @click.pass_context
 def full_report(ctx, posts_limit, export):
     """Generate a complete analytics report"""
+    from rich.panel import Panel
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
@@ -595,7 +896,7 @@ def full_report(ctx, posts_limit, export):
                     'total_engagement': total_engagement if posts_data else 0,
                 } if posts_data else {}
             }
-            export_data(export_report, "instagram_full_report")
+            export_data(export_report, "instagram_full_report", records_key='posts')
         
     except Exception as e:
         console.print(f"❌ Error generating report: [red]{e}[/red]")
@@ -607,12 +908,17 @@ def full_report(ctx, posts_limit, export):
 @click.pass_context
 def full_report_followers(ctx, limit):
     """Complete analysis: not following back + unfollowers tracking"""
+    from rich.panel import Panel
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.prompt import Confirm
+    from services.unfollower_detector import UnfollowersDetector
+    
     client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'])
     
     try:
         console.print(Panel.fit("🔍 Complete Follower Analysis", style="bold blue"))
         
-        detector = UnfollowersDetector(client)
+        detector = UnfollowersDetector(client, get_data_dir())
         
         with Progress(
             SpinnerColumn(),
@@ -620,8 +926,7 @@ def full_report_followers(ctx, limit):
             console=console,
         ) as progress:
             task = progress.add_task("Fetching all data...", total=None)
-            followers = client.get_followers()
-            following = client.get_following()
+            followers, following = fetch_relationships(client)
             
             progress.update(task, description="Loading previous data...")
             previous_snapshot = detector.load_latest_snapshot()
@@ -662,5 +967,319 @@ def full_report_followers(ctx, limit):
     finally:
         client.logout()
 
+@cli.command()
+@click.argument('accounts_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--workers', '-w', default=4, show_default=True, help='Accounts processed in parallel (one process each)')
+@click.option('--task', 'tasks', multiple=True, default=['track'], show_default=True,
+              type=click.Choice(['track', 'not-following-back', 'analytics']), help='What to run per account (repeatable)')
+@click.option('--export', is_flag=True, help='Export per-account results to JSON file')
+@click.pass_context
+def batch(ctx, accounts_file, workers, tasks, export):
+    """Track many accounts from ACCOUNTS_FILE (username or username:password per line) in parallel"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+    from rich.table import Table
+    from services.batch_runner import RESULT_FIELDS, BatchRunner, parse_accounts_file
+    
+    accounts = parse_accounts_file(accounts_file)
+    if not accounts:
+        console.print(f"[yellow]No accounts in {accounts_file}[/yellow]")
+        return
+    if ctx.obj['replay'] or ctx.obj['record']:
+        console.print("[yellow]Warning: --record/--replay are not supported by batch and are ignored[/yellow]")
+    
+    runner = BatchRunner(get_data_dir(), workers=workers, tasks=tasks, cache_ttl=ctx.obj['cache_ttl'],
+                         fresh_login=ctx.obj['fresh_login'], session_cache=ctx.obj['session_cache'],
+                         mock=ctx.obj['mock'] if ctx.obj['offline'] else None)
+    started = time.perf_counter()
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task(f"Running {', '.join(tasks)} for {len(accounts)} accounts...", total=len(accounts))
+        
+        def on_result(result):
+            if result['status'] == 'ok':
+                progress.console.print(f"✅ @{result['username']} ({result['timings']['total']:.1f}s)")
+            else:
+                progress.console.print(f"❌ @{result['username']}: [red]{result['error']}[/red]")
+            progress.advance(task)
+        
+        results = runner.run(accounts, on_result)
+    
+    elapsed = time.perf_counter() - started
+    table = Table(title=f"📋 Batch Summary ({len(accounts)} accounts, {workers} workers)", show_header=True,
+                  header_style="bold magenta")
+    table.add_column("Account", style="cyan", no_wrap=True)
+    table.add_column("Status", justify="center")
+    table.add_column("Followers", justify="right", no_wrap=True)
+    table.add_column("Following", justify="right", no_wrap=True)
+    table.add_column("Unfollowed", style="red", justify="right", no_wrap=True)
+    table.add_column("New", style="green", justify="right", no_wrap=True)
+    table.add_column("Not Back", justify="right", no_wrap=True)
+    
+    phases = ('login', 'fetch', 'analyze', 'snapshot', 'logout', 'total')
+    timing_table = Table(title="⏱️ Per-Account Timings (seconds)", show_header=True, header_style="bold magenta")
+    timing_table.add_column("Account", style="cyan", no_wrap=True)
+    for phase in phases:
+        timing_table.add_column(phase.capitalize(), justify="right", no_wrap=True,
+                                style="bold" if phase == 'total' else None)
+    
+    for result in results:
+        counts, timings = result['counts'], result['timings']
+        table.add_row(
+            f"@{result['username']}",
+            "✅" if result['status'] == 'ok' else "❌",
+            *(f"{counts[key]:,}" if key in counts else "—"
+              for key in ('followers', 'following', 'unfollowers', 'new_followers', 'not_following_back'))
+        )
+        timing_table.add_row(f"@{result['username']}",
+                             *(f"{timings[phase]:.2f}" if phase in timings else "—" for phase in phases))
+    console.print(table)
+    console.print(timing_table)
+    
+    failed = [result for result in results if result['status'] != 'ok']
+    account_seconds = sum(result['timings'].get('total', 0) for result in results)
+    console.print(f"⏱️ {elapsed:.1f}s wall time for {account_seconds:.1f}s of account work "
+                  f"({account_seconds / max(elapsed, 1e-9):.1f}x parallel) | "
+                  f"✅ {len(results) - len(failed)} succeeded | ❌ {len(failed)} failed")
+    for result in failed:
+        console.print(f"[red]@{result['username']}: {result['error']}[/red] "
+                      f"(log: {runner.account_dir(result['username']) / 'batch.log'})")
+    
+    if export:
+        export_data({'generated_at': datetime.now().isoformat(), 'tasks': list(tasks), 'workers': workers,
+                     'wall_seconds': elapsed, 'accounts': results}, "instagram_batch", records_key='accounts',
+                    fields=list(RESULT_FIELDS))
+    
+    if failed:
+        ctx.exit(1)
+
+@cli.command()
+@click.option('--status', is_flag=True, help='Show whether a daemon is running and what it has cached')
+@click.option('--stop', is_flag=True, help='Stop the running daemon')
+@click.pass_context
+def serve(ctx, status, stop):
+    """Keep a logged-in client running and serve the other commands over a Unix socket"""
+    from pkg.daemon import SOCKET_NAME, InstaClientServer, RemoteInstaClient
+    
+    socket_path = get_data_dir() / SOCKET_NAME
+    if status or stop:
+        remote = RemoteInstaClient.connect(socket_path)
+        if not remote:
+            console.print(f"💤 [yellow]No daemon listening on {socket_path}[/yellow]")
+            return
+        if status:
+            info = remote.info()
+            console.print(f"🛰️ Daemon pid {info['pid']} serving @{info['username']} for {info['uptime'] / 60:.1f} min")
+            console.print(f"📨 Requests: {info['requests']:,} | 💾 Cache: {info['cache']['entries']} entries, "
+                          f"{info['cache']['hits']} hits, {info['cache']['misses']} misses")
+        if stop:
+            remote.shutdown()
+            console.print(f"🛑 Daemon pid {remote.daemon_pid} stopped")
+        return
+    
+    client = get_authenticated_client(ctx.obj['username'], ctx.obj['password'], use_daemon=False)
+    
+    try:
+        server = InstaClientServer(client, socket_path)
+        console.print(f"🛰️ Serving @{client.username} on [blue]{socket_path}[/blue] (Ctrl+C or `serve --stop` to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            
+    except Exception as e:
+        console.print(f"❌ Error: [red]{e}[/red]")
+    finally:
+        client.logout()
+
+@cli.command()
+@click.argument('usernames_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', default=None, help='NDJSON output file (default: profiles_<timestamp>.ndjson)')
+@click.option('--concurrency', default=10, show_default=True, help='Maximum requests in flight')
+@click.option('--rate', default=2.0, show_default=True, help='Requests per second per host')
+@click.option('--retries', default=3, show_default=True, help='Retries per profile on 429/5xx')
+@click.option('--base-url', default=None, help='Endpoint root, e.g. a local stand-in server (default: Instagram)')
+@click.option('--timeout', default=10.0, show_default=True, help='Request timeout in seconds')
+@click.option('--http2', is_flag=True, help='Use HTTP/2 (needs the h2 package)')
+@click.option('--max-age', default=3600, show_default=True, help='Seconds a cached profile is reused without revalidation')
+@click.option('--no-cache', is_flag=True, help='Always download profiles, do not read or write the profile cache')
+@click.pass_context
+def scrape_profiles(ctx, usernames_file, output, concurrency, rate, retries, base_url, timeout, http2, max_age, no_cache):
+    """Scrape public profiles listed in USERNAMES_FILE (one per line) without logging in"""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+    from pkg.insta_scrape import ScrapeTransport, scrape_users, BASE_URL
+    from pkg.mock_backend import start_profile_server
+    from pkg.profile_cache import ProfileCache
+    
+    with open(usernames_file) as f:
+        usernames = [line.strip().lstrip('@') for line in f if line.strip()]
+    base_url = base_url or BASE_URL
+    output = output or f"profiles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+    failed = []
+    transport = ScrapeTransport(timeout=timeout, max_connections=concurrency, max_keepalive=concurrency, http2=http2)
+    cache = None if no_cache else ProfileCache(get_data_dir() / "profile_cache", max_age=max_age)
+    stand_in = None
+    if ctx.obj['offline']:
+        # Recorded profiles in the live profile cache are replayed, the rest are synthetic
+        faults = ctx.obj['mock'] or {}
+        stand_in = start_profile_server(latency=faults.get('latency', 0.0), error_rate=faults.get('errors', 0.0),
+                                        throttle_rate=faults.get('throttle', 0.0),
+                                        profile_dir=DATA_DIR / "profile_cache")
+        base_url = f"http://127.0.0.1:{stand_in.server_address[1]}"
+
+    async def run(out, progress, task):
+        async for username, profile, error in scrape_users(usernames, concurrency=concurrency, rate=rate,
+                                                           retries=retries, base_url=base_url,
+                                                           transport=transport, cache=cache):
+            if error is None:
+                out.write(json.dumps(profile, default=str) + "\n")
+            else:
+                failed.append((username, error))
+            progress.advance(task)
+
+    try:
+        with open(output, 'w') as out, Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Scraping profiles...", total=len(usernames))
+            asyncio.run(run(out, progress, task))
+    finally:
+        if stand_in:
+            stand_in.shutdown()
+
+    console.print(f"✅ {len(usernames) - len(failed)} profiles written to [green]{output}[/green]")
+    if cache:
+        stats = cache.stats()
+        console.print(f"💾 Profile cache: {stats['hits']} fresh, {stats['revalidated']} not modified, "
+                      f"{stats['misses']} downloaded")
+    for username, error in failed[:10]:
+        console.print(f"[yellow]Warning: @{username} failed: {error}[/yellow]")
+    if len(failed) > 10:
+        console.print(f"[yellow]... and {len(failed) - 10} more failures[/yellow]")
+
+@cli.command()
+@click.argument('target')
+@click.option('--following', is_flag=True, help='History of you following them instead of them following you')
+@click.pass_context
+def history(ctx, target, following):
+    """Show when @TARGET followed/unfollowed, from the local event index"""
+    from rich.prompt import Prompt
+    from rich.table import Table
+    from services.snapshot_store import SnapshotStore, FOLLOWERS, FOLLOWING
+    
+    account = ctx.obj['username'] or Prompt.ask("Enter Instagram username")
+    store = SnapshotStore(get_data_dir() / "snapshots.db")
+    
+    try:
+        user_id = store.find_user_id(target) or target
+        events = store.user_history(account, user_id, FOLLOWING if following else FOLLOWERS)
+        
+        if not events['events']:
+            console.print(f"🤷 [yellow]No history for {target} in the snapshots of @{account}[/yellow]")
+            return
+        
+        console.print(f"👤 @{events['username'] or target} ({events['full_name'] or 'No name'})")
+        console.print(f"👀 First seen: [blue]{events['first_seen'] or '—'}[/blue]")
+        console.print(f"📈 Follows: [green]{events['follows']}[/green] | 📉 Unfollows: [red]{events['unfollows']}[/red]")
+        console.print(f"📌 Currently {'following' if events['is_current'] else 'not following'}")
+        
+        table = Table(title="🕒 Events", show_header=True)
+        table.add_column("#", style="dim", width=4)
+        table.add_column("Event", style="cyan")
+        table.add_column("When", style="yellow")
+        for i, event in enumerate(events['events'], 1):
+            table.add_row(str(i), event['event'], event['ts'][:19])
+        console.print(table)
+        
+    finally:
+        store.close()
+
+@cli.command()
+@click.option('--days', '-d', default=30, show_default=True, help='Report churn over the last N days')
+@click.option('--top', default=10, show_default=True, help='Number of most frequent unfollowers to show')
+@click.pass_context
+def churn(ctx, days, top):
+    """Follower churn over a time range, from the local event index"""
+    from rich.prompt import Prompt
+    from rich.table import Table
+    from services.snapshot_store import SnapshotStore
+    
+    account = ctx.obj['username'] or Prompt.ask("Enter Instagram username")
+    store = SnapshotStore(get_data_dir() / "snapshots.db")
+    
+    try:
+        report = store.churn(account, since=datetime.now() - timedelta(days=days), top=top)
+        
+        console.print(f"\n📊 Churn for @{account} over the last {days} days:")
+        console.print(f"📈 Follows: [green]{report['follows']}[/green]")
+        console.print(f"📉 Unfollows: [red]{report['unfollows']}[/red]")
+        console.print(f"📊 Net change: [{'green' if report['net'] >= 0 else 'red'}]{report['net']:+d}[/]")
+        
+        if report['daily']:
+            table = Table(title="📅 Daily Churn", show_header=True)
+            table.add_column("Day", style="yellow")
+            table.add_column("Follows", style="green", justify="right")
+            table.add_column("Unfollows", style="red", justify="right")
+            for day in report['daily']:
+                table.add_row(day['day'], f"{day['follows']:,}", f"{day['unfollows']:,}")
+            console.print(table)
+        
+        if report['top_churners']:
+            table = Table(title="🔁 Most Frequent Unfollowers", show_header=True)
+            table.add_column("Username", style="cyan")
+            table.add_column("Unfollows", style="red", justify="right")
+            for user in report['top_churners']:
+                table.add_row(f"@{user['username'] or user['user_id']}", str(user['unfollows']))
+            console.print(table)
+        
+    finally:
+        store.close()
+
+@cli.command()
+@click.option('--keep-days', type=int, default=None,
+              help='Drop snapshots and follow/unfollow events older than N days (default: keep all)')
+@click.option('--keyframe-interval', type=int, default=24, show_default=True, help='Store a full keyframe every N snapshots')
+@click.option('--all-accounts', is_flag=True, help='Compact every account, not only --username')
+@click.pass_context
+def compact(ctx, keep_days, keyframe_interval, all_accounts):
+    """Apply retention and fold snapshot history into keyframes + deltas"""
+    from rich.prompt import Prompt
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from services.snapshot_store import SnapshotStore
+    
+    account = None if all_accounts else (ctx.obj['username'] or Prompt.ask("Enter Instagram username"))
+    store = SnapshotStore(get_data_dir() / "snapshots.db", keyframe_interval=keyframe_interval)
+    
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Compacting snapshot history...", total=None)
+            stats = store.compact(account, keep_days=keep_days)
+        
+        console.print(f"🗑️  Deleted snapshots: [red]{stats['deleted_snapshots']}[/red] "
+                      f"(and {stats['deleted_events']:,} follow/unfollow events)")
+        console.print(f"🔁 Re-encoded snapshots: [blue]{stats['rewritten_snapshots']}[/blue]")
+        console.print(f"💾 Database size: {stats['bytes_before']:,} → [green]{stats['bytes_after']:,}[/green] bytes")
+        
+    except Exception as e:
+        console.print(f"❌ Error compacting snapshots: [red]{e}[/red]")
+    finally:
+        store.close()
+
 if __name__ == "__main__":
     cli()
\ No newline at end of file
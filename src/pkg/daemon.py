@@ -0,0 +1,226 @@
+import contextlib
+import logging
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SOCKET_NAME = "daemon.sock"
+
+# InstaClient methods a thin client may call; the session itself stays with the daemon
+REMOTE_METHODS = {
+    'get_followers', 'get_following', 'get_relationships', 'iter_followers_pages', 'iter_following_pages',
+    'get_user_posts', 'get_media_likers', 'get_media_comments', 'fetch_media_likers', 'fetch_media_comments',
+    'get_user_info', 'get_follower_analytics',
+    'invalidate_cache', 'cache_summary', 'rate_limit_summary',
+}
+
+# Safe to run side by side: they run on their own instagrapi client copies (InstaClient._own_client)
+# or only touch state behind InstaClient's own locks. Everything else uses the main client, its
+# session or the fetch checkpoints and is serialized.
+CONCURRENT_METHODS = {
+    'get_media_likers', 'get_media_comments', 'fetch_media_likers', 'fetch_media_comments',
+    'invalidate_cache', 'cache_summary', 'rate_limit_summary',
+}
+
+_HEADER = struct.Struct('!Q')
+
+
+def send_message(sock: socket.socket, message: Any):
+    """Write one length-prefixed pickle frame"""
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(payload)))
+    sock.sendall(payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("daemon connection closed mid-message")
+        received += n
+    return buffer
+
+
+def recv_message(sock: socket.socket) -> Any:
+    """Read one length-prefixed pickle frame"""
+    size, = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return pickle.loads(_recv_exactly(sock, size))
+
+
+def _picklable_error(error: Exception) -> Exception:
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+class InstaClientServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, client, socket_path: Path):
+        """
+        Serve a logged-in InstaClient to thin clients over a Unix socket
+
+        The client keeps its session, request cache and rate limiter between requests,
+        so repeated commands neither log in again nor refetch what is still cached.
+        Connections are handled concurrently. Calls in CONCURRENT_METHODS (the likers and
+        comments requests of low-engagers) overlap, every other call on the client runs
+        one at a time.
+        Messages are pickled, which is why the socket is only accessible to its owner
+        (mode 0600); never expose it to other users.
+
+        Args:
+            client: Logged-in InstaClient
+            socket_path: Path of the Unix socket to listen on
+        """
+        self.client = client
+        self.socket_path = Path(socket_path)
+        self.started = time.time()
+        self.requests = 0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # Held for calls outside CONCURRENT_METHODS: the main instagrapi client is not thread-safe
+        self._client_lock = threading.Lock()
+
+        if self.socket_path.exists():
+            if RemoteInstaClient.connect(self.socket_path):
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Created owner-only from the start, a later chmod would leave a window open
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _Handler)
+        finally:
+            os.umask(umask)
+
+    def info(self) -> Dict:
+        with self._lock:
+            requests = self.requests
+        return {
+            'username': self.client.username,
+            'user_id': self.client.user_id,
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'requests': requests,
+            'cache': self.client.request_cache.stats(),
+            'methods': sorted(REMOTE_METHODS),
+        }
+
+    def dispatch(self, request: Dict) -> Any:
+        with self._lock:
+            self.requests += 1
+        op = request.get('op')
+        if op == 'hello':
+            return self.info()
+        if op == 'shutdown':
+            # shutdown() waits for serve_forever, which waits for this handler
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return True
+        if op == 'call' and request.get('method') in REMOTE_METHODS:
+            method = getattr(self.client, request['method'])
+            # Connections are served on their own threads but share the one client
+            lock = contextlib.nullcontext() if request['method'] in CONCURRENT_METHODS else self._client_lock
+            with lock:
+                result = method(*request.get('args', ()), **request.get('kwargs', {}))
+                # Generators cannot cross the socket
+                return list(result) if request['method'].startswith('iter_') else result
+        raise ValueError(f"Unsupported daemon request: {op} {request.get('method', '')}".strip())
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, EOFError, struct.error):
+                return
+            try:
+                response = {'ok': True, 'result': self.server.dispatch(request)}
+            except Exception as e:
+                self.server.logger.error(f"Daemon request {request.get('method') or request.get('op')} failed: {e}")
+                response = {'ok': False, 'error': _picklable_error(e)}
+            send_message(self.request, response)
+
+
+class RemoteInstaClient:
+    def __init__(self, socket_path: Path, info: Dict):
+        """
+        Stand-in for InstaClient that forwards API calls to a running daemon
+
+        Use RemoteInstaClient.connect() rather than building it directly. Every call
+        opens its own connection, so it is safe to share between threads the way the
+        engagement analyzer does.
+        """
+        self.socket_path = Path(socket_path)
+        self.username = info['username']
+        self.user_id = info['user_id']
+        self.daemon_pid = info['pid']
+        self.methods = set(info['methods'])
+        self.is_logged_in = True
+        self.session_restored = True
+
+    @classmethod
+    def connect(cls, socket_path: Path, timeout: float = 1.0) -> Optional["RemoteInstaClient"]:
+        """
+        Connect to the daemon listening on socket_path
+
+        Returns:
+            RemoteInstaClient: Proxy to the daemon's client, or None if no daemon is running
+        """
+        try:
+            info = cls._request(socket_path, {'op': 'hello'}, timeout=timeout)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return cls(socket_path, info)
+
+    @staticmethod
+    def _request(socket_path: Path, request: Dict, timeout: Optional[float] = None) -> Any:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            send_message(sock, request)
+            response = recv_message(sock)
+        if not response['ok']:
+            raise response['error']
+        return response['result']
+
+    def __getattr__(self, name: str):
+        if name not in self.__dict__.get('methods', ()):
+            raise AttributeError(f"{name} is not available through the daemon")
+
+        def call(*args, **kwargs):
+            return self._request(self.socket_path, {'op': 'call', 'method': name, 'args': args, 'kwargs': kwargs})
+
+        call.__name__ = name
+        return call
+
+    def info(self) -> Dict:
+        """Account, uptime, request count and cache statistics of the daemon"""
+        return self._request(self.socket_path, {'op': 'hello'})
+
+    def shutdown(self) -> bool:
+        """Stop the daemon; it logs out and saves its session on the way down"""
+        return self._request(self.socket_path, {'op': 'shutdown'})
+
+    def logout(self, forget_session: bool = False) -> bool:
+        """No-op: the session belongs to the daemon and outlives this command"""
+        return True
@@ -0,0 +1,261 @@
+import abc
+import csv
+from datetime import date, datetime
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMATS = ('json', 'ndjson', 'csv', 'parquet')
+EXTENSIONS = {'json': 'json', 'ndjson': 'ndjson', 'csv': 'csv', 'parquet': 'parquet'}
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    return str(value)
+
+
+def dumps(value, indent: bool = False) -> bytes:
+    """
+    JSON as UTF-8 bytes, compact unless indent, with orjson when it is installed
+
+    Datetimes become ISO strings, records with to_dict()/model_dump() their dicts and
+    anything else its str(), like the old json.dump(..., default=str) exports.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default,
+                            option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0))
+    if indent:
+        return json.dumps(value, default=_default, indent=2, ensure_ascii=False).encode()
+    return json.dumps(value, default=_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+SCALARS = (str, int, float, bool, type(None))
+
+
+def _scalar(value):
+    """Cell value for a flat format: nested structures are stored as JSON text"""
+    if type(value) in SCALARS:
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return dumps(value).decode()
+
+
+class Exporter(abc.ABC):
+    def __init__(self, path: Path, meta: Optional[Dict] = None, records_key: Optional[str] = 'records',
+                 fields: Optional[Sequence[str]] = None):
+        """
+        Streaming writer for a list of records plus optional metadata
+
+        write() takes one record (a flat dict) at a time and hands it to the file right
+        away, so exporting a million rows never holds more than a batch in memory.
+        Use as a context manager or call close().
+
+        Flat formats (CSV, Parquet) have fixed columns: fields, or the first record's
+        keys when no fields are given. A record may leave a column out (written empty),
+        but a key outside the columns raises ValueError rather than being dropped, so
+        callers whose records vary in shape pass the full field list.
+
+        Args:
+            path: Output file
+            meta: Values describing the export (generated_at, totals, ...)
+            records_key: Name of the record list where the format has one (JSON), None for a bare list
+            fields: Columns of a flat format (optional, defaults to the first record's keys)
+        """
+        self.path = Path(path)
+        self.meta = meta or {}
+        self.records_key = records_key
+        self.fields = list(fields) if fields else None
+        self._field_set = set(self.fields or ())
+        self.rows = 0
+
+    @abc.abstractmethod
+    def write(self, record: Dict):
+        """Append one record"""
+
+    def write_many(self, records: Iterable[Dict]) -> int:
+        for record in records:
+            self.write(record)
+        return self.rows
+
+    @abc.abstractmethod
+    def close(self):
+        """Finish the file; safe to call more than once"""
+
+    def _check_fields(self, record: Dict) -> bool:
+        """Check a record against the columns of a flat format, returns True if it just defined them"""
+        if self.fields is None:
+            self.fields = list(record)
+            self._field_set = set(self.fields)
+            return True
+        if not self._field_set.issuperset(record):
+            unexpected = ', '.join(str(key) for key in record if key not in self._field_set)
+            raise ValueError(f"Record has fields that are not columns of {self.path.name}: {unexpected} "
+                             f"(columns: {', '.join(self.fields)})")
+        return False
+
+    def _write_meta_sidecar(self):
+        # Flat formats only hold the records; the rest goes next to them
+        if self.meta:
+            self.path.with_name(self.path.name + ".meta.json").write_bytes(dumps(self.meta))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonExporter(Exporter):
+    """One JSON document: the metadata and the records under records_key, one record per line"""
+
+    def __init__(self, path: Path, meta: Optional[Dict] = None, records_key: Optional[str] = 'records',
+                 fields: Optional[Sequence[str]] = None):
+        # Records are written whole, fields only matter to the flat formats
+        super().__init__(path, meta, records_key, fields)
+        self.file = open(self.path, 'wb')
+        head = dumps({**self.meta, records_key: []} if records_key else [])
+        # Everything up to the empty list's "[", records are spliced in after it
+        self.file.write(head[:head.rindex(b'[') + 1] + b'\n')
+        self.tail = head[head.rindex(b'[') + 1:]
+
+    def write(self, record: Dict):
+        self.file.write((b',\n' if self.rows else b'') + dumps(record))
+        self.rows += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.write(b'\n' + self.tail + b'\n')
+            self.file.close()
+
+
+class NdjsonExporter(Exporter):
+    """One JSON object per line; metadata in <file>.meta.json"""
+
+    def __init__(self, path: Path, meta: Optional[Dict] = None, records_key: Optional[str] = 'records',
+                 fields: Optional[Sequence[str]] = None):
+        super().__init__(path, meta, records_key, fields)
+        self.file = open(self.path, 'wb')
+
+    def write(self, record: Dict):
+        self.file.write(dumps(record) + b'\n')
+        self.rows += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            self._write_meta_sidecar()
+
+
+class CsvExporter(Exporter):
+    """Header from fields or the first record's keys, nested values as JSON text; metadata in <file>.meta.json"""
+
+    def __init__(self, path: Path, meta: Optional[Dict] = None, records_key: Optional[str] = 'records',
+                 fields: Optional[Sequence[str]] = None):
+        super().__init__(path, meta, records_key, fields)
+        self.file = open(self.path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if self.fields:
+            self.writer.writerow(self.fields)
+
+    def write(self, record: Dict):
+        if self._check_fields(record):
+            self.writer.writerow(self.fields)
+        self.writer.writerow([_scalar(record.get(field)) for field in self.fields])
+        self.rows += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            self._write_meta_sidecar()
+
+
+class ParquetExporter(Exporter):
+    def __init__(self, path: Path, meta: Optional[Dict] = None, records_key: Optional[str] = 'records',
+                 fields: Optional[Sequence[str]] = None, batch_size: int = 50000, compression: str = 'zstd'):
+        """
+        Compressed columnar export, needs the optional pyarrow package
+
+        Records are buffered into row groups of batch_size. The columns are fixed as
+        for every flat format, their types are taken from the first batch (columns
+        that are empty there become strings). The metadata is stored in the file's
+        key/value metadata, readable with pyarrow.parquet.read_metadata.
+        """
+        super().__init__(path, meta, records_key, fields)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("The parquet export format needs pyarrow (pip install pyarrow)") from None
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.batch_size = batch_size
+        self.compression = compression
+        self.batch: List[Dict] = []
+        self.writer = None
+        self.closed = False
+
+    def write(self, record: Dict):
+        self._check_fields(record)
+        # Every row carries every column, pyarrow infers the columns from the first row only
+        self.batch.append({field: _scalar(record.get(field)) for field in self.fields})
+        self.rows += 1
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.batch:
+            return
+        if self.writer is None:
+            schema = self.pa.schema([
+                field.with_type(self.pa.string()) if self.pa.types.is_null(field.type) else field
+                for field in self.pa.Table.from_pylist(self.batch).schema
+            ])
+            self._open_writer(schema)
+        self.writer.write_table(self.pa.Table.from_pylist(self.batch, schema=self.writer.schema))
+        self.batch = []
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._flush()
+        if self.writer is None:
+            # No records: an empty file with just the columns and the metadata
+            self._open_writer(self.pa.schema([(field, self.pa.string()) for field in self.fields or ()]))
+        self.writer.close()
+
+    def _open_writer(self, schema):
+        if self.meta:
+            schema = schema.with_metadata({'meta': dumps(self.meta)})
+        self.writer = self.pq.ParquetWriter(self.path, schema, compression=self.compression)
+
+
+EXPORTERS = {'json': JsonExporter, 'ndjson': NdjsonExporter, 'csv': CsvExporter, 'parquet': ParquetExporter}
+
+
+def open_exporter(fmt: str, path: Path, meta: Optional[Dict] = None, records_key: Optional[str] = 'records',
+                  fields: Optional[Sequence[str]] = None) -> Exporter:
+    """
+    Exporter for one of FORMATS
+
+    Args:
+        fmt: 'json', 'ndjson', 'csv' or 'parquet'
+        path: Output file
+        meta: Values describing the export
+        records_key: Name of the record list in JSON output, None for a bare list
+        fields: Columns of the flat formats (optional, defaults to the first record's keys)
+    """
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt} (expected {', '.join(FORMATS)})")
+    return EXPORTERS[fmt](path, meta, records_key, fields)
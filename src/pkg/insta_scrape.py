@@ -1,40 +1,259 @@
 
 
-import json
-from logging import log
-from typing import Dict
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 import httpx
 import jmespath
 
-client = httpx.Client(
-    headers={
-        # this is internal ID of an instegram backend app. It doesn't change often.
-        "x-ig-app-id": "936619743392459",
-        # use browser-like features
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/62.0.3202.94 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9,ru;q=0.8",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Accept": "*/*",
-    }
-)
+from pkg.profile_cache import ProfileCache
+from pkg.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://i.instagram.com"
+PROFILE_PATH = "/api/v1/users/web_profile_info/"
+
+HEADERS = {
+    # this is internal ID of an instegram backend app. It doesn't change often.
+    "x-ig-app-id": "936619743392459",
+    # use browser-like features
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/62.0.3202.94 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9,ru;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept": "*/*",
+}
+
+# Status codes worth retrying: rate limited or a transient server error
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ScrapeTransport:
+    def __init__(self, timeout: float = 10.0, connect_timeout: float = 5.0, max_connections: int = 20,
+                 max_keepalive: int = 10, keepalive_expiry: float = 30.0, http2: bool = False,
+                 connect_retries: int = 1):
+        """
+        Connection settings shared by the sync and async scraping clients
+
+        Args:
+            timeout: Seconds allowed for reading, writing and waiting on the pool
+            connect_timeout: Seconds allowed for establishing a connection
+            max_connections: Upper bound of open connections
+            max_keepalive: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Negotiate HTTP/2, needs the optional h2 package (pip install httpx[http2])
+            connect_retries: Retries of failed connection attempts inside the transport
+        """
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.http2 = http2
+        self.connect_retries = connect_retries
+
+    def client(self) -> httpx.Client:
+        transport = httpx.HTTPTransport(limits=self.limits, http2=self.http2, retries=self.connect_retries)
+        return httpx.Client(headers=HEADERS, timeout=self.timeout, transport=transport)
+
+    def async_client(self) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2, retries=self.connect_retries)
+        return httpx.AsyncClient(headers=HEADERS, timeout=self.timeout, transport=transport)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+client = ScrapeTransport().client()
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+    """Honour Retry-After when given, otherwise exponential backoff with jitter"""
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return 2 ** attempt + random.random()
+
+
+def _read_profile(response: httpx.Response, username: str, cache: Optional[ProfileCache],
+                  entry: Optional[Dict]) -> Dict:
+    """User payload of a final (non retryable) response, served from the cache on 304"""
+    if response.status_code == 304 and entry:
+        cache.refresh(username, entry, response.headers)
+        return entry['user']
+    response.raise_for_status()
+    user = response.json()["data"]["user"]
+    if cache:
+        cache.store(username, user, response.headers)
+    return user
+
+
+def _cached(cache: Optional[ProfileCache], username: str) -> Tuple[Optional[Dict], Dict[str, str]]:
+    """Cached entry for a username and the conditional headers to revalidate it"""
+    entry = cache.load(username) if cache else None
+    return entry, ProfileCache.conditional_headers(entry)
+
+
+def scrape_user(username: str, http: Optional[httpx.Client] = None, cache: Optional[ProfileCache] = None,
+                retries: int = 3):
+    """
+    Scrape Instagram user's data
+
+    Args:
+        username: Profile to fetch
+        http: Client to use (optional, defaults to the module client)
+        cache: Profile cache to serve and revalidate from (optional)
+        retries: Retries on 429/5xx/transport errors
+
+    Returns:
+        Dict: Raw web_profile_info user payload
+    """
+    http = http or client
+    entry, headers = _cached(cache, username)
+    if entry and cache.is_fresh(entry):
+        cache.hits += 1
+        return entry['user']
+
+    for attempt in range(retries + 1):
+        try:
+            response = http.get(f"{BASE_URL}{PROFILE_PATH}", params={"username": username}, headers=headers)
+            if response.status_code not in RETRY_STATUS:
+                return _read_profile(response, username, cache, entry)
+            error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            retry_after = response.headers.get("Retry-After")
+        except httpx.TransportError as e:
+            error, retry_after = e, None
+
+        if attempt == retries:
+            raise error
+        delay = _retry_delay(attempt, retry_after)
+        logger.debug("retrying %s in %.1fs after %s", username, delay, error)
+        time.sleep(delay)
+
 
+class HostRateLimiter:
+    def __init__(self, rate: float, burst: float):
+        """
+        Token bucket per host for asyncio code
 
+        Args:
+            rate: Requests per second allowed per host
+            burst: Requests a host may receive back to back
+        """
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.throttled_seconds = 0.0
 
+    async def acquire(self, host: str):
+        bucket = self.buckets.setdefault(host, TokenBucket(self.rate, self.burst))
+        # Single threaded event loop: reserving is atomic, only the sleep yields
+        wait = bucket.reserve(time.monotonic())
+        if wait > 0:
+            self.throttled_seconds += wait
+            await asyncio.sleep(wait)
 
-def scrape_user(username: str):
-    """Scrape Instagram user's data"""
-    result = client.get(
-        f"https://i.instagram.com/api/v1/users/web_profile_info/?username={username}",
-    )
-    data = json.loads(result.content)
-    return data["data"]["user"]
 
+async def _fetch_profile(http: httpx.AsyncClient, limiter: HostRateLimiter, base_url: str,
+                         username: str, retries: int, cache: Optional[ProfileCache] = None) -> Dict:
+    """Fetch one web_profile_info payload, retrying 429/5xx and transport errors with backoff"""
+    entry, headers = _cached(cache, username)
+    if entry and cache.is_fresh(entry):
+        cache.hits += 1
+        return entry['user']
 
-def parse_user(data: Dict) -> Dict:
-    """Parse instagram user's hidden web dataset for user's data"""
-    log.debug("parsing user data {}", data['username'])
-    result = jmespath.search(
-        """{
+    host = urlsplit(base_url).netloc
+    for attempt in range(retries + 1):
+        await limiter.acquire(host)
+        try:
+            response = await http.get(f"{base_url}{PROFILE_PATH}", params={"username": username}, headers=headers)
+            if response.status_code not in RETRY_STATUS:
+                return _read_profile(response, username, cache, entry)
+            error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            retry_after = response.headers.get("Retry-After")
+        except httpx.TransportError as e:
+            error, retry_after = e, None
+
+        if attempt == retries:
+            raise error
+        delay = _retry_delay(attempt, retry_after)
+        logger.debug("retrying %s in %.1fs after %s", username, delay, error)
+        await asyncio.sleep(delay)
+
+
+async def scrape_users(usernames: Iterable[str], concurrency: int = 10, rate: float = 5.0, burst: float = 10,
+                       retries: int = 3, base_url: str = BASE_URL,
+                       http: Optional[httpx.AsyncClient] = None,
+                       fast_parse: bool = True, transport: Optional[ScrapeTransport] = None,
+                       cache: Optional[ProfileCache] = None) -> AsyncIterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+    """
+    Scrape and parse many profiles concurrently, yielding results as they complete
+
+    At most `concurrency` requests are in flight and every host is limited to `rate`
+    requests per second. A failed profile is yielded with its exception and does not
+    stop the batch.
+
+    Args:
+        usernames: Usernames to scrape
+        concurrency: Maximum number of requests in flight
+        rate: Requests per second per host
+        burst: Requests a host may receive back to back
+        retries: Retries per profile on 429/5xx/transport errors
+        base_url: Endpoint root, e.g. a local stand-in server for tests and benchmarks
+        http: AsyncClient to use (optional, one is created from transport and closed)
+        fast_parse: Parse with parse_user_fast instead of the JMESPath expression
+        transport: Connection settings (optional, defaults sized to concurrency)
+        cache: Profile cache, fresh profiles are not requested and stale ones revalidated (optional)
+
+    Yields:
+        Tuple: (username, parsed profile or None, exception or None)
+    """
+    limiter = HostRateLimiter(rate, burst)
+    owns_client = http is None
+    if owns_client:
+        http = (transport or ScrapeTransport(max_connections=concurrency, max_keepalive=concurrency)).async_client()
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for username in usernames:
+        pending.put_nowait(username)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        while True:
+            try:
+                username = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                data = await _fetch_profile(http, limiter, base_url, username, retries, cache)
+                await results.put((username, parse_user(data, fast=fast_parse), None))
+            except Exception as e:
+                await results.put((username, None, e))
+
+    total = pending.qsize()
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, total))]
+    try:
+        for _ in range(total):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if owns_client:
+            await http.aclose()
+
+
+# Compiled once at import, jmespath.search would re-parse the expression on every call
+PARSE_USER_EXPRESSION = jmespath.compile(
+    """{
         name: full_name,
         username: username,
         id: id,
@@ -44,7 +263,7 @@ def parse_user(data: Dict) -> Dict:
         email: business_email,
         bio: biography,
         bio_links: bio_links[].url,
-        homepage: external_url,        
+        homepage: external_url,
         followers: edge_followed_by.count,
         follows: edge_follow.count,
         facebook_id: fbid,
@@ -53,7 +272,7 @@ def parse_user(data: Dict) -> Dict:
         profile_image: profile_pic_url_hd,
         video_count: edge_felix_video_timeline.count,
         videos: edge_felix_video_timeline.edges[].node.{
-            id: id, 
+            id: id,
             title: title,
             shortcode: shortcode,
             thumb: display_url,
@@ -70,7 +289,7 @@ def parse_user(data: Dict) -> Dict:
         },
         image_count: edge_owner_to_timeline_media.count,
         images: edge_felix_video_timeline.edges[].node.{
-            id: id, 
+            id: id,
             title: title,
             shortcode: shortcode,
             src: display_url,
@@ -89,7 +308,146 @@ def parse_user(data: Dict) -> Dict:
         saved_count: edge_saved_media.count,
         collections_count: edge_saved_media.count,
         related_profiles: edge_related_profiles.edges[].node.username
-    }""",
-        data,
-    )
+    }"""
+)
+
+
+def parse_user(data: Dict, fast: bool = False) -> Dict:
+    """
+    Parse instagram user's hidden web dataset for user's data
+
+    Args:
+        data: web_profile_info user payload
+        fast: Use the hand-written extraction instead of PARSE_USER_EXPRESSION (same output)
+
+    Returns:
+        Dict: Parsed profile
+    """
+    if fast:
+        return parse_user_fast(data)
+    logger.debug("parsing user data %s", data['username'])
+    return PARSE_USER_EXPRESSION.search(data)
+
+
+def _get(value, *keys):
+    """JMESPath sub-expression `a.b.c`: None as soon as a step is not an object"""
+    for key in keys:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _project(value, *keys) -> Optional[List]:
+    """JMESPath flatten projection `value[].a.b`: None for a non-list, null results are dropped"""
+    if not isinstance(value, list):
+        return None
+    result = []
+    for element in value:
+        for item in (element if isinstance(element, list) else (element,)):
+            item = _get(item, *keys)
+            if item is not None:
+                result.append(item)
     return result
+
+
+def _parse_posts(edges) -> Tuple[Optional[List], Optional[List]]:
+    """Build the videos and images projections in a single walk over the timeline edges"""
+    if not isinstance(edges, list):
+        return None, None
+    videos, images = [], []
+    for element in edges:
+        for edge in (element if isinstance(element, list) else (element,)):
+            node = _get(edge, 'node')
+            if node is None:
+                continue
+            if not isinstance(node, dict):
+                node = {}
+            get = node.get
+            tagged = _project(_get(node, 'edge_media_to_tagged_user', 'edges'), 'node', 'user', 'username')
+            captions = _project(_get(node, 'edge_media_to_caption', 'edges'), 'node', 'text')
+            comments_count = _get(get('edge_media_to_comment'), 'count')
+            likes = _get(get('edge_liked_by'), 'count')
+            location = _get(get('location'), 'name')
+            videos.append({
+                'id': get('id'),
+                'title': get('title'),
+                'shortcode': get('shortcode'),
+                'thumb': get('display_url'),
+                'url': get('video_url'),
+                'views': get('video_view_count'),
+                'tagged': tagged,
+                'captions': captions,
+                'comments_count': comments_count,
+                'comments_disabled': get('comments_disabled'),
+                'taken_at': get('taken_at_timestamp'),
+                'likes': likes,
+                'location': location,
+                'duration': get('video_duration'),
+            })
+            images.append({
+                'id': get('id'),
+                'title': get('title'),
+                'shortcode': get('shortcode'),
+                'src': get('display_url'),
+                'url': get('video_url'),
+                'views': get('video_view_count'),
+                # Own copies, the two projections must not share mutable lists
+                'tagged': None if tagged is None else list(tagged),
+                'captions': None if captions is None else list(captions),
+                'comments_count': comments_count,
+                'comments_disabled': get('comments_disabled'),
+                'taken_at': get('taken_at_timestamp'),
+                'likes': likes,
+                'location': location,
+                'accesibility_caption': get('accessibility_caption'),
+                'duration': get('video_duration'),
+            })
+    return videos, images
+
+
+def parse_user_fast(data: Dict) -> Dict:
+    """
+    Hand-written equivalent of PARSE_USER_EXPRESSION
+
+    Produces the same dict as parse_user, including JMESPath's null handling, but walks
+    the video timeline once for both the videos and images projections.
+
+    Args:
+        data: web_profile_info user payload
+
+    Returns:
+        Dict: Parsed profile
+    """
+    logger.debug("parsing user data %s", data['username'])
+    if not isinstance(data, dict):
+        data = {}
+    get = data.get
+    timeline = get('edge_felix_video_timeline')
+    videos, images = _parse_posts(_get(timeline, 'edges'))
+    saved_count = _get(get('edge_saved_media'), 'count')
+    return {
+        'name': get('full_name'),
+        'username': get('username'),
+        'id': get('id'),
+        'category': get('category_name'),
+        'business_category': get('business_category_name'),
+        'phone': get('business_phone_number'),
+        'email': get('business_email'),
+        'bio': get('biography'),
+        'bio_links': _project(get('bio_links'), 'url'),
+        'homepage': get('external_url'),
+        'followers': _get(get('edge_followed_by'), 'count'),
+        'follows': _get(get('edge_follow'), 'count'),
+        'facebook_id': get('fbid'),
+        'is_private': get('is_private'),
+        'is_verified': get('is_verified'),
+        'profile_image': get('profile_pic_url_hd'),
+        'video_count': _get(timeline, 'count'),
+        'videos': videos,
+        'image_count': _get(get('edge_owner_to_timeline_media'), 'count'),
+        'images': images,
+        'saved_count': saved_count,
+        'collections_count': saved_count,
+        'related_profiles': _project(_get(get('edge_related_profiles'), 'edges'), 'node', 'username'),
+    }
@@ -1,59 +1,320 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from instagrapi import Client
-from instagrapi.exceptions import LoginRequired, ClientError
+from instagrapi.exceptions import (
+    LoginRequired, ClientError, ChallengeRequired, ClientThrottledError,
+    FeedbackRequired, PleaseWaitFewMinutes, RateLimitError
+)
 import logging
-from typing import Dict, List, Optional
+from pathlib import Path
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 import time
+import warnings
+
+from pkg.metrics import REGISTRY
+from pkg.pagination import CheckpointedPager
+from pkg.profiler import count, span, traced
+from pkg.rate_limiter import DEFAULT_LIMITS, RateLimiter
+from pkg.request_cache import RequestCache, detached, memo_key, memoized
+from pkg.session_store import SessionStore
+from pkg.user_record import UserRecord
+
+# Responses that mean "slow down" rather than "this request is broken"
+THROTTLE_ERRORS = (ClientThrottledError, PleaseWaitFewMinutes, RateLimitError, FeedbackRequired)
+
+REQUESTS = REGISTRY.counter(
+    "instaclient_requests", "API calls by endpoint class and outcome (ok, throttled, error)",
+    ["account", "endpoint", "outcome"])
+REQUEST_DURATION = REGISTRY.histogram(
+    "instaclient_request_duration_seconds", "Latency of API calls, rate-limit waits excluded", ["endpoint"])
+RATE_LIMIT_WAIT = REGISTRY.counter(
+    "instaclient_rate_limit_wait_seconds", "Seconds spent waiting for the rate limiter", ["account", "endpoint"])
+RETRIES = REGISTRY.counter(
+    "instaclient_retries", "Throttled API calls that were retried", ["account", "endpoint"])
+FOLLOWER_SYNCS = REGISTRY.counter(
+    "instaclient_follower_syncs", "Follower list fetches by mode (full, incremental)", ["account", "mode"])
+
+
+def _count_bytes(response, *args, **kwargs):
+    """requests response hook feeding the profiler's bytes_received counter"""
+    count('bytes_received', len(response.content))
+
 
 class InstaClient:
-    def __init__(self, delay_range: tuple = (1, 3)):
+    def __init__(self, delay_range: Optional[Tuple[float, float]] = None,
+                 rate_limiter: Optional[RateLimiter] = None, session_store: Optional[SessionStore] = None,
+                 checkpoint_dir: Path = Path("instagram_data") / "checkpoints", max_retries: int = 3,
+                 cache_ttl: float = 300, client_factory: Callable[[], Client] = Client):
         """
         Initialize Instagram client
         
         Args:
-            delay_range: Tuple of min/max seconds to wait between requests
+            delay_range: Deprecated, use rate_limiter. Min/max seconds between requests, mapped
+                         onto a RateLimiter spacing every endpoint's requests by their mean
+            rate_limiter: Scheduler shared by all requests (optional, defaults to RateLimiter())
+            session_store: Store used to reuse sessions across runs (optional, disabled if None)
+            checkpoint_dir: Directory for follower/following fetch checkpoints
+            max_retries: Retries of a request that was throttled by Instagram
+            cache_ttl: Seconds API results are memoized within the session (0 disables)
+            client_factory: Builds the instagrapi client, e.g. an offline FakeClient from pkg.mock_backend
         """
-        self.cl = Client()
-        self.delay_range = delay_range
+        self.client_factory = client_factory
+        # Copies of the main client for worker threads, see _own_client()
+        self._pool: List[Client] = []
+        self._pool_generation = 0
+        self._pool_lock = threading.Lock()
+        self._relogin_lock = threading.Lock()
+        self._local = threading.local()
+        self.cl = self._new_client()
+        if delay_range is not None:
+            if rate_limiter is not None:
+                raise ValueError("Pass either delay_range or rate_limiter, not both")
+            warnings.warn("InstaClient(delay_range=...) is deprecated, pass a RateLimiter as rate_limiter",
+                          DeprecationWarning, stacklevel=2)
+            rate_limiter = self._delay_range_limiter(delay_range)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.request_cache = RequestCache(ttl=cache_ttl)
+        self.session_store = session_store
+        self.checkpoint_dir = Path(checkpoint_dir)
         self.user_id = None
         self.username = None
         self.is_logged_in = False
+        self.session_restored = False
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
-    def login(self, username: str, password: str) -> bool:
+    @staticmethod
+    def _delay_range_limiter(delay_range: Tuple[float, float]) -> RateLimiter:
+        """RateLimiter closest to the old random delay between requests: no bursts, the range's mean apart"""
+        low, high = delay_range
+        interval = (low + high) / 2
+        if low < 0 or high < low or interval <= 0:
+            raise ValueError(f"delay_range must be (min, max) seconds with 0 <= min <= max, got {delay_range}")
+        return RateLimiter({name: (1 / interval, 1) for name in DEFAULT_LIMITS})
+
+    def _new_client(self) -> Client:
+        cl = self.client_factory()
+        cl.handle_exception = self._handle_exception
+        # Offline clients have no HTTP sessions to hook
+        for session in (getattr(cl, 'private', None), getattr(cl, 'public', None)):
+            if session is not None:
+                session.hooks['response'].append(_count_bytes)
+        return cl
+
+    @property
+    def cl(self) -> Client:
+        """The instagrapi client of the calling thread: its own copy inside _own_client(), else the main one"""
+        return getattr(self._local, 'cl', None) or self._cl
+
+    @cl.setter
+    def cl(self, client: Client):
+        self._cl = client
+        self._drop_pool()
+
+    def _drop_pool(self):
+        """Forget the worker copies, e.g. after the main client's session changed"""
+        with self._pool_lock:
+            self._pool = []
+            # Copies checked out right now are not taken back either
+            self._pool_generation += 1
+
+    @contextmanager
+    def _own_client(self):
+        """
+        Run the block on an instagrapi client no other thread is using
+
+        instagrapi keeps the last response (last_json) and the request headers on the
+        client, so two threads calling one client can read each other's pages. Inside
+        the block self.cl is a copy carrying the main client's session settings;
+        copies are pooled and reused by the next block.
         """
-        Login to Instagram
+        if getattr(self._local, 'cl', None) is not None:
+            # Nested block, this thread already has its own client
+            yield self._local.cl
+            return
+        with self._pool_lock:
+            cl = self._pool.pop() if self._pool else None
+            generation = self._pool_generation
+        if cl is None:
+            cl = self._new_client()
+            cl.set_settings(self._cl.get_settings())
+            cl.username = self._cl.username
+            cl.password = self._cl.password
+        self._local.cl = cl
+        try:
+            yield cl
+        finally:
+            self._local.cl = None
+            with self._pool_lock:
+                if generation == self._pool_generation:
+                    self._pool.append(cl)
+
+    @traced('client')
+    def login(self, username: str, password: str, use_session: bool = True) -> bool:
+        """
+        Login to Instagram, reusing a stored session when one is available
         
         Args:
             username: Instagram username
             password: Instagram password
+            use_session: Try the session store before doing a full login
             
         Returns:
             bool: True if login successful, False otherwise
         """
+        self._drop_pool()
+        if use_session and self._restore_session(username, password):
+            return True
+
         try:
             self.cl.login(username, password)
             self.username = username
-            self.user_id = self.cl.user_id_from_username(username)
+            # The logged in id comes with the auth data, no need for another lookup
+            self.user_id = str(self.cl.user_id or self.cl.user_id_from_username(username))
             self.is_logged_in = True
             self.logger.info(f"Successfully logged in as {username}")
+            self._save_session()
             return True
             
         except Exception as e:
             self.logger.error(f"Login failed: {str(e)}")
+            if self.session_store:
+                self.session_store.delete(username)
             self.is_logged_in = False
             return False
 
-    def logout(self) -> bool:
+    def _restore_session(self, username: str, password: str) -> bool:
+        """
+        Restore a stored session without touching the network
+
+        The session is only accepted if it decrypts with the given password and its
+        auth data still belongs to the cached user id. An expired session is picked up
+        later by _handle_exception, which performs a single relogin.
+        """
+        if not self.session_store:
+            return False
+
+        session = self.session_store.load(username, password)
+        if not session:
+            return False
+
+        auth = session['settings'].get('authorization_data') or {}
+        if not auth.get('sessionid') or str(auth.get('ds_user_id')) != session['user_id']:
+            self.logger.info(f"Stored session for {username} is incomplete, logging in again")
+            return False
+
+        try:
+            self.cl.set_settings(session['settings'])
+            self.cl.username = username
+            self.cl.password = password
+        except Exception as e:
+            self.logger.warning(f"Failed to restore session: {str(e)}")
+            self.cl = self._new_client()
+            return False
+
+        self.username = username
+        self.user_id = session['user_id']
+        self.is_logged_in = True
+        self.session_restored = True
+        self.logger.info(f"Reusing stored session for {username}")
+        return True
+
+    def _save_session(self) -> bool:
+        """Persist the current session settings so the next run can skip login"""
+        if not self.session_store or not self.cl.password:
+            return False
+        return self.session_store.save(self.username, self.cl.password, self.cl.get_settings(), self.user_id)
+
+    def _handle_exception(self, client: Client, e: Exception):
+        """
+        instagrapi exception hook: relogin once when a reused session turned out to be stale
+
+        Returning normally makes instagrapi retry the failed request.
+        """
+        if isinstance(e, LoginRequired) and client.username and client.password:
+            self._relogin(client)
+        elif isinstance(e, ChallengeRequired):
+            client.challenge_resolve(client.last_json)
+        else:
+            raise e
+
+    def _relogin(self, client: Client):
+        """
+        Renew an expired session once for the main client and all its copies
+
+        The first thread to get here logs in again and the new session goes to the
+        main client; pooled copies are dropped. A copy that still had the old session
+        when another thread renewed it takes over the new one instead of logging in too.
+        """
+        with self._relogin_lock:
+            current = self._cl.get_settings()
+            auth = client.get_settings().get('authorization_data')
+            if client is not self._cl and auth != current.get('authorization_data'):
+                client.set_settings(current)
+                return
+            self.logger.info("Session expired, logging in again")
+            client.relogin()
+            if client is not self._cl:
+                self._cl.set_settings(client.get_settings())
+            self._drop_pool()
+            self.session_restored = False
+            self._save_session()
+
+    def invalidate_cache(self, method: Optional[str] = None):
+        """
+        Drop memoized API results, e.g. after the account changed during a run
+        
+        Args:
+            method: Only drop results of this method name (optional, defaults to everything)
+        """
+        self.request_cache.invalidate(method)
+
+    def cache_summary(self) -> str:
+        """Human readable summary of memoization hits (saved round-trips) and misses"""
+        stats = self.request_cache.stats()
+        return f"{stats['hits']} hits (round-trips saved), {stats['misses']} misses"
+
+    def rate_limit_summary(self) -> str:
+        """Human readable summary of requests made and time spent throttled"""
+        stats = self.rate_limiter.stats()
+        requests = sum(entry['requests'] for entry in stats.values())
+        parts = ", ".join(f"{name}: {entry['requests']} req / {entry['throttled_seconds']:.1f}s"
+                          for name, entry in stats.items())
+        return f"{requests} requests, {self.rate_limiter.throttled_seconds:.1f}s throttled ({parts})"
+
+    @traced('client')
+    def logout(self, forget_session: bool = False) -> bool:
         """
         Logout from Instagram
         
+        With a session store the session is kept alive and saved for the next run
+        instead of being revoked, unless forget_session is set.
+        
+        Args:
+            forget_session: Revoke the session and delete it from the store
+            
         Returns:
             bool: True if logout successful
         """
+        self.logger.info(f"Rate limiter: {self.rate_limit_summary()}")
+        self.logger.info(f"Request cache: {self.cache_summary()}")
+        self._drop_pool()
+
         try:
+            if self.session_store and not forget_session:
+                self._save_session()
+                self.is_logged_in = False
+                self.user_id = None
+                self.username = None
+                self.logger.info("Session saved for next run")
+                return True
+
+            if self.session_store and self.username:
+                self.session_store.delete(self.username)
             self.cl.logout()
             self.is_logged_in = False
             self.user_id = None
@@ -69,58 +330,267 @@ class InstaClient:
         if not self.is_logged_in:
             raise LoginRequired("Please login first")
 
-    def _delay(self):
-        """Add random delay between requests to avoid rate limiting"""
-        import random
-        delay = random.uniform(*self.delay_range)
-        time.sleep(delay)
+    def _delay(self, endpoint: str = 'default') -> float:
+        """Wait for the endpoint's rate-limit budget, returns seconds waited"""
+        with span('RateLimiter.acquire', 'sleep'):
+            wait = self.rate_limiter.acquire(endpoint)
+        count('sleep_seconds', wait)
+        RATE_LIMIT_WAIT.inc(wait, account=self.username or "", endpoint=endpoint)
+        return wait
+
+    def _call(self, endpoint: str, func, *args, **kwargs):
+        """
+        Run an API call within the rate-limit budget of its endpoint class
+        
+        Throttling responses (429, feedback_required, please wait) make the limiter back
+        off and the call is retried up to max_retries times.
+        
+        Args:
+            endpoint: Endpoint class used for rate limiting
+            func: instagrapi method to call
+            
+        Returns:
+            Whatever func returns
+        """
+        account = self.username or ""
+        for attempt in range(self.max_retries + 1):
+            self._delay(endpoint)
+            try:
+                with span(f"api.{endpoint}", 'api'), REQUEST_DURATION.time(endpoint=endpoint):
+                    count('api_calls')
+                    result = func(*args, **kwargs)
+            except THROTTLE_ERRORS as e:
+                self.rate_limiter.penalize(endpoint)
+                count('throttled')
+                REQUESTS.inc(account=account, endpoint=endpoint, outcome='throttled')
+                if attempt == self.max_retries:
+                    raise
+                self.logger.warning(f"Throttled on {endpoint} ({type(e).__name__}), retry {attempt + 1}/{self.max_retries}")
+                count('retries')
+                RETRIES.inc(account=account, endpoint=endpoint)
+                continue
+            except Exception:
+                REQUESTS.inc(account=account, endpoint=endpoint, outcome='error')
+                raise
+            REQUESTS.inc(account=account, endpoint=endpoint, outcome='ok')
+            self.rate_limiter.reward(endpoint)
+            return result
+
+    def _pager(self, kind: str, target_user_id: str, page_size: int) -> CheckpointedPager:
+        """Build a checkpointed pager over the cursor API for followers or following"""
+        chunk = self.cl.user_followers_v1_chunk if kind == 'followers' else self.cl.user_following_v1_chunk
+
+        def fetch_page(cursor: Optional[str]):
+            # Pages are converted as they arrive, the pydantic models never outlive their page
+            users, next_cursor = self._call(kind, chunk, target_user_id, max_amount=page_size, max_id=cursor or "")
+            return [UserRecord.from_user(user) for user in users], next_cursor
+
+        return CheckpointedPager(
+            fetch_page,
+            self.checkpoint_dir / f"{target_user_id}_{kind}.ndjson",
+            serialize=UserRecord.to_dict,
+            deserialize=UserRecord.from_dict,
+        )
+
+    def iter_followers_pages(self, user_id: Optional[str] = None, page_size: int = 200,
+                             resume: bool = True) -> Iterator[Dict]:
+        """
+        Yield followers page by page, checkpointing each page to disk
+        
+        Args:
+            user_id: User ID to get followers for (optional, defaults to self)
+            page_size: Number of users requested per page
+            resume: Continue from an interrupted run's checkpoint if there is one
+            
+        Yields:
+            Dict: One page of followers {user_id: UserRecord}
+        """
+        self._check_login()
+        pager = self._pager('followers', str(user_id or self.user_id), page_size)
+        for page in pager.pages(resume=resume):
+            yield {user.pk: user for user in page}
 
+    def iter_following_pages(self, user_id: Optional[str] = None, page_size: int = 200,
+                             resume: bool = True) -> Iterator[Dict]:
+        """
+        Yield following page by page, checkpointing each page to disk
+        
+        Args:
+            user_id: User ID to get following for (optional, defaults to self)
+            page_size: Number of users requested per page
+            resume: Continue from an interrupted run's checkpoint if there is one
+            
+        Yields:
+            Dict: One page of following {user_id: UserRecord}
+        """
+        self._check_login()
+        pager = self._pager('following', str(user_id or self.user_id), page_size)
+        for page in pager.pages(resume=resume):
+            yield {user.pk: user for user in page}
+
+    def _fetch_newest(self, kind: str, known_ids: Set[str], user_id: Optional[str] = None,
+                      stop_after: int = 50, page_size: int = 200) -> Tuple[Dict, Dict]:
+        """
+        Page followers or following from the newest end until stop_after known ids in a row
+
+        Instagram lists roughly newest first, so once a run of ids from the last snapshot
+        shows up, everything after it is known as well. A run rather than the first known
+        id tolerates the ordering being slightly off. Nothing is checkpointed: the pages
+        are few and a partial list must never be resumed as a full one.
+
+        Returns:
+            Tuple: ({user_id: UserRecord} of every user seen, {'pages': int, 'complete': bool}),
+                   complete when the end of the list was reached before the stop condition
+        """
+        chunk = self.cl.user_followers_v1_chunk if kind == 'followers' else self.cl.user_following_v1_chunk
+        target_user_id = str(user_id or self.user_id)
+        users, cursor, pages, known_run = {}, None, 0, 0
+        while True:
+            page, cursor = self._call(kind, chunk, target_user_id, max_amount=page_size, max_id=cursor or "")
+            pages += 1
+            for user in page:
+                user = UserRecord.from_user(user)
+                users[user.pk] = user
+                known_run = known_run + 1 if str(user.pk) in known_ids else 0
+                if known_run >= stop_after:
+                    return users, {'pages': pages, 'complete': False}
+            if not cursor:
+                return users, {'pages': pages, 'complete': True}
+
+    def _fetch_all(self, kind: str, user_id: Optional[str] = None) -> Dict:
+        """Collect every page of followers or following, raising on failure"""
+        pages = self.iter_followers_pages(user_id) if kind == 'followers' else self.iter_following_pages(user_id)
+        users = {}
+        for page in pages:
+            users.update(page)
+        return users
+
+    @traced('client')
+    @memoized
     def get_followers(self, user_id: Optional[str] = None) -> Dict:
         """
         Get followers for a user (defaults to logged-in user)
         
+        Pages are checkpointed, so a failed fetch resumes where it stopped on the next call.
+        
         Args:
             user_id: User ID to get followers for (optional, defaults to self)
             
         Returns:
-            Dict: Dictionary of followers {user_id: user_info}
+            Dict: Dictionary of followers {user_id: UserRecord}
         """
         self._check_login()
         
         try:
-            target_user_id = user_id or self.user_id
-            self._delay()
-            followers = self.cl.user_followers(target_user_id)
+            followers = self._fetch_all('followers', user_id)
             self.logger.info(f"Retrieved {len(followers)} followers")
             return followers
             
         except Exception as e:
-            self.logger.error(f"Failed to get followers: {str(e)}")
+            self.logger.error(f"Failed to get followers: {str(e)} (progress checkpointed, rerun to resume)")
             return {}
 
+    @traced('client')
+    @memoized
     def get_following(self, user_id: Optional[str] = None) -> Dict:
         """
         Get following list for a user (defaults to logged-in user)
         
+        Pages are checkpointed, so a failed fetch resumes where it stopped on the next call.
+        
         Args:
             user_id: User ID to get following for (optional, defaults to self)
             
         Returns:
-            Dict: Dictionary of following {user_id: user_info}
+            Dict: Dictionary of following {user_id: UserRecord}
         """
         self._check_login()
         
         try:
-            target_user_id = user_id or self.user_id
-            self._delay()
-            following = self.cl.user_following(target_user_id)
+            following = self._fetch_all('following', user_id)
             self.logger.info(f"Retrieved {len(following)} following")
             return following
             
         except Exception as e:
-            self.logger.error(f"Failed to get following: {str(e)}")
+            self.logger.error(f"Failed to get following: {str(e)} (progress checkpointed, rerun to resume)")
             return {}
 
+    @traced('client')
+    def get_relationships(self, user_id: Optional[str] = None, known_followers: Optional[Set[str]] = None,
+                          stop_after: int = 50) -> Dict:
+        """
+        Fetch followers and following concurrently
+        
+        Both lists have their own rate-limit bucket, so they are fetched side by side
+        instead of one after the other. A failure of one list does not affect the other.
+        
+        With known_followers (the ids of the last snapshot) followers are synced
+        incrementally: only the newest pages are fetched, up to stop_after known ids in a
+        row. The result then holds the new followers plus the known ones seen on the way;
+        who unfollowed can only be told by a full fetch.
+        
+        Args:
+            user_id: User ID to get relationships for (optional, defaults to self)
+            known_followers: Follower ids already known (optional, enables the incremental sync)
+            stop_after: Known ids in a row that end an incremental sync
+            
+        Returns:
+            Dict: {'followers': {...}, 'following': {...},
+                   'errors': {kind: message or None}, 'timings': {kind: seconds},
+                   'sync': {'mode': 'full' | 'incremental', 'pages': int or None}}
+        """
+        self._check_login()
+        sync = {'mode': 'full', 'pages': None}
+
+        def fetch(kind: str):
+            started = time.perf_counter()
+            if kind == 'followers' and known_followers is not None:
+                try:
+                    users, stats = self._fetch_newest(kind, known_followers, user_id, stop_after)
+                    # Paging ran to the end, so the list is complete after all
+                    sync.update(mode='full' if stats['complete'] else 'incremental', pages=stats['pages'])
+                    self.logger.info(f"Synced {len(users)} newest followers in {stats['pages']} pages ({sync['mode']})")
+                    error = None
+                except Exception as e:
+                    users, error = {}, str(e)
+                    self.logger.error(f"Failed to sync followers: {error}")
+                return users, error, time.perf_counter() - started
+            # Shares its entries with the memoized get_followers / get_following
+            key = memo_key(self, f"get_{kind}", (('user_id', user_id),))
+            try:
+                found, users = self.request_cache.get(key)
+                error = None
+                if not found:
+                    users = self._fetch_all(kind, user_id)
+                    self.logger.info(f"Retrieved {len(users)} {kind}")
+                    if users:
+                        self.request_cache.set(key, users)
+                users = detached(users)
+            except Exception as e:
+                users, error = {}, str(e)
+                self.logger.error(f"Failed to get {kind}: {error} (progress checkpointed, rerun to resume)")
+            return users, error, time.perf_counter() - started
+
+        def fetch_on_own_client(kind: str):
+            # Both lists are paged at the same time, each needs a client of its own
+            with self._own_client():
+                return fetch(kind)
+
+        relationships = {'errors': {}, 'timings': {}}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {kind: executor.submit(fetch_on_own_client, kind) for kind in ('followers', 'following')}
+            for kind, future in futures.items():
+                users, error, elapsed = future.result()
+                relationships[kind] = users
+                relationships['errors'][kind] = error
+                relationships['timings'][kind] = elapsed
+
+        relationships['sync'] = sync
+        FOLLOWER_SYNCS.inc(account=self.username or "", mode=sync['mode'])
+        return relationships
+
+    @traced('client')
+    @memoized
     def get_user_posts(self, user_id: Optional[str] = None, amount: int = 20) -> List:
         """
         Get posts for a user (defaults to logged-in user)
@@ -136,8 +606,7 @@ class InstaClient:
         
         try:
             target_user_id = user_id or self.user_id
-            self._delay()
-            posts = self.cl.user_medias(target_user_id, amount=amount)
+            posts = self._call('media', self.cl.user_medias, target_user_id, amount=amount)
             self.logger.info(f"Retrieved {len(posts)} posts")
             return posts
             
@@ -145,6 +614,80 @@ class InstaClient:
             self.logger.error(f"Failed to get posts: {str(e)}")
             return []
 
+    @traced('client')
+    @memoized
+    def fetch_media_likers(self, media_pk: str) -> List:
+        """
+        Get users who liked a post, raising when the request fails
+
+        Unlike get_media_likers a failure cannot be mistaken for a post without
+        likes. Safe to call from several threads at once: each call runs on a
+        client of its own (see _own_client).
+
+        Args:
+            media_pk: Primary key of the media
+
+        Returns:
+            List: List of user objects
+        """
+        self._check_login()
+        with self._own_client():
+            return self._call('likers', self.cl.media_likers, media_pk)
+
+    @traced('client')
+    @memoized
+    def fetch_media_comments(self, media_pk: str) -> List:
+        """
+        Get comments on a post, raising when the request fails (see fetch_media_likers)
+
+        Args:
+            media_pk: Primary key of the media
+
+        Returns:
+            List: List of comment objects
+        """
+        self._check_login()
+        with self._own_client():
+            return self._call('comments', self.cl.media_comments, media_pk)
+
+    @traced('client')
+    def get_media_likers(self, media_pk: str) -> List:
+        """
+        Get users who liked a post
+        
+        Args:
+            media_pk: Primary key of the media
+            
+        Returns:
+            List: List of user objects, empty if the request failed
+        """
+        try:
+            return self.fetch_media_likers(media_pk)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get likers for post {media_pk}: {str(e)}")
+            return []
+
+    @traced('client')
+    def get_media_comments(self, media_pk: str) -> List:
+        """
+        Get comments on a post
+        
+        Args:
+            media_pk: Primary key of the media
+            
+        Returns:
+            List: List of comment objects, empty if the request failed
+        """
+        try:
+            return self.fetch_media_comments(media_pk)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get comments for post {media_pk}: {str(e)}")
+            return []
+
+    @traced('client')
+    @memoized
     def get_user_info(self, username: Optional[str] = None) -> Optional[Dict]:
         """
         Get user information
@@ -159,8 +702,7 @@ class InstaClient:
         
         try:
             target_username = username or self.username
-            self._delay()
-            user_info = self.cl.user_info_by_username(target_username)
+            user_info = self._call('user_info', self.cl.user_info_by_username, target_username)
             self.logger.info(f"Retrieved user info for {target_username}")
             return user_info
             
@@ -168,6 +710,7 @@ class InstaClient:
             self.logger.error(f"Failed to get user info: {str(e)}")
             return None
 
+    @traced('client')
     def get_follower_analytics(self) -> Dict:
         """
         Get basic follower analytics
@@ -179,8 +722,13 @@ class InstaClient:
         
         try:
             user_info = self.get_user_info()
-            followers = self.get_followers()
-            following = self.get_following()
+            relationships = self.get_relationships()
+            errors = {kind: error for kind, error in relationships['errors'].items() if error}
+            if errors:
+                # Sizes and mutual follows of a partial list would be silently wrong
+                raise RuntimeError("; ".join(f"failed to fetch {kind}: {error}" for kind, error in errors.items()))
+            followers = relationships['followers']
+            following = relationships['following']
             
             analytics = {
                 'follower_count': user_info.follower_count if user_info else 0,
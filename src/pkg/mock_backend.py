@@ -0,0 +1,464 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from instagrapi import Client, exceptions, types
+from instagrapi.exceptions import ClientError, ClientThrottledError
+from instagrapi.types import Comment, Media, User, UserShort
+from pydantic import BaseModel
+
+from pkg.mock_spec import FAULT_KEYS, MOCK_SPEC, MOCK_USERNAME, parse_mock_spec  # noqa: F401
+from pkg.profile_cache import ProfileCache
+
+logger = logging.getLogger(__name__)
+
+# instagrapi Client methods used by InstaClient, recorded and replayed
+RECORDED_METHODS = (
+    'user_id_from_username', 'user_followers_v1_chunk', 'user_following_v1_chunk',
+    'user_medias', 'media_likers', 'media_comments', 'user_info_by_username',
+)
+
+# Synthetic user ids are a bijection of their index into [10^9, 10^9 + ID_SPACE), so they never collide
+ID_SPACE = 9 * 10 ** 10
+ID_MULTIPLIER = 2654435761
+
+
+def make_profile(username: str, posts: int = 12) -> dict:
+    """Synthetic web_profile_info user payload"""
+    edges = [{
+        "node": {
+            "id": str(i), "title": f"video {i}", "shortcode": f"sc{i}", "display_url": "https://example.com/d.jpg",
+            "video_url": "https://example.com/v.mp4", "video_view_count": i * 10,
+            "edge_media_to_tagged_user": {"edges": []},
+            "edge_media_to_caption": {"edges": [{"node": {"text": f"caption {i}"}}]},
+            "edge_media_to_comment": {"count": i}, "comments_disabled": False, "taken_at_timestamp": 1700000000 + i,
+            "edge_liked_by": {"count": i * 3}, "location": None, "video_duration": 12.5,
+            "accessibility_caption": None,
+        }
+    } for i in range(posts)]
+    return {
+        "full_name": username.title(), "username": username, "id": str(zlib.crc32(username.encode()) + 10 ** 9),
+        "category_name": None, "business_category_name": None, "business_phone_number": None,
+        "business_email": None, "biography": "bio", "bio_links": [{"url": "https://example.com"}],
+        "external_url": None, "edge_followed_by": {"count": 1234}, "edge_follow": {"count": 321}, "fbid": "1",
+        "is_private": False, "is_verified": False, "profile_pic_url_hd": "https://example.com/p.jpg",
+        "edge_felix_video_timeline": {"count": posts, "edges": edges},
+        "edge_owner_to_timeline_media": {"count": posts}, "edge_saved_media": {"count": 0},
+        "edge_related_profiles": {"edges": []},
+    }
+
+
+class SyntheticAccount:
+    def __init__(self, username: str = MOCK_USERNAME, followers: int = 1000, following: int = 500, posts: int = 20,
+                 round: int = 0, seed: int = 42, mutual: float = 0.6, churn: float = 0.01,
+                 like_rate: float = 0.05, comment_rate: float = 0.01):
+        """
+        Deterministic fake account of any size, answering like instagrapi.Client
+
+        The same arguments always produce the same ids, posts, likers and comments.
+        Each round replaces `churn` of the followers (the oldest leave, new ones arrive),
+        so consecutive offline runs with an increasing round see unfollowers and new
+        followers. User objects are only built for the page that is requested.
+
+        Args:
+            username: Account username
+            followers: Number of followers
+            following: Number of accounts followed
+            posts: Number of posts
+            round: Churn generation of the follower list
+            seed: Seed of every random choice
+            mutual: Share of the followed accounts that follow back
+            churn: Share of the followers replaced per round
+            like_rate: Share of the followers liking a post
+            comment_rate: Share of the followers commenting on a post
+        """
+        self.username = username
+        self.user_id = str(self._user_ids(np.array([0]), 2)[0])
+        self.posts = posts
+        self.seed = seed
+        self.like_rate = like_rate
+        self.comment_rate = comment_rate
+        self.created = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+
+        step = max(1, int(followers * churn)) if churn else 0
+        # Newest followers first, like the API
+        self.followers = self._user_ids(np.arange(round * step + followers - 1, round * step - 1, -1), 0)
+        # The following list does not churn: mutuals are the newest followers of round 0
+        mutual_count = min(int(following * mutual), followers)
+        self.following = np.concatenate((
+            self._user_ids(np.arange(following - mutual_count), 1),
+            self._user_ids(np.arange(followers - 1, followers - mutual_count - 1, -1), 0),
+        ))
+
+    @staticmethod
+    def _user_ids(index: np.ndarray, stream: int) -> np.ndarray:
+        """Distinct user ids for indexes of one of three id streams (followers, following, self)"""
+        code = index.astype(np.int64) * 3 + stream
+        return 10 ** 9 + (code * ID_MULTIPLIER + 12345) % ID_SPACE
+
+    @staticmethod
+    def _user(pk) -> UserShort:
+        pk = str(pk)
+        return UserShort(pk=pk, username=f"user_{pk}", full_name=f"User {pk[-5:]}", is_private=False)
+
+    def _rng(self, *key: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, *key])
+
+    def _chunk(self, ids: np.ndarray, user_id, max_amount: int, max_id: str) -> Tuple[List[UserShort], str]:
+        if str(user_id) != self.user_id:
+            return [], ""
+        start = int(max_id or 0)
+        end = min(len(ids), start + max_amount) if max_amount else len(ids)
+        return [self._user(pk) for pk in ids[start:end]], (str(end) if end < len(ids) else "")
+
+    def _post_pk(self, index: int) -> str:
+        return str(3 * 10 ** 18 + self.seed * 10 ** 6 + index)
+
+    def _post_index(self, media_pk) -> int:
+        index = int(media_pk) - 3 * 10 ** 18 - self.seed * 10 ** 6
+        if not 0 <= index < self.posts:
+            raise ClientError(f"Media {media_pk} not found")
+        return index
+
+    def _engaged(self, index: int, kind: int, rate: float) -> np.ndarray:
+        """Followers engaging with a post, older posts reach slightly more of them"""
+        rng = self._rng(index, kind)
+        count = min(len(self.followers), rng.binomial(len(self.followers), min(1.0, rate * (1 + index / 50))))
+        return self.followers[rng.choice(len(self.followers), size=count, replace=False)]
+
+    def respond(self, method: str, *args, **kwargs):
+        return getattr(self, method)(*args, **kwargs)
+
+    def login(self, username: str) -> str:
+        return self.user_id
+
+    def user_id_from_username(self, username: str) -> str:
+        if username == self.username:
+            return self.user_id
+        return str(zlib.crc32(username.encode()) + 10 ** 9)
+
+    def user_followers_v1_chunk(self, user_id, max_amount: int = 0, max_id: str = ""):
+        return self._chunk(self.followers, user_id, max_amount, max_id)
+
+    def user_following_v1_chunk(self, user_id, max_amount: int = 0, max_id: str = ""):
+        return self._chunk(self.following, user_id, max_amount, max_id)
+
+    def user_medias(self, user_id, amount: int = 0) -> List[Media]:
+        if str(user_id) != self.user_id:
+            return []
+        owner = UserShort(pk=self.user_id, username=self.username)
+        return [
+            Media(pk=self._post_pk(i), id=f"{self._post_pk(i)}_{self.user_id}", code=f"MOCK{i:06d}",
+                  taken_at=self.created - timedelta(days=i * 2), media_type=1, user=owner,
+                  like_count=len(self._engaged(i, 0, self.like_rate)),
+                  comment_count=len(self._engaged(i, 1, self.comment_rate)),
+                  caption_text=f"Post {i}", usertags=[], sponsor_tags=[])
+            for i in range(min(amount, self.posts) if amount else self.posts)
+        ]
+
+    def media_likers(self, media_pk) -> List[UserShort]:
+        return [self._user(pk) for pk in self._engaged(self._post_index(media_pk), 0, self.like_rate)]
+
+    def media_comments(self, media_pk, amount: int = 20) -> List[Comment]:
+        index = self._post_index(media_pk)
+        taken_at = self.created - timedelta(days=index * 2)
+        return [
+            Comment(pk=f"{media_pk}{n:06d}", text=f"comment {n}", user=self._user(pk),
+                    created_at_utc=taken_at + timedelta(minutes=n), content_type="comment", status="Active")
+            for n, pk in enumerate(self._engaged(index, 1, self.comment_rate))
+        ]
+
+    def user_info_by_username(self, username: str) -> User:
+        own = username == self.username
+        pk = self.user_id if own else self.user_id_from_username(username)
+        return User(pk=pk, username=username, full_name=username.replace('_', ' ').title(), is_private=False,
+                    profile_pic_url="https://example.com/p.jpg", is_verified=False,
+                    media_count=self.posts if own else 0,
+                    follower_count=len(self.followers) if own else int(pk) % 5000,
+                    following_count=len(self.following) if own else int(pk) % 700,
+                    is_business=False, biography="Synthetic account")
+
+
+def _call_key(args: tuple, kwargs: Dict) -> str:
+    return json.dumps([list(args), kwargs], sort_keys=True, default=str)
+
+
+def _encode(value):
+    """JSON-safe form of an instagrapi result, keeping model types and tuples"""
+    if isinstance(value, BaseModel):
+        return {'__model__': type(value).__name__, 'data': value.model_dump(mode='json')}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if '__model__' in value:
+            return getattr(types, value['__model__'])(**value['data'])
+        if '__tuple__' in value:
+            return tuple(_decode(item) for item in value['__tuple__'])
+        return {key: _decode(item) for key, item in value.items()}
+    return value
+
+
+class Recording:
+    def __init__(self, path: Path):
+        """
+        Responses captured by RecordingClient, answered by method name and arguments
+
+        Args:
+            path: NDJSON file written by RecordingClient
+        """
+        self.path = Path(path)
+        self.responses: Dict[Tuple[str, str], Dict] = {}
+        with open(self.path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[(record['method'], record['key'])] = record
+
+    def respond(self, method: str, *args, **kwargs):
+        record = self.responses.get((method, _call_key(args, kwargs)))
+        if record is None and method == 'login':
+            # A recording holds one account, replay it under whatever username is given
+            record = next((r for (m, _), r in self.responses.items() if m == 'login'), None)
+        if record is None:
+            raise ClientError(f"No recorded response for {method}{_call_key(args, kwargs)}")
+        if 'error' in record:
+            error = getattr(exceptions, record['error']['type'], ClientError)
+            raise error(record['error']['message'])
+        return _decode(record['result'])
+
+
+class RecordingClient:
+    def __init__(self, client: Client, path: Path):
+        """
+        Wrap a live instagrapi Client and append every API response to an NDJSON file
+
+        Replay the file with FakeClient(Recording(path)).
+
+        Args:
+            client: instagrapi Client doing the real requests
+            path: Recording file, appended to
+        """
+        self.__dict__['_client'] = client
+        self.__dict__['_path'] = Path(path)
+        self.__dict__['_lock'] = threading.Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, method: str, args: tuple, kwargs: Dict, **outcome):
+        line = json.dumps({'method': method, 'key': _call_key(args, kwargs), **outcome}, default=str)
+        with self._lock, open(self._path, 'a') as f:
+            f.write(line + "\n")
+
+    def login(self, username: str, password: str, **kwargs) -> bool:
+        result = self._client.login(username, password, **kwargs)
+        self._write('login', (username,), {}, result=str(self._client.user_id))
+        return result
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        def record(*args, **kwargs):
+            try:
+                result = attr(*args, **kwargs)
+            except ClientError as e:
+                self._write(name, args, kwargs, error={'type': type(e).__name__, 'message': str(e)})
+                raise
+            self._write(name, args, kwargs, result=_encode(result))
+            return result
+
+        return record
+
+    def __setattr__(self, name: str, value):
+        setattr(self._client, name, value)
+
+
+class FakeClient:
+    def __init__(self, backend, latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Offline stand-in for instagrapi.Client with injectable latency, errors and 429s
+
+        Args:
+            backend: Object answering respond(method, *args, **kwargs), a SyntheticAccount or a Recording
+            latency: Seconds every API call takes
+            error_rate: Share of API calls failing with ClientError
+            throttle_rate: Share of API calls failing with ClientThrottledError (429)
+            seed: Seed of the fault injection (optional, random by default)
+        """
+        self.backend = backend
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.username = None
+        self.password = None
+        self.user_id = None
+        self.handle_exception = None
+        self.last_json = {}
+        self.calls: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _request(self, method: str, *args, **kwargs):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            roll = self._rng.random()
+        if self.latency:
+            time.sleep(self.latency)
+        if roll < self.throttle_rate:
+            raise ClientThrottledError("Too many requests (injected 429)")
+        if roll < self.throttle_rate + self.error_rate:
+            raise ClientError("Injected error")
+        return self.backend.respond(method, *args, **kwargs)
+
+    def login(self, username: str, password: str, relogin: bool = False) -> bool:
+        self.username = username
+        self.password = password
+        self.user_id = self.backend.respond('login', username)
+        return True
+
+    def relogin(self) -> bool:
+        return self.login(self.username, self.password, relogin=True)
+
+    def logout(self) -> bool:
+        return True
+
+    def challenge_resolve(self, last_json: Dict) -> bool:
+        return True
+
+    def get_settings(self) -> Dict:
+        return {'authorization_data': {'ds_user_id': self.user_id, 'sessionid': f"offline:{self.user_id}"}}
+
+    def set_settings(self, settings: Dict) -> bool:
+        self.user_id = str(settings['authorization_data']['ds_user_id'])
+        return True
+
+    def user_id_from_username(self, username: str) -> str:
+        return self._request('user_id_from_username', username)
+
+    def user_followers_v1_chunk(self, user_id, max_amount: int = 0, max_id: str = ""):
+        return self._request('user_followers_v1_chunk', user_id, max_amount=max_amount, max_id=max_id)
+
+    def user_following_v1_chunk(self, user_id, max_amount: int = 0, max_id: str = ""):
+        return self._request('user_following_v1_chunk', user_id, max_amount=max_amount, max_id=max_id)
+
+    def user_medias(self, user_id, amount: int = 0) -> List[Media]:
+        return self._request('user_medias', user_id, amount=amount)
+
+    def media_likers(self, media_pk) -> List[UserShort]:
+        return self._request('media_likers', media_pk)
+
+    def media_comments(self, media_pk, amount: int = 20) -> List[Comment]:
+        return self._request('media_comments', media_pk)
+
+    def user_info_by_username(self, username: str) -> User:
+        return self._request('user_info_by_username', username)
+
+
+def client_factory(mock: Optional[Dict] = None, record: Optional[Path] = None,
+                   replay: Optional[Path] = None) -> Callable[[], Client]:
+    """
+    Build the instagrapi client factory for InstaClient
+
+    Args:
+        mock: Parsed --mock-options, serve a SyntheticAccount (only its faults apply to replay)
+        record: Append live responses to this file
+        replay: Serve the responses recorded in this file instead of Instagram
+
+    Returns:
+        Callable: Returns a new Client, FakeClient or RecordingClient
+    """
+    faults = {key: value for key, value in (mock or {}).items() if key in FAULT_KEYS}
+    options = dict(latency=faults.get('latency', 0.0), error_rate=faults.get('errors', 0.0),
+                   throttle_rate=faults.get('throttle', 0.0))
+    if replay:
+        recording = Recording(replay)
+        return lambda: FakeClient(recording, **options)
+    if mock is not None:
+        account = SyntheticAccount(**{key: value for key, value in mock.items() if key not in FAULT_KEYS})
+        return lambda: FakeClient(account, **options)
+    if record:
+        return lambda: RecordingClient(Client(), record)
+    return Client
+
+
+def start_profile_server(latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                         profile_dir: Optional[Path] = None, posts: int = 12,
+                         host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Serve web_profile_info locally on a background thread
+
+    Profiles captured in a ProfileCache directory are replayed as recorded, every other
+    username gets a synthetic profile. Responses carry an ETag and a matching
+    If-None-Match is answered with 304.
+
+    Args:
+        latency: Seconds every response takes
+        error_rate: Share of requests answered with 503
+        throttle_rate: Share of requests answered with 429 (Retry-After: 0)
+        profile_dir: ProfileCache directory with recorded profiles (optional)
+        posts: Timeline posts of a synthetic profile
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        ThreadingHTTPServer: Running server, the endpoint root is http://host:server.server_address[1]
+    """
+    recorded = ProfileCache(profile_dir) if profile_dir else None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            roll = random.random()
+            if roll < throttle_rate + error_rate:
+                self.send_response(429 if roll < throttle_rate else 503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            username = parse_qs(urlsplit(self.path).query).get("username", [""])[0]
+            entry = recorded.load(username) if recorded else None
+            user = entry['user'] if entry else make_profile(username, posts)
+            body = json.dumps({"data": {"user": user}}).encode()
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Profile stand-in listening on http://{host}:{server.server_address[1]}")
+    return server
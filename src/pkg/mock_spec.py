@@ -0,0 +1,32 @@
+from typing import Dict
+
+MOCK_USERNAME = "mock_user"
+
+# --mock-options SPEC keys: account shape and injected faults
+MOCK_SPEC = {
+    'username': str, 'followers': int, 'following': int, 'posts': int, 'round': int, 'seed': int,
+    'latency': float, 'errors': float, 'throttle': float,
+}
+FAULT_KEYS = ('latency', 'errors', 'throttle')
+
+
+def parse_mock_spec(spec: str) -> Dict:
+    """
+    Parse a --mock-options value like 'followers=100000,posts=30,latency=0.05'
+
+    Kept apart from pkg.mock_backend, which pulls in instagrapi and numpy, so the CLI
+    can validate the option without loading them.
+
+    Returns:
+        Dict: Typed values of the given keys
+
+    Raises:
+        ValueError: Unknown key or a value of the wrong type
+    """
+    options = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(','))):
+        key, _, value = item.partition('=')
+        if key not in MOCK_SPEC:
+            raise ValueError(f"unknown mock option '{key}' (expected {', '.join(MOCK_SPEC)})")
+        options[key] = MOCK_SPEC[key](value)
+    return options
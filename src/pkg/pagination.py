@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pkg.profiler import traced
+
+
+class CheckpointedPager:
+    def __init__(self, fetch_page: Callable[[Optional[str]], Tuple[List, Optional[str]]],
+                 checkpoint_path: Path,
+                 serialize: Callable[[object], Dict],
+                 deserialize: Callable[[Dict], object],
+                 max_age: int = 24 * 3600):
+        """
+        Cursor based page fetcher that checkpoints every page to disk
+
+        Each fetched page is appended to an NDJSON checkpoint together with the cursor of
+        the next page. If a run dies half way, the next run replays the stored pages and
+        continues from the last cursor instead of starting over.
+
+        Args:
+            fetch_page: Callable taking a cursor (None for the first page) and returning (items, next_cursor)
+            checkpoint_path: File the pages and cursors are appended to
+            serialize: Converts an item into a JSON-serializable dict
+            deserialize: Rebuilds an item from its serialized dict
+            max_age: Seconds after which an unfinished checkpoint is discarded instead of resumed
+        """
+        self.fetch_page = fetch_page
+        self.checkpoint_path = Path(checkpoint_path)
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.max_age = max_age
+        self.resumed_pages = 0
+        self.fetched_pages = 0
+        self.logger = logging.getLogger(__name__)
+
+    def _load_checkpoint(self) -> Tuple[List[List[Dict]], Optional[str]]:
+        """Read stored pages and the cursor to continue from"""
+        if not self.checkpoint_path.exists():
+            return [], None
+
+        if time.time() - self.checkpoint_path.stat().st_mtime > self.max_age:
+            self.logger.info(f"Discarding stale checkpoint {self.checkpoint_path.name}")
+            self.clear()
+            return [], None
+
+        pages = []
+        cursor = None
+        intact = 0
+        with open(self.checkpoint_path, 'rb') as f:
+            for line in f:
+                try:
+                    # A line without its newline was cut off too, even if it happens to parse
+                    entry = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    entry = None
+                if entry is None:
+                    # A torn last line from a crash mid-write; everything before it is intact
+                    break
+                pages.append(entry['items'])
+                cursor = entry['cursor']
+                intact += len(line)
+
+        if intact < self.checkpoint_path.stat().st_size:
+            # Cut the torn tail off, pages appended after it could never be read back
+            self.logger.info(f"Dropping torn end of checkpoint {self.checkpoint_path.name}")
+            os.truncate(self.checkpoint_path, intact)
+
+        return pages, cursor
+
+    @traced('io')
+    def _append_checkpoint(self, items: List, cursor: Optional[str]):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.checkpoint_path, 'a') as f:
+            f.write(json.dumps({'cursor': cursor, 'items': [self.serialize(item) for item in items]}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """Remove the checkpoint file"""
+        try:
+            self.checkpoint_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def pages(self, resume: bool = True) -> Iterator[List]:
+        """
+        Yield pages of items, resuming from the checkpoint if one exists
+
+        The checkpoint is removed once the last page has been yielded.
+
+        Args:
+            resume: Replay an existing checkpoint instead of starting from scratch
+
+        Yields:
+            List: Items of one page
+        """
+        stored_pages, cursor = self._load_checkpoint() if resume else ([], None)
+        if not resume:
+            self.clear()
+
+        if stored_pages:
+            self.logger.info(f"Resuming from checkpoint with {len(stored_pages)} stored pages")
+            for page in stored_pages:
+                self.resumed_pages += 1
+                yield [self.deserialize(item) for item in page]
+            if not cursor:
+                # The previous run fetched everything but stopped before cleanup
+                self.clear()
+                return
+
+        while True:
+            items, cursor = self.fetch_page(cursor)
+            self._append_checkpoint(items, cursor or None)
+            self.fetched_pages += 1
+            yield items
+
+            if not cursor:
+                break
+
+        self.clear()
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+PROFILE_CACHE_VERSION = 1
+
+
+class ProfileCache:
+    def __init__(self, cache_dir: Path = Path("instagram_data") / "profile_cache", max_age: float = 3600):
+        """
+        On-disk cache of raw web_profile_info payloads, one file per username
+
+        A cached profile younger than max_age is served without a request. An older one
+        is revalidated with If-None-Match / If-Modified-Since when the response carried
+        an ETag or Last-Modified, so an unchanged profile costs a 304 instead of a body.
+
+        Args:
+            cache_dir: Directory holding the cached profiles
+            max_age: Seconds a cached profile is used without revalidation (0 always revalidates)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+
+    def _path(self, username: str) -> Path:
+        # Instagram usernames are [a-z0-9._], anything else must not escape the directory
+        return self.cache_dir / f"{re.sub(r'[^a-z0-9._]', '_', username.lower())}.json"
+
+    def load(self, username: str) -> Optional[Dict]:
+        """
+        Load the cached entry for a username
+
+        Returns:
+            Dict: {'user', 'etag', 'last_modified', 'fetched_at'} or None if missing or unreadable
+        """
+        try:
+            with open(self._path(username), 'r') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            self.logger.warning(f"Ignoring unreadable cached profile for {username}: {str(e)}")
+            return None
+        return entry if entry.get('version') == PROFILE_CACHE_VERSION else None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get('fetched_at', 0) < self.max_age
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Validators to send with a request for a cached profile"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, username: str, user: Dict, headers: Mapping[str, str]):
+        """Cache a freshly downloaded profile with the validators of its response"""
+        self.misses += 1
+        self._write(username, user, headers.get('ETag'), headers.get('Last-Modified'))
+
+    def refresh(self, username: str, entry: Dict, headers: Mapping[str, str]):
+        """Mark a cached profile as current after a 304 Not Modified"""
+        self.revalidated += 1
+        self._write(username, entry['user'], headers.get('ETag') or entry.get('etag'),
+                    headers.get('Last-Modified') or entry.get('last_modified'))
+
+    def _write(self, username: str, user: Dict, etag: Optional[str], last_modified: Optional[str]):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(username)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'version': PROFILE_CACHE_VERSION,
+                    'user': user,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'fetched_at': time.time()
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Failed to cache profile of {username}: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Fresh hits, 304 revalidations and full downloads since the cache was created"""
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses}
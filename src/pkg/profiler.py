@@ -0,0 +1,157 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_active: Optional["Profiler"] = None
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Collects timing spans and counters of one run
+
+        Spans nest per thread; each records its total duration and its self time, i.e.
+        the time not spent in child spans. Counters accumulate values such as seconds
+        slept for the rate limiter, retries and bytes received.
+        """
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.spans: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Dict]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, category: str = 'app'):
+        stack = self._stack()
+        record = {'name': name, 'category': category, 'start': time.perf_counter(), 'children': 0.0,
+                  'thread': threading.get_ident()}
+        stack.append(record)
+        try:
+            yield record
+        finally:
+            stack.pop()
+            record['duration'] = time.perf_counter() - record['start']
+            record['self'] = record['duration'] - record.pop('children')
+            if stack:
+                stack[-1]['children'] += record['duration']
+            with self._lock:
+                self.spans.append(record)
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stop(self):
+        self.finished = self.finished or time.perf_counter()
+
+    @property
+    def wall_seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def breakdown(self) -> List[Dict]:
+        """
+        Spans aggregated by name, slowest self time first
+
+        Returns:
+            List: [{'name', 'category', 'calls', 'total', 'self', 'mean', 'max'}]
+        """
+        rows: Dict[str, Dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            row = rows.setdefault(span['name'], {'name': span['name'], 'category': span['category'],
+                                                 'calls': 0, 'total': 0.0, 'self': 0.0, 'max': 0.0})
+            row['calls'] += 1
+            row['total'] += span['duration']
+            row['self'] += span['self']
+            row['max'] = max(row['max'], span['duration'])
+        for row in rows.values():
+            row['mean'] = row['total'] / row['calls']
+        return sorted(rows.values(), key=lambda row: row['self'], reverse=True)
+
+    def write_trace(self, path: Path):
+        """
+        Write the spans in Chrome trace event format
+
+        Open the file in Perfetto (ui.perfetto.dev), chrome://tracing or speedscope
+        for a timeline / flame graph per thread.
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                'name': span['name'], 'cat': span['category'], 'ph': 'X', 'pid': pid, 'tid': span['thread'],
+                'ts': (span['start'] - self.started) * 1e6, 'dur': span['duration'] * 1e6,
+            } for span in self.spans]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'otherData': {'counters': self.counters}}, f)
+
+
+def enable(profiler: Profiler) -> Profiler:
+    """Make profiler the one span() and count() report to"""
+    global _active
+    _active = profiler
+    return profiler
+
+
+def disable() -> Optional[Profiler]:
+    global _active
+    profiler, _active = _active, None
+    if profiler:
+        profiler.stop()
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+@contextmanager
+def span(name: str, category: str = 'app'):
+    """Time a block in the active profiler, a no-op when profiling is off"""
+    profiler = _active
+    if profiler is None:
+        yield None
+        return
+    with profiler.span(name, category) as record:
+        yield record
+
+
+def count(name: str, value: float = 1):
+    """Add to a counter of the active profiler, a no-op when profiling is off"""
+    profiler = _active
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+def traced(category: str = 'app'):
+    """
+    Record a span for every call of the decorated function or method
+
+    The span is named after the function's qualified name, e.g. InstaClient.get_followers.
+    """
+    def decorator(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.span(name, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
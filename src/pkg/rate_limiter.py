@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# endpoint class -> (requests per second, burst capacity)
+DEFAULT_LIMITS = {
+    'followers': (0.5, 5),
+    'following': (0.5, 5),
+    'media': (0.5, 5),
+    'likers': (0.5, 10),
+    'comments': (0.5, 10),
+    'user_info': (0.5, 5),
+    'default': (0.5, 5),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Token bucket that refills at a steady rate up to a burst capacity
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens, i.e. the allowed burst
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.penalties = 0
+
+    def reserve(self, now: float) -> float:
+        """
+        Take one token and return how long the caller has to wait for it
+
+        The bucket may go negative, which queues concurrent callers behind each other.
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.blocked_until - now)
+
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 base_backoff: float = 30, max_backoff: float = 600):
+        """
+        Shared request scheduler with one token bucket per endpoint class
+
+        Bursts pass through while a bucket has tokens. A throttling response halves the
+        bucket's rate and blocks it for an exponentially growing cool-down; successful
+        requests then slowly restore the configured rate.
+
+        Args:
+            limits: Mapping of endpoint class to (requests per second, burst capacity)
+            base_backoff: Seconds an endpoint is blocked after its first throttling response
+            max_backoff: Upper bound for the cool-down
+        """
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.buckets = {name: TokenBucket(rate, capacity) for name, (rate, capacity) in self.limits.items()}
+        self.throttled = {name: 0.0 for name in self.buckets}
+        self.requests = {name: 0 for name in self.buckets}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        return self.buckets.get(endpoint, self.buckets['default'])
+
+    def _key(self, endpoint: str) -> str:
+        return endpoint if endpoint in self.buckets else 'default'
+
+    def acquire(self, endpoint: str = 'default') -> float:
+        """
+        Block until a request to the endpoint class is allowed
+
+        Args:
+            endpoint: Endpoint class (followers, following, media, likers, comments, user_info)
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        key = self._key(endpoint)
+        with self._lock:
+            wait = self.buckets[key].reserve(time.monotonic())
+            self.requests[key] += 1
+            self.throttled[key] += wait
+
+        # Sleep outside the lock so other endpoint classes are not held up
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, endpoint: str = 'default'):
+        """Back off after a 429 / feedback_required / please wait response"""
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.penalties += 1
+            bucket.rate = max(bucket.base_rate / 16, bucket.rate / 2)
+            bucket.tokens = 0
+            bucket.updated_at = time.monotonic()
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (bucket.penalties - 1))
+            bucket.blocked_until = bucket.updated_at + backoff
+
+        self.logger.warning(f"Throttled on {self._key(endpoint)}, backing off {backoff:.0f}s "
+                            f"(rate now {bucket.rate:.2f} req/s)")
+
+    def reward(self, endpoint: str = 'default'):
+        """Recover rate additively after a successful request"""
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            if bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate / 20)
+            elif bucket.penalties:
+                bucket.penalties -= 1
+
+    @property
+    def throttled_seconds(self) -> float:
+        """Total time spent waiting for any bucket"""
+        return sum(self.throttled.values())
+
+    def stats(self) -> Dict:
+        """
+        Per endpoint class request counts and time spent throttled
+
+        Returns:
+            Dict: {endpoint: {'requests', 'throttled_seconds', 'rate', 'penalties'}}
+        """
+        with self._lock:
+            return {
+                name: {
+                    'requests': self.requests[name],
+                    'throttled_seconds': round(self.throttled[name], 3),
+                    'rate': bucket.rate,
+                    'penalties': bucket.penalties
+                }
+                for name, bucket in self.buckets.items()
+                if self.requests[name]
+            }
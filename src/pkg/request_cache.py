@@ -0,0 +1,112 @@
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class RequestCache:
+    def __init__(self, ttl: float = 300):
+        """
+        In-memory memoization of API results for the lifetime of a session
+
+        Args:
+            ttl: Seconds a cached result stays valid (0 disables caching)
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a cached result
+
+        Returns:
+            Tuple: (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return True, entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+    def invalidate(self, method: Optional[str] = None):
+        """
+        Drop cached results
+
+        Args:
+            method: Only drop results of this method name (optional, defaults to everything)
+        """
+        with self._lock:
+            if method is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == method]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters; every hit is an API round-trip that was saved"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+def memo_key(owner, method_name: str, arguments: Tuple) -> Tuple:
+    """
+    Cache key of a memoized call: the method name (for invalidate), the account it ran as
+    and its (name, value) arguments. A client reused across accounts, like the daemon's,
+    must not answer one account with another's results.
+    """
+    return (method_name, ('account', getattr(owner, 'user_id', None))) + tuple(arguments)
+
+
+def detached(value):
+    """Shallow copy of a cached dict, list or set, so a caller changing its result cannot change the cache"""
+    if isinstance(value, (dict, list, set)):
+        return value.copy()
+    return value
+
+
+def memoized(method):
+    """
+    Memoize an InstaClient method in its request_cache, keyed by method name and arguments
+
+    Arguments are bound against the signature with defaults applied, so get_followers()
+    and get_followers(None) share one entry; the logged in account is part of the key.
+    Empty results are not cached because the client methods return {} / [] / None on
+    failure. Every call gets its own shallow copy of a cached dict or list.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.request_cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = memo_key(self, method.__name__,
+                       tuple((name, value) for name, value in bound.arguments.items() if name != 'self'))
+
+        found, value = cache.get(key)
+        if found:
+            return detached(value)
+
+        value = method(self, *args, **kwargs)
+        if value:
+            cache.set(key, value)
+        return detached(value)
+
+    return wrapper
@@ -0,0 +1,130 @@
+import base64
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from Cryptodome.Cipher import AES
+from Cryptodome.Protocol.KDF import scrypt
+from Cryptodome.Random import get_random_bytes
+
+SESSION_FILE_VERSION = 1
+
+
+class SessionStore:
+    def __init__(self, session_dir: Path = Path("instagram_data") / "sessions",
+                 max_age: int = 7 * 24 * 3600):
+        """
+        Encrypted on-disk store for instagrapi session settings, one file per account
+
+        Args:
+            session_dir: Directory holding the encrypted session files
+            max_age: Seconds after which a stored session is no longer reused
+        """
+        self.session_dir = Path(session_dir)
+        self.max_age = max_age
+        self.logger = logging.getLogger(__name__)
+
+    def _path(self, username: str) -> Path:
+        return self.session_dir / f"{username.lower()}.session"
+
+    @staticmethod
+    def _derive_key(password: str, salt: bytes) -> bytes:
+        """Derive the file key from the account password so only its owner can read it"""
+        return scrypt(password.encode("utf-8"), salt, key_len=32, N=2 ** 14, r=8, p=1)
+
+    def load(self, username: str, password: str) -> Optional[Dict]:
+        """
+        Load and decrypt the stored session for an account
+
+        Args:
+            username: Instagram username the session belongs to
+            password: Instagram password used to derive the file key
+
+        Returns:
+            Dict: {'settings', 'user_id', 'saved_at'} or None if missing, stale or unreadable
+        """
+        path = self._path(username)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                envelope = json.load(f)
+
+            if envelope.get('version') != SESSION_FILE_VERSION:
+                return None
+
+            salt, nonce, tag, data = (
+                base64.b64decode(envelope[field]) for field in ('salt', 'nonce', 'tag', 'data')
+            )
+            cipher = AES.new(self._derive_key(password, salt), AES.MODE_GCM, nonce=nonce)
+            session = json.loads(cipher.decrypt_and_verify(data, tag))
+
+        except (ValueError, KeyError, OSError) as e:
+            # Wrong password, tampered file or an old format - all mean "log in again"
+            self.logger.warning(f"Ignoring unreadable session for {username}: {str(e)}")
+            return None
+
+        if time.time() - session.get('saved_at', 0) > self.max_age:
+            self.logger.info(f"Stored session for {username} expired")
+            return None
+
+        return session
+
+    def save(self, username: str, password: str, settings: Dict, user_id: str) -> bool:
+        """
+        Encrypt and persist session settings together with the resolved user id
+
+        Args:
+            username: Instagram username the session belongs to
+            password: Instagram password used to derive the file key
+            settings: instagrapi settings as returned by Client.get_settings()
+            user_id: Resolved user id of the account
+
+        Returns:
+            bool: True if the session was written
+        """
+        try:
+            self.session_dir.mkdir(parents=True, exist_ok=True)
+
+            payload = json.dumps({
+                'settings': settings,
+                'user_id': str(user_id),
+                'saved_at': time.time()
+            }).encode("utf-8")
+
+            salt = get_random_bytes(16)
+            cipher = AES.new(self._derive_key(password, salt), AES.MODE_GCM)
+            data, tag = cipher.encrypt_and_digest(payload)
+
+            envelope = {
+                'version': SESSION_FILE_VERSION,
+                'salt': base64.b64encode(salt).decode(),
+                'nonce': base64.b64encode(cipher.nonce).decode(),
+                'tag': base64.b64encode(tag).decode(),
+                'data': base64.b64encode(data).decode()
+            }
+
+            # Write next to the target and swap in, so a crash never leaves half a file
+            path = self._path(username)
+            tmp_path = path.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(envelope, f)
+            os.replace(tmp_path, path)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to save session for {username}: {str(e)}")
+            return False
+
+    def delete(self, username: str) -> bool:
+        """Remove the stored session for an account"""
+        try:
+            self._path(username).unlink()
+            return True
+        except FileNotFoundError:
+            return False
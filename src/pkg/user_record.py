@@ -0,0 +1,58 @@
+import sys
+from typing import Dict, Optional
+
+
+class UserRecord:
+    __slots__ = ('pk', 'username', 'full_name', 'is_private', 'is_verified', 'follower_count')
+
+    def __init__(self, pk: str, username: str, full_name: Optional[str] = "", is_private: bool = False,
+                 is_verified: bool = False, follower_count: int = 0):
+        """
+        Compact follower/following entry, replacing instagrapi's UserShort model
+
+        Holds only the fields the commands read. Without a per-instance __dict__ and
+        pydantic's field bookkeeping, an entry takes a fraction of the memory of the
+        model it was built from. Ids and usernames are interned, so an account in both
+        the followers and the following list shares its strings.
+
+        Args:
+            pk: User ID
+            username: Username
+            full_name: Display name
+            is_private: Private account
+            is_verified: Verified badge, not part of follower pages (always False there)
+            follower_count: Not part of follower pages (always 0 there)
+        """
+        self.pk = sys.intern(str(pk))
+        self.username = sys.intern(username or "")
+        self.full_name = full_name or ""
+        self.is_private = bool(is_private)
+        self.is_verified = bool(is_verified)
+        self.follower_count = follower_count or 0
+
+    @classmethod
+    def from_user(cls, user) -> "UserRecord":
+        """Build from an instagrapi UserShort (or any object with the same attributes)"""
+        fields = getattr(user, '__dict__', None)
+        if fields is None:
+            return cls(*(getattr(user, name, None) for name in cls.__slots__))
+        # A missing attribute on a pydantic model goes through a slow __getattr__, a dict lookup does not
+        return cls.from_dict(fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UserRecord":
+        """Build from to_dict() output or a serialized UserShort, unknown keys are ignored"""
+        return cls(data['pk'], data.get('username'), data.get('full_name'), data.get('is_private'),
+                   data.get('is_verified'), data.get('follower_count'))
+
+    def to_dict(self) -> Dict:
+        return {'pk': self.pk, 'username': self.username, 'full_name': self.full_name, 'is_private': self.is_private,
+                'is_verified': self.is_verified, 'follower_count': self.follower_count}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UserRecord) and self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"UserRecord(pk={self.pk!r}, username={self.username!r})"
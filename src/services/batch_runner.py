@@ -0,0 +1,284 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import os
+from pathlib import Path
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+TASKS = ('track', 'not-following-back', 'analytics')
+
+# Every key a run_account() result can have; previous_snapshot and pid are not always set
+RESULT_FIELDS = ('username', 'status', 'error', 'counts', 'timings', 'unfollowers', 'new_followers',
+                 'previous_snapshot', 'pid')
+
+
+def parse_accounts_file(path: Path) -> List[Tuple[str, Optional[str]]]:
+    """
+    Read an accounts file: one `username` or `username:password` per line
+
+    Blank lines and lines starting with # are skipped, a leading @ is dropped.
+
+    Returns:
+        List: [(username, password or None)] in file order, without duplicates
+    """
+    accounts = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            username, _, password = line.partition(':')
+            accounts.setdefault(username.strip().lstrip('@'), password.strip() or None)
+    return list(accounts.items())
+
+
+def password_env_var(username: str) -> str:
+    """INSTACLIENT_PASSWORD_<USERNAME>, the variable holding username's password (dots and dashes as underscores)"""
+    return "INSTACLIENT_PASSWORD_" + username.upper().replace('.', '_').replace('-', '_')
+
+
+def password_from_env(username: str) -> Optional[str]:
+    """Password of username from its password_env_var()"""
+    return os.environ.get(password_env_var(username))
+
+
+def run_account(job: Dict) -> Dict:
+    """
+    Log in as one account and run the batch tasks for it, in a worker process
+
+    Everything the account touches lives in its own directory: session, fetch
+    checkpoints, snapshot database and a batch.log with the client's log output.
+    Errors are returned in the result instead of raised, so one account cannot
+    stop the others.
+
+    Args:
+        job: {'username', 'password', 'data_dir', 'tasks', 'cache_ttl', 'fresh_login',
+              'session_cache', 'mock' (parsed --mock-options or None)}
+
+    Returns:
+        Dict: {'username', 'status' ('ok' | 'error'), 'error', 'counts': {...},
+               'timings': {phase: seconds}, 'unfollowers': [...], 'new_followers': [...], 'pid',
+               'previous_snapshot' (only once there is one)}, see RESULT_FIELDS
+    """
+    started = time.perf_counter()
+    username = job['username']
+    data_dir = Path(job['data_dir'])
+    data_dir.mkdir(parents=True, exist_ok=True)
+    result = {'username': username, 'status': 'ok', 'error': None, 'counts': {}, 'timings': {},
+              'unfollowers': [], 'new_followers': [], 'pid': os.getpid()}
+
+    # Worker output goes to the account's log file instead of interleaving on the terminal
+    handler = logging.FileHandler(data_dir / "batch.log")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(logging.INFO)
+
+    from pkg.instagrapi import InstaClient
+    from pkg.mock_backend import client_factory
+    from pkg.rate_limiter import DEFAULT_LIMITS, RateLimiter
+    from pkg.session_store import SessionStore
+    from services import unfollower_detector
+    from services.unfollower_detector import UnfollowersDetector
+    unfollower_detector.console.quiet = True
+
+    def phase(name: str, since: float) -> float:
+        now = time.perf_counter()
+        result['timings'][name] = result['timings'].get(name, 0.0) + now - since
+        return now
+
+    client = None
+    mark = started
+    try:
+        mock = job.get('mock')
+        if mock is not None:
+            # Every synthetic account gets its own followers unless a seed was given
+            mock = {'seed': zlib.crc32(username.encode()) % 10 ** 6, **mock, 'username': username}
+        offline = mock is not None
+        client = InstaClient(
+            rate_limiter=RateLimiter({name: (1000.0, 1000) for name in DEFAULT_LIMITS}) if offline else None,
+            session_store=SessionStore(data_dir / "sessions") if job.get('session_cache', True) and not offline else None,
+            checkpoint_dir=data_dir / "checkpoints",
+            cache_ttl=job.get('cache_ttl', 300),
+            client_factory=client_factory(mock),
+        )
+        password = job.get('password') or ("offline" if offline else None)
+        if not password:
+            raise RuntimeError("no password (add username:password to the accounts file or set "
+                               f"{password_env_var(username)})")
+        if not client.login(username, password, use_session=not job.get('fresh_login')):
+            raise RuntimeError("login failed")
+        mark = phase('login', mark)
+
+        tasks = job.get('tasks', ('track',))
+        if 'analytics' in tasks:
+            analytics = client.get_follower_analytics()
+            result['counts'].update(posts=analytics.get('posts_count', 0),
+                                    mutual_follows=analytics.get('mutual_follows', 0))
+            mark = phase('fetch', mark)
+
+        if 'track' in tasks or 'not-following-back' in tasks:
+            relationships = client.get_relationships()
+            errors = {kind: error for kind, error in relationships['errors'].items() if error}
+            if errors:
+                # Comparing against a partial list would report everyone missing as unfollowed
+                raise RuntimeError("; ".join(f"failed to fetch {kind}: {error}" for kind, error in errors.items()))
+            followers, following = relationships['followers'], relationships['following']
+            result['counts'].update(followers=len(followers), following=len(following))
+            mark = phase('fetch', mark)
+
+            detector = UnfollowersDetector(client, data_dir)
+            try:
+                if 'not-following-back' in tasks:
+                    result['counts']['not_following_back'] = len(detector.find_not_following_back(followers, following))
+                if 'track' in tasks:
+                    previous = detector.load_latest_snapshot()
+                    if previous:
+                        unfollowers = detector.find_unfollowers(followers, previous)
+                        new_followers = detector.find_new_followers(followers, previous)
+                        result['counts'].update(unfollowers=len(unfollowers), new_followers=len(new_followers))
+                        result['unfollowers'] = [row['username'] for row in unfollowers]
+                        result['new_followers'] = [row['username'] for row in new_followers]
+                        result['previous_snapshot'] = previous['datetime'][:19]
+                    mark = phase('analyze', mark)
+                    detector.save_followers_snapshot(followers, following)
+                    mark = phase('snapshot', mark)
+                else:
+                    mark = phase('analyze', mark)
+            finally:
+                detector.store.close()
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e) or type(e).__name__
+        logging.getLogger(__name__).exception(f"Batch run of {username} failed")
+    finally:
+        if client is not None and client.is_logged_in:
+            mark = time.perf_counter()
+            client.logout()
+            phase('logout', mark)
+        result['timings']['total'] = time.perf_counter() - started
+        handler.close()
+
+    return result
+
+
+class BatchRunner:
+    def __init__(self, data_dir: Path, workers: int = 4, tasks: Tuple[str, ...] = ('track',), cache_ttl: float = 300,
+                 fresh_login: bool = False, session_cache: bool = True, mock: Optional[Dict] = None):
+        """
+        Run tracking/reporting for many accounts in a pool of worker processes
+
+        Processes rather than threads: every account gets its own instagrapi client,
+        rate-limit budget and SQLite database, and a crash in one cannot take the
+        others down. A worker that dies breaks its pool; the accounts that did not
+        finish are retried and only the one that crashed is reported as failed.
+
+        Args:
+            data_dir: Root directory, account data goes to data_dir/accounts/<username>
+            workers: Accounts processed at the same time
+            tasks: Subset of TASKS to run for every account
+            cache_ttl: Seconds API results are reused within an account's run
+            fresh_login: Ignore stored sessions
+            session_cache: Store and reuse sessions per account
+            mock: Parsed --mock-options to run every account against a synthetic one
+        """
+        unknown = set(tasks) - set(TASKS)
+        if unknown:
+            raise ValueError(f"Unknown batch tasks: {', '.join(sorted(unknown))} (expected {', '.join(TASKS)})")
+        self.data_dir = Path(data_dir)
+        self.workers = workers
+        self.tasks = tuple(tasks)
+        self.options = {'cache_ttl': cache_ttl, 'fresh_login': fresh_login, 'session_cache': session_cache,
+                        'mock': mock}
+        self.logger = logging.getLogger(__name__)
+
+    def account_dir(self, username: str) -> Path:
+        return self.data_dir / "accounts" / username
+
+    def run(self, accounts: List[Tuple[str, Optional[str]]],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Process every account, at most self.workers at a time
+
+        Args:
+            accounts: [(username, password or None)], None falls back to password_from_env()
+            on_result: Called with each result as soon as its account finishes
+
+        Returns:
+            List: run_account() results in the order of accounts
+        """
+        jobs = {
+            username: {
+                'username': username,
+                'password': password or password_from_env(username),
+                'data_dir': str(self.account_dir(username)),
+                'tasks': self.tasks,
+                **self.options,
+            }
+            for username, password in accounts
+        }
+        results = {}
+
+        def finish(result: Dict):
+            results[result['username']] = result
+            if on_result:
+                on_result(result)
+
+        pending = list(jobs)
+        while pending:
+            unfinished = self._run_pool(jobs, pending, finish)
+            if not unfinished:
+                break
+            # A worker died and took the pool down with it. Tasks start in submission order,
+            # so the accounts that were running are among the first unfinished ones: retry
+            # each of those in a process of its own, the others in a new pool.
+            suspects, pending = unfinished[:self.workers + 1], unfinished[self.workers + 1:]
+            self.logger.warning(f"A batch worker crashed, retrying {', '.join(suspects)} in separate processes")
+            self._run_isolated(jobs, suspects, finish)
+
+        return [results[username] for username, _ in accounts]
+
+    def _run_pool(self, jobs: Dict[str, Dict], usernames: List[str], finish: Callable[[Dict], None]) -> List[str]:
+        """
+        Run the jobs of usernames on one pool of self.workers processes
+
+        Returns:
+            List: Usernames left unfinished because the pool broke, in submission order
+        """
+        broken = set()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(run_account, jobs[username]): username for username in usernames}
+            for future in as_completed(futures):
+                username = futures[future]
+                try:
+                    finish(future.result())
+                except BrokenProcessPool:
+                    broken.add(username)
+                except Exception as e:
+                    finish(self._crashed(username, e))
+        return [username for username in usernames if username in broken]
+
+    def _run_isolated(self, jobs: Dict[str, Dict], usernames: List[str], finish: Callable[[Dict], None]):
+        """Run every job in a single-process pool of its own, so a crash only fails its own account"""
+        executors = [ProcessPoolExecutor(max_workers=1) for _ in usernames]
+        try:
+            futures = {executor.submit(run_account, jobs[username]): username
+                       for executor, username in zip(executors, usernames)}
+            for future in as_completed(futures):
+                username = futures[future]
+                try:
+                    finish(future.result())
+                except Exception as e:
+                    finish(self._crashed(username, e))
+        finally:
+            for executor in executors:
+                executor.shutdown()
+
+    @staticmethod
+    def _crashed(username: str, error: Exception) -> Dict:
+        # The worker process itself died (e.g. killed or out of memory)
+        return {'username': username, 'status': 'error', 'error': f"worker crashed: {error}",
+                'counts': {}, 'timings': {}, 'unfollowers': [], 'new_followers': []}
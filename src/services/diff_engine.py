@@ -0,0 +1,79 @@
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Union
+import numpy as np
+
+
+def to_id_array(user_ids: Iterable, count: int = -1) -> np.ndarray:
+    """
+    Convert user ids (numeric strings or ints) into a sorted, unique int64 array
+
+    Args:
+        user_ids: Iterable of user ids, e.g. the keys of a followers dict
+        count: Number of ids if known, lets numpy allocate once
+
+    Returns:
+        np.ndarray: Sorted unique int64 ids
+    """
+    ids = np.sort(np.fromiter(map(int, user_ids), dtype=np.int64, count=count))
+    if len(ids) > 1:
+        # np.sort + neighbour mask is much cheaper than np.unique for already unique dict keys
+        ids = ids[np.concatenate(([True], ids[1:] != ids[:-1]))]
+    return ids
+
+
+def difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Ids in a but not in b, both sorted unique id arrays"""
+    return np.setdiff1d(a, b, assume_unique=True)
+
+
+def intersection(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Ids in both a and b, both sorted unique id arrays"""
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+class UserRows(Sequence):
+    def __init__(self, ids: np.ndarray, build_row: Callable[[str], Dict]):
+        """
+        Lazily materialized result rows of a diff
+
+        Only the id array is held; the dict for a row is built when it is accessed,
+        so showing the first 50 of a million results only builds 50 dicts.
+
+        Args:
+            ids: Result user ids in display order
+            build_row: Builds the row dict for one user id (as string)
+        """
+        self.ids = ids
+        self.build_row = build_row
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return UserRows(self.ids[index], self.build_row)
+        return self.build_row(str(self.ids[index]))
+
+    def __iter__(self) -> Iterator[Dict]:
+        for uid in self.ids:
+            yield self.build_row(str(uid))
+
+    def __bool__(self) -> bool:
+        return len(self.ids) > 0
+
+    def sort_by(self, value: Callable[[str], float], reverse: bool = False):
+        """
+        Reorder rows by a numeric value per user id without building row dicts
+
+        Args:
+            value: Returns the sort value for a user id (as string)
+            reverse: Sort descending
+        """
+        values = np.fromiter((value(str(uid)) for uid in self.ids), dtype=np.float64, count=len(self.ids))
+        order = np.argsort(-values if reverse else values, kind='stable')
+        self.ids = self.ids[order]
+
+    def sort(self, key: Optional[Callable[[Dict], float]] = None, reverse: bool = False):
+        """list.sort compatible ordering; materializes every row, prefer sort_by"""
+        rows = list(self)
+        order = sorted(range(len(rows)), key=lambda i: key(rows[i]) if key else rows[i], reverse=reverse)
+        self.ids = self.ids[np.array(order, dtype=np.int64)]
@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+from pkg.profiler import traced
+from services.engagement_matrix import EngagementMatrix
+from services.engagement_store import LIKERS, EngagementStore
+
+# Only for annotations: a client forwarding to the daemon must not need instagrapi
+if TYPE_CHECKING:
+    from pkg.instagrapi import InstaClient
+
+
+class EngagementAnalyzer:
+    def __init__(self, client: "InstaClient", max_workers: int = 4, store: Optional[EngagementStore] = None):
+        """
+        Count likes and comments per follower over a set of posts
+
+        Likers and comments are fetched on a bounded worker pool, each worker on its
+        own instagrapi client. Every request still goes through the client's rate
+        limiter, so the pool only overlaps the waiting on network round-trips and
+        never exceeds the per-endpoint budget.
+
+        Args:
+            client: Logged in InstaClient
+            max_workers: Maximum number of requests in flight
+            store: Engagement cache; posts it holds current engagement for are not fetched
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.store = store
+        self.failed_posts = []
+        self.cached_posts = []
+        self.logger = logging.getLogger(__name__)
+
+    def _fetch(self, kind: str, media_pk: str) -> List:
+        # The raising variants, a failed request must not count as a post nobody engaged with
+        if kind == 'likers':
+            return self.client.fetch_media_likers(media_pk)
+        return self.client.fetch_media_comments(media_pk)
+
+    @traced('analysis')
+    def count_engagement(self, media_list: List, follower_ids: Iterable[str],
+                         on_progress: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, int]:
+        """
+        Count engagements (likes + comments) per follower
+
+        Results are merged as they arrive. A post whose requests fail is recorded in
+        failed_posts and skipped, the remaining posts are unaffected. With a store,
+        posts whose cached engagement is current are counted from it (listed in
+        cached_posts) and every fully fetched post is written back.
+
+        Args:
+            media_list: Media objects to analyze
+            follower_ids: IDs of the followers to count for
+            on_progress: Called with (media_pk, posts_done, posts_total) after each finished post,
+                         media_pk is None for the posts served from the cache
+
+        Returns:
+            Dict: {user_id: engagement_count} for every follower
+        """
+        engagement_count = {uid: 0 for uid in follower_ids}
+        cached = self._collect(media_list, lambda media_pk, kind, counts: self._merge(counts, engagement_count),
+                               on_progress)
+        if cached:
+            self._merge(self.store.engagement_counts(cached), engagement_count)
+        return engagement_count
+
+    @traced('analysis')
+    def engagement_matrix(self, media_list: List, follower_ids: Iterable[str],
+                          on_progress: Optional[Callable[[str, int, int], None]] = None,
+                          representation: str = 'auto') -> EngagementMatrix:
+        """
+        Fetch likers and comments like count_engagement, keeping them per post
+
+        Returns:
+            EngagementMatrix: Follower x post likes and comments, ready for scoring
+        """
+        matrix = EngagementMatrix(follower_ids, media_list, representation=representation)
+        cached = self._collect(media_list, matrix.add, on_progress)
+        if cached:
+            for media_pk, kind, counts in self.store.post_engagements(cached):
+                matrix.add(media_pk, 'likers' if kind == LIKERS else 'comments', counts)
+        return matrix.build()
+
+    def _collect(self, media_list: List, on_counts: Callable[[str, str, Dict[str, int]], None],
+                 on_progress: Optional[Callable[[str, int, int], None]] = None) -> List[str]:
+        """
+        Fetch the engagement of every post the store has no current copy of
+
+        Args:
+            media_list: Media objects to analyze
+            on_counts: Called with (media_pk, 'likers' | 'comments', {user_id: count}) per fetched list
+            on_progress: As in count_engagement
+
+        Returns:
+            List: Media pks to read from the store instead
+        """
+        self.failed_posts = []
+        self.cached_posts = []
+
+        to_fetch = media_list
+        if self.store:
+            to_fetch, cached = self.store.plan(media_list)
+            self.cached_posts = [media.pk for media in cached]
+
+        media_by_pk = {media.pk: media for media in to_fetch}
+        pending = {media.pk: 2 for media in to_fetch}
+        fetched = {media.pk: {} for media in to_fetch}
+        posts_done = len(self.cached_posts)
+        if on_progress and posts_done:
+            on_progress(None, posts_done, len(media_list))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch, kind, media.pk): (kind, media.pk)
+                for media in to_fetch
+                for kind in ('likers', 'comments')
+            }
+
+            for future in as_completed(futures):
+                kind, media_pk = futures[future]
+                try:
+                    fetched[media_pk][kind] = self._engagers(kind, future.result())
+                    on_counts(media_pk, kind, fetched[media_pk][kind])
+                except Exception as e:
+                    self.logger.warning(f"Failed to fetch {kind} for post {media_pk}: {str(e)}")
+                    if media_pk not in self.failed_posts:
+                        self.failed_posts.append(media_pk)
+
+                pending[media_pk] -= 1
+                if not pending[media_pk]:
+                    posts_done += 1
+                    # Only a post whose likers and comments both arrived is cached, a partial
+                    # or failed fetch would otherwise be served as its engagement for days
+                    if self.store and media_pk not in self.failed_posts and len(fetched[media_pk]) == 2:
+                        self.store.save_post(self.client.username, media_by_pk[media_pk],
+                                             fetched[media_pk]['likers'], fetched[media_pk]['comments'])
+                    if on_progress:
+                        on_progress(media_pk, posts_done, len(media_list))
+
+        return self.cached_posts
+
+    def _engagers(self, kind: str, items: List) -> Dict[str, int]:
+        """Engagements per user in one post's likers or comments"""
+        counts = {}
+        if kind == 'likers':
+            for user in items:
+                counts[user.pk] = 1
+            return counts
+
+        for comment in items:
+            try:
+                if comment.user:
+                    counts[comment.user.pk] = counts.get(comment.user.pk, 0) + 1
+            except AttributeError:
+                self.logger.warning("Skipping malformed comment")
+        return counts
+
+    @staticmethod
+    def _merge(counts: Dict[str, int], engagement_count: Dict[str, int]):
+        """Add one post's engagements to the running counts of the followers"""
+        for uid, count in counts.items():
+            if uid in engagement_count:
+                engagement_count[uid] += count
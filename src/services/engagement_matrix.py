@@ -0,0 +1,178 @@
+import time
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+from services.diff_engine import to_id_array
+
+KINDS = ('likers', 'comments')
+
+# Dense cells are uint16; a sparse entry costs an int32 row, an int32 column and a uint16 count
+DENSE_CELL_BYTES = 2
+SPARSE_ENTRY_BYTES = 10
+
+
+class EngagementMatrix:
+    def __init__(self, follower_ids: Iterable, media_list: List, representation: str = 'auto',
+                 max_dense_bytes: int = 256 * 2 ** 20):
+        """
+        Follower x post engagement counts, one matrix for likes and one for comments
+
+        Rows are the followers in ascending id order (self.user_ids), columns the posts
+        of media_list. Posts are added one at a time with add(); build() then stores each
+        kind either as a dense uint16 array or as sparse (row, column, count) triplets,
+        whichever is smaller, so 500k followers x 200 posts at typical engagement rates
+        stay in the tens of megabytes.
+
+        Args:
+            follower_ids: User ids of the followers (numeric strings or ints)
+            media_list: Media objects, their order defines the columns
+            representation: 'auto', 'dense' or 'sparse'
+            max_dense_bytes: 'auto' never picks a dense matrix larger than this
+        """
+        if representation not in ('auto', 'dense', 'sparse'):
+            raise ValueError(f"Unknown representation: {representation} (expected auto, dense or sparse)")
+        self.user_ids = to_id_array(follower_ids)
+        self.media_pks = [str(media.pk) for media in media_list]
+        self.columns = {pk: column for column, pk in enumerate(self.media_pks)}
+        self.taken_at = np.array(
+            [media.taken_at.timestamp() if getattr(media, 'taken_at', None) else np.nan for media in media_list],
+            dtype=np.float64
+        )
+        self.representation = representation
+        self.max_dense_bytes = max_dense_bytes
+        self._parts = {kind: [] for kind in KINDS}
+        self.dense = {}
+        self.sparse = {}
+
+    @property
+    def shape(self):
+        return len(self.user_ids), len(self.media_pks)
+
+    def add(self, media_pk: str, kind: str, counts: Dict[str, int]):
+        """
+        Add one post's likers or commenters; users who are not followers are dropped
+
+        Args:
+            media_pk: Post the engagement belongs to
+            kind: 'likers' or 'comments'
+            counts: {user_id: engagements}
+        """
+        if not counts:
+            return
+        ids = np.fromiter(map(int, counts.keys()), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        # Sorted keys let searchsorted walk user_ids in order instead of jumping around
+        order = np.argsort(ids)
+        ids, values = ids[order], values[order]
+        rows = np.searchsorted(self.user_ids, ids)
+        rows[rows == len(self.user_ids)] = 0
+        hit = self.user_ids[rows] == ids if len(self.user_ids) else np.zeros(len(ids), dtype=bool)
+        rows = rows[hit].astype(np.int32)
+        self._parts[kind].append((
+            rows,
+            np.full(len(rows), self.columns[str(media_pk)], dtype=np.int32),
+            np.minimum(values[hit], np.iinfo(np.uint16).max).astype(np.uint16),
+        ))
+
+    def build(self) -> "EngagementMatrix":
+        """Assemble the added posts into the dense or sparse representation"""
+        cells = self.shape[0] * self.shape[1]
+        for kind in KINDS:
+            parts = self._parts[kind]
+            rows = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, dtype=np.int32)
+            cols = np.concatenate([p[1] for p in parts]) if parts else np.empty(0, dtype=np.int32)
+            counts = np.concatenate([p[2] for p in parts]) if parts else np.empty(0, dtype=np.uint16)
+            dense_bytes = cells * DENSE_CELL_BYTES
+            use_dense = self.representation == 'dense' or (
+                self.representation == 'auto'
+                and dense_bytes < len(rows) * SPARSE_ENTRY_BYTES and dense_bytes <= self.max_dense_bytes
+            )
+            if use_dense:
+                matrix = np.zeros(self.shape, dtype=np.uint16)
+                # A post is added once per kind, so (row, column) pairs are unique
+                matrix[rows, cols] = counts
+                self.dense[kind] = matrix
+                self.sparse.pop(kind, None)
+            else:
+                self.sparse[kind] = (rows, cols, counts)
+                self.dense.pop(kind, None)
+        self._parts = {kind: [] for kind in KINDS}
+        return self
+
+    def nnz(self, kind: str) -> int:
+        if kind in self.dense:
+            return int(np.count_nonzero(self.dense[kind]))
+        return len(self.sparse[kind][0])
+
+    def density(self) -> float:
+        """Share of follower x post cells with a like or a comment (counted per kind)"""
+        cells = self.shape[0] * self.shape[1]
+        return sum(self.nnz(kind) for kind in KINDS) / (2 * cells) if cells else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(matrix.nbytes for matrix in self.dense.values())
+                + sum(sum(array.nbytes for array in triplet) for triplet in self.sparse.values()))
+
+    def post_weights(self, half_life_days: Optional[float] = None, now: Optional[float] = None) -> np.ndarray:
+        """
+        Time decay per post: 0.5 ** (age / half life), 1 for every post without a half life
+
+        Posts without a timestamp count fully.
+        """
+        if not half_life_days:
+            return np.ones(self.shape[1])
+        age_days = np.maximum(0.0, ((now or time.time()) - self.taken_at) / 86400)
+        return np.where(np.isnan(age_days), 1.0, 0.5 ** (age_days / half_life_days))
+
+    def _weighted_sum(self, kind: str, column_weights: np.ndarray) -> np.ndarray:
+        if kind in self.dense:
+            return self.dense[kind] @ column_weights
+        rows, cols, counts = self.sparse[kind]
+        return np.bincount(rows, weights=counts * column_weights[cols], minlength=self.shape[0])
+
+    def totals(self, kind: str) -> np.ndarray:
+        """Unweighted likes or comments per follower"""
+        return np.rint(self._weighted_sum(kind, np.ones(self.shape[1]))).astype(np.int64)
+
+    def scores(self, like_weight: float = 1.0, comment_weight: float = 1.0, half_life_days: Optional[float] = None,
+               now: Optional[float] = None) -> np.ndarray:
+        """
+        Weighted, time decayed engagement score per follower
+
+        Args:
+            like_weight: Score of one like
+            comment_weight: Score of one comment
+            half_life_days: Engagement on a post this many days old counts half, None for no decay
+            now: Unix time the post ages are measured at, defaults to now
+
+        Returns:
+            np.ndarray: float64 scores aligned with self.user_ids
+        """
+        decay = self.post_weights(half_life_days, now)
+        return (self._weighted_sum('likers', decay * like_weight)
+                + self._weighted_sum('comments', decay * comment_weight))
+
+
+def bottom_k(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k smallest values in ascending order, ties broken by index
+
+    np.argpartition finds them in linear time; only the k selected are sorted.
+    """
+    k = max(0, min(k, len(values)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k == len(values):
+        return np.lexsort((np.arange(len(values)), values))
+    threshold = values[np.argpartition(values, k - 1)[k - 1]]
+    below = np.flatnonzero(values < threshold)
+    below = below[np.lexsort((below, values[below]))]
+    # Ties with the k-th value fill the remaining places in index order (flatnonzero is sorted)
+    tied = np.flatnonzero(values == threshold)[:k - len(below)]
+    return np.concatenate((below, tied))
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values in descending order, ties broken by index"""
+    return bottom_k(-values, k)
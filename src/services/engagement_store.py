@@ -0,0 +1,208 @@
+import logging
+from pathlib import Path
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+LIKERS = 0
+COMMENTERS = 1
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    media_pk TEXT PRIMARY KEY,
+    account TEXT NOT NULL DEFAULT '',
+    taken_at REAL,
+    like_count INTEGER,
+    comment_count INTEGER,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_account ON posts (account, taken_at);
+CREATE TABLE IF NOT EXISTS engagements (
+    media_pk TEXT NOT NULL REFERENCES posts (media_pk) ON DELETE CASCADE,
+    kind INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (media_pk, kind, user_id)
+) WITHOUT ROWID;
+"""
+
+DAY = 86400
+
+
+class EngagementStore:
+    def __init__(self, db_path: Path, recent_days: float = 3, decay: float = 0.25, max_interval_days: float = 30,
+                 count_tolerance: float = 0.02):
+        """
+        SQLite cache of who liked and commented on each post, keyed by media pk
+
+        Engagement on a post settles as it ages, so posts are refreshed on a decaying
+        schedule: posts younger than recent_days are fetched on every run, older ones
+        once decay * (their age when last fetched) has passed, at most every
+        max_interval_days. A post is also refreshed early when the like or comment count
+        that comes with the post list moved by more than count_tolerance since then.
+
+        Args:
+            db_path: Path of the SQLite database file
+            recent_days: Posts younger than this are always fetched
+            decay: Refresh interval as a share of the post's age
+            max_interval_days: Longest time a post goes without a refresh
+            count_tolerance: Relative change of like/comment count that forces a refresh
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.recent = recent_days * DAY
+        self.decay = decay
+        self.max_interval = max_interval_days * DAY
+        self.count_tolerance = count_tolerance
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.logger = logging.getLogger(__name__)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            with self.conn:
+                self.conn.executescript(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _timestamp(media) -> Optional[float]:
+        taken_at = getattr(media, 'taken_at', None)
+        return taken_at.timestamp() if taken_at else None
+
+    def _count_moved(self, stored: Optional[int], current: Optional[int]) -> bool:
+        if stored is None or current is None:
+            return False
+        return abs(current - stored) > max(1, stored * self.count_tolerance)
+
+    def refresh_reason(self, media, row: Optional[sqlite3.Row], now: float) -> Optional[str]:
+        """
+        Why a post has to be fetched again, None while its cached engagement is current
+
+        Args:
+            media: Media object from the post list
+            row: Cached `posts` row of the media, None if it was never fetched
+            now: Current unix time
+        """
+        if row is None:
+            return "new"
+        taken_at = self._timestamp(media) or row['taken_at']
+        if taken_at is None or now - taken_at < self.recent:
+            return "recent"
+        if (self._count_moved(row['like_count'], getattr(media, 'like_count', None))
+                or self._count_moved(row['comment_count'], getattr(media, 'comment_count', None))):
+            return "counts changed"
+        interval = min(self.max_interval, max(0.0, row['fetched_at'] - taken_at) * self.decay)
+        if now - row['fetched_at'] >= interval:
+            return "due"
+        return None
+
+    def plan(self, media_list: List, now: Optional[float] = None) -> Tuple[List, List]:
+        """
+        Split posts into those to fetch from the API and those served from the cache
+
+        Returns:
+            Tuple: (media to fetch, media whose cached engagement is current)
+        """
+        now = now or time.time()
+        pks = [str(media.pk) for media in media_list]
+        rows = {}
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self.conn.execute(f"SELECT * FROM posts WHERE media_pk IN ({placeholders})", chunk):
+                rows[row['media_pk']] = row
+
+        due, cached = [], []
+        for media in media_list:
+            reason = self.refresh_reason(media, rows.get(str(media.pk)), now)
+            if reason:
+                self.logger.debug(f"Fetching engagement of post {media.pk}: {reason}")
+                due.append(media)
+            else:
+                cached.append(media)
+        return due, cached
+
+    def save_post(self, account: str, media, likers: Dict[str, int], commenters: Dict[str, int],
+                  fetched_at: Optional[float] = None):
+        """
+        Replace the cached engagement of one post
+
+        Args:
+            account: Username the post belongs to
+            media: Media object the engagement was fetched for
+            likers: {user_id: likes} (1 each)
+            commenters: {user_id: number of comments}
+            fetched_at: Unix time of the fetch, defaults to now
+        """
+        media_pk = str(media.pk)
+        with self.conn:
+            self.conn.execute("DELETE FROM engagements WHERE media_pk = ?", (media_pk,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO posts (media_pk, account, taken_at, like_count, comment_count, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (media_pk, account, self._timestamp(media), getattr(media, 'like_count', None),
+                 getattr(media, 'comment_count', None), fetched_at or time.time())
+            )
+            self.conn.executemany(
+                "INSERT INTO engagements (media_pk, kind, user_id, count) VALUES (?, ?, ?, ?)",
+                [(media_pk, LIKERS, str(uid), count) for uid, count in likers.items()]
+                + [(media_pk, COMMENTERS, str(uid), count) for uid, count in commenters.items()]
+            )
+
+    def engagement_counts(self, media_pks: Iterable[str]) -> Dict[str, int]:
+        """
+        Likes plus comments per user over the cached posts
+
+        Returns:
+            Dict: {user_id: engagements} for every user who engaged with one of the posts
+        """
+        pks = [str(pk) for pk in media_pks]
+        counts = {}
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for user_id, count in self.conn.execute(
+                f"SELECT user_id, SUM(count) FROM engagements WHERE media_pk IN ({placeholders}) GROUP BY user_id",
+                chunk
+            ):
+                counts[user_id] = counts.get(user_id, 0) + count
+        return counts
+
+    def post_engagements(self, media_pks: Iterable[str]) -> Iterator[Tuple[str, int, Dict[str, int]]]:
+        """
+        Cached engagement of each post, one kind at a time
+
+        Yields:
+            Tuple: (media_pk, LIKERS | COMMENTERS, {user_id: count})
+        """
+        pks = [str(pk) for pk in media_pks]
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            current, counts = None, {}
+            for media_pk, kind, user_id, count in self.conn.execute(
+                f"SELECT media_pk, kind, user_id, count FROM engagements WHERE media_pk IN ({placeholders}) "
+                "ORDER BY media_pk, kind", chunk
+            ):
+                if (media_pk, kind) != current:
+                    if current:
+                        yield current[0], current[1], counts
+                    current, counts = (media_pk, kind), {}
+                counts[user_id] = count
+            if current:
+                yield current[0], current[1], counts
+
+    def stats(self, account: Optional[str] = None) -> Dict:
+        """Number of cached posts and engagement rows, optionally for one account"""
+        where, params = ("WHERE account = ?", (account,)) if account else ("", ())
+        posts = self.conn.execute(f"SELECT COUNT(*) FROM posts {where}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT COUNT(*) FROM engagements WHERE media_pk IN (SELECT media_pk FROM posts {where})", params
+        ).fetchone()[0]
+        return {'posts': posts, 'engagements': rows, 'db_path': str(self.db_path)}
+
+    def close(self):
+        self.conn.close()
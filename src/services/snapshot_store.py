@@ -0,0 +1,665 @@
+from datetime import datetime, timedelta
+import json
+import logging
+from pathlib import Path
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import numpy as np
+
+from services.diff_engine import to_id_array
+
+FOLLOWERS = 0
+FOLLOWING = 1
+
+# relations.op: membership row of a keyframe, or a change relative to the previous snapshot
+KEEP = 0
+ADDED = 1
+REMOVED = -1
+
+# events.event
+FIRST_SEEN = 0
+FOLLOW = 1
+UNFOLLOW = -1
+
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT,
+    full_name TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL DEFAULT '',
+    taken_at TEXT NOT NULL,
+    followers_count INTEGER NOT NULL,
+    following_count INTEGER NOT NULL,
+    source TEXT,
+    is_keyframe INTEGER NOT NULL DEFAULT 1,
+    sync TEXT NOT NULL DEFAULT 'full'
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_account ON snapshots (account, id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_keyframe ON snapshots (account, is_keyframe, id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_source ON snapshots (source);
+CREATE INDEX IF NOT EXISTS idx_snapshots_sync ON snapshots (account, sync, id);
+CREATE TABLE IF NOT EXISTS relations (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    kind INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    op INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (snapshot_id, kind, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS current_relations (
+    account TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (account, kind, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    account TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    event INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    snapshot_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_user ON events (account, kind, user_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (account, kind, ts);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+"""
+
+
+class SnapshotStore:
+    def __init__(self, db_path: Path, keyframe_interval: int = 24):
+        """
+        SQLite backed, delta encoded follower snapshot history
+
+        Users are stored once in `users`. Every keyframe_interval-th snapshot of an account
+        is a keyframe holding the full follower/following id lists; the snapshots in between
+        only hold the ids added or removed since the previous snapshot. `current_relations`
+        mirrors the latest state of every account, so saving and diffing against the latest
+        snapshot never has to replay history.
+
+        Args:
+            db_path: Path of the SQLite database file
+            keyframe_interval: Store a full keyframe every N snapshots
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.logger = logging.getLogger(__name__)
+        self._migrate()
+
+    def _migrate(self):
+        """
+        Create the schema and upgrade older databases
+
+        Version 1 stored full relations per snapshot, version 2 had no event index,
+        version 3 did not tell full from incremental follower syncs.
+        """
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        with self.conn:
+            columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(snapshots)")]
+            upgrading = bool(columns) and 'is_keyframe' not in columns
+            if upgrading:
+                # Every version 1 snapshot is complete, i.e. already a keyframe
+                self.conn.execute("ALTER TABLE snapshots ADD COLUMN is_keyframe INTEGER NOT NULL DEFAULT 1")
+                self.conn.execute("ALTER TABLE relations ADD COLUMN op INTEGER NOT NULL DEFAULT 0")
+                self.conn.execute("UPDATE snapshots SET account = '' WHERE account IS NULL")
+            if columns and 'sync' not in columns:
+                # Every snapshot before version 4 came from a full fetch
+                self.conn.execute("ALTER TABLE snapshots ADD COLUMN sync TEXT NOT NULL DEFAULT 'full'")
+
+            self.conn.executescript(SCHEMA)
+
+            if upgrading:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO current_relations (account, kind, user_id) "
+                    "SELECT s.account, r.kind, r.user_id FROM relations r JOIN snapshots s ON s.id = r.snapshot_id "
+                    "WHERE s.id IN (SELECT MAX(id) FROM snapshots GROUP BY account)"
+                )
+            if columns and version < 3:
+                self._backfill_events()
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _backfill_events(self):
+        """Build the event index from existing history, one replay per account"""
+        self.conn.execute("DELETE FROM events")
+        for (account,) in self.conn.execute("SELECT DISTINCT account FROM snapshots").fetchall():
+            for index, snapshot, kind, previous, current in self._replay(self.list_snapshots(account)):
+                if index == 0:
+                    self._record_events(account, kind, snapshot, first_seen=current)
+                else:
+                    self._record_events(account, kind, snapshot, added=current - previous, removed=previous - current)
+
+    def close(self):
+        self.conn.close()
+
+    def save_snapshot(self, account: Optional[str], followers: Dict[str, Dict], following: Dict[str, Dict],
+                      taken_at: Optional[datetime] = None, source: Optional[str] = None,
+                      incremental: bool = False) -> int:
+        """
+        Store a snapshot as a keyframe or as a delta against the previous one
+
+        Only the changed ids are written for a delta, so write time and disk use
+        scale with churn rather than follower count.
+
+        Args:
+            account: Username the snapshot belongs to
+            followers: {user_id: {'username', 'full_name'}}
+            following: {user_id: {'username', 'full_name'}}
+            taken_at: Time of the snapshot (optional, defaults to now)
+            source: Legacy file the snapshot was imported from (optional)
+            incremental: followers only holds the newest followers of an incremental sync;
+                they are added to the previous list and nobody is recorded as unfollowed
+
+        Returns:
+            int: Id of the new snapshot
+        """
+        account = account or ''
+        taken_at = taken_at or datetime.now()
+
+        with self.conn:
+            is_first = self.latest_snapshot(account) is None
+            is_keyframe = self._keyframe_due(account)
+            current_ids = {kind: self._current_ids(account, kind) for kind in (FOLLOWERS, FOLLOWING)}
+            new_ids = {FOLLOWERS: {str(uid) for uid in followers}, FOLLOWING: {str(uid) for uid in following}}
+            if incremental:
+                new_ids[FOLLOWERS] |= current_ids[FOLLOWERS]
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (account, taken_at, followers_count, following_count, source, is_keyframe, sync) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (account, taken_at.isoformat(), len(new_ids[FOLLOWERS]), len(new_ids[FOLLOWING]), source,
+                 int(is_keyframe), 'incremental' if incremental else 'full')
+            )
+            snapshot_id = cursor.lastrowid
+
+            changed_users = {}
+            for kind, users in ((FOLLOWERS, followers), (FOLLOWING, following)):
+                ids = new_ids[kind]
+                current = current_ids[kind]
+                added = ids - current
+                removed = current - ids
+                changed_users.update((uid, users[uid]) for uid in users if str(uid) in added)
+
+                if is_keyframe:
+                    rows = [(snapshot_id, kind, uid, KEEP) for uid in ids]
+                else:
+                    rows = [(snapshot_id, kind, uid, ADDED) for uid in added] + \
+                           [(snapshot_id, kind, uid, REMOVED) for uid in removed]
+                self.conn.executemany(
+                    "INSERT INTO relations (snapshot_id, kind, user_id, op) VALUES (?, ?, ?, ?)", rows
+                )
+
+                self.conn.executemany(
+                    "DELETE FROM current_relations WHERE account = ? AND kind = ? AND user_id = ?",
+                    [(account, kind, uid) for uid in removed]
+                )
+                self.conn.executemany(
+                    "INSERT INTO current_relations (account, kind, user_id) VALUES (?, ?, ?)",
+                    [(account, kind, uid) for uid in added]
+                )
+
+                snapshot = {'id': snapshot_id, 'taken_at': taken_at.isoformat()}
+                if is_first:
+                    self._record_events(account, kind, snapshot, first_seen=ids)
+                else:
+                    self._record_events(account, kind, snapshot, added=added, removed=removed)
+
+            # Profile changes of existing users are picked up whenever a keyframe is written
+            self._upsert_users({**following, **followers} if is_keyframe else changed_users)
+
+        return snapshot_id
+
+    def _record_events(self, account: str, kind: int, snapshot: Dict, added: Iterable[str] = (),
+                       removed: Iterable[str] = (), first_seen: Iterable[str] = ()):
+        """Append follow/unfollow events of one snapshot to the event index"""
+        ts = snapshot['taken_at']
+        self.conn.executemany(
+            "INSERT INTO events (account, kind, user_id, event, ts, snapshot_id) VALUES (?, ?, ?, ?, ?, ?)",
+            [(account, kind, uid, FIRST_SEEN, ts, snapshot['id']) for uid in first_seen] +
+            [(account, kind, uid, FOLLOW, ts, snapshot['id']) for uid in added] +
+            [(account, kind, uid, UNFOLLOW, ts, snapshot['id']) for uid in removed]
+        )
+
+    def _keyframe_due(self, account: str) -> bool:
+        last_keyframe = self.conn.execute(
+            "SELECT MAX(id) FROM snapshots WHERE account = ? AND is_keyframe = 1", (account,)
+        ).fetchone()[0]
+        if last_keyframe is None:
+            return True
+        since = self.conn.execute(
+            "SELECT COUNT(*) FROM snapshots WHERE account = ? AND id > ?", (account, last_keyframe)
+        ).fetchone()[0]
+        return since + 1 >= self.keyframe_interval
+
+    def _current_ids(self, account: str, kind: int) -> Set[str]:
+        rows = self.conn.execute(
+            "SELECT user_id FROM current_relations WHERE account = ? AND kind = ?", (account, kind)
+        )
+        return {row[0] for row in rows}
+
+    def _upsert_users(self, users: Dict[str, Dict]):
+        self.conn.executemany(
+            "INSERT INTO users (user_id, username, full_name) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET username = excluded.username, full_name = excluded.full_name "
+            "WHERE username IS NOT excluded.username OR full_name IS NOT excluded.full_name",
+            [(str(uid), user['username'], user['full_name']) for uid, user in users.items()]
+        )
+
+    def get_snapshot(self, snapshot_id: int) -> Optional[Dict]:
+        row = self.conn.execute("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest_snapshot(self, account: Optional[str] = None) -> Optional[Dict]:
+        """
+        Metadata of the most recent snapshot, using the (account, id) index
+
+        Args:
+            account: Only consider snapshots of this username (optional)
+
+        Returns:
+            Dict: {'id', 'account', 'taken_at', 'followers_count', 'following_count', 'is_keyframe', 'sync'} or None
+        """
+        if account is None:
+            row = self.conn.execute("SELECT * FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT * FROM snapshots WHERE account = ? ORDER BY id DESC LIMIT 1", (account,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def last_full_sync(self, account: Optional[str]) -> Optional[Dict]:
+        """Metadata of the most recent snapshot taken from a complete follower list, or None"""
+        row = self.conn.execute(
+            "SELECT * FROM snapshots WHERE account = ? AND sync = 'full' ORDER BY id DESC LIMIT 1", (account or '',)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def list_snapshots(self, account: Optional[str] = None) -> List[Dict]:
+        """Metadata of all snapshots, oldest first"""
+        if account is None:
+            rows = self.conn.execute("SELECT * FROM snapshots ORDER BY id")
+        else:
+            rows = self.conn.execute("SELECT * FROM snapshots WHERE account = ? ORDER BY id", (account,))
+        return [dict(row) for row in rows]
+
+    def _is_latest(self, snapshot: Dict) -> bool:
+        return self.latest_snapshot(snapshot['account'])['id'] == snapshot['id']
+
+    def _apply_deltas(self, ids: Set[str], snapshot_id: int, kind: int) -> Set[str]:
+        """Apply the changes recorded for one delta snapshot to a set of ids"""
+        for user_id, op in self.conn.execute(
+                "SELECT user_id, op FROM relations WHERE snapshot_id = ? AND kind = ?", (snapshot_id, kind)):
+            if op == REMOVED:
+                ids.discard(user_id)
+            else:
+                ids.add(user_id)
+        return ids
+
+    def reconstruct(self, snapshot_id: int, kind: int = FOLLOWERS) -> Set[str]:
+        """
+        Rebuild the full id list of any historical snapshot
+
+        Starts from the closest keyframe at or before the snapshot and replays the deltas.
+
+        Args:
+            snapshot_id: Snapshot to rebuild
+            kind: FOLLOWERS or FOLLOWING
+
+        Returns:
+            Set: user ids
+        """
+        snapshot = self.get_snapshot(snapshot_id)
+        if snapshot is None:
+            raise KeyError(f"Unknown snapshot {snapshot_id}")
+        if self._is_latest(snapshot):
+            return self._current_ids(snapshot['account'], kind)
+
+        keyframe_id = self.conn.execute(
+            "SELECT MAX(id) FROM snapshots WHERE account = ? AND is_keyframe = 1 AND id <= ?",
+            (snapshot['account'], snapshot_id)
+        ).fetchone()[0]
+
+        ids = {row[0] for row in self.conn.execute(
+            "SELECT user_id FROM relations WHERE snapshot_id = ? AND kind = ?", (keyframe_id, kind)
+        )}
+        deltas = self.conn.execute(
+            "SELECT id FROM snapshots WHERE account = ? AND id > ? AND id <= ? ORDER BY id",
+            (snapshot['account'], keyframe_id, snapshot_id)
+        ).fetchall()
+        for (delta_id,) in deltas:
+            self._apply_deltas(ids, delta_id, kind)
+        return ids
+
+    def _fill_temp(self, table: str, user_ids: Iterable[str]):
+        self.conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (user_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute(f"DELETE FROM temp.{table}")
+        self.conn.executemany(f"INSERT OR IGNORE INTO temp.{table} (user_id) VALUES (?)",
+                              ((str(uid),) for uid in user_ids))
+
+    def _snapshot_ids_sql(self, snapshot_id: int, kind: int) -> Tuple[str, tuple]:
+        """
+        SQL selecting the user ids of a snapshot
+
+        The latest snapshot is read straight from current_relations; older ones are
+        reconstructed into a temp table first.
+        """
+        snapshot = self.get_snapshot(snapshot_id)
+        if snapshot is None:
+            raise KeyError(f"Unknown snapshot {snapshot_id}")
+        if self._is_latest(snapshot):
+            return ("SELECT user_id FROM current_relations WHERE account = ? AND kind = ?",
+                    (snapshot['account'], kind))
+
+        self._fill_temp('snapshot_ids', self.reconstruct(snapshot_id, kind))
+        return "SELECT user_id FROM temp.snapshot_ids", ()
+
+    def load_relations(self, snapshot_id: int, kind: int = FOLLOWERS) -> Dict[str, Dict]:
+        """
+        Load the full follower or following map of a snapshot
+
+        Returns:
+            Dict: {user_id: {'username', 'full_name'}}
+        """
+        with self.conn:
+            source, params = self._snapshot_ids_sql(snapshot_id, kind)
+            rows = self.conn.execute(
+                f"SELECT u.user_id, u.username, u.full_name FROM ({source}) s "
+                "JOIN users u ON u.user_id = s.user_id",
+                params
+            ).fetchall()
+        return {row['user_id']: {'username': row['username'], 'full_name': row['full_name']} for row in rows}
+
+    def id_array(self, snapshot_id: int, kind: int = FOLLOWERS) -> np.ndarray:
+        """
+        User ids of a snapshot as a sorted int64 array for the vectorized diff engine
+
+        Args:
+            snapshot_id: Snapshot to read
+            kind: FOLLOWERS or FOLLOWING
+
+        Returns:
+            np.ndarray: Sorted unique user ids
+        """
+        snapshot = self.get_snapshot(snapshot_id)
+        if snapshot is None:
+            raise KeyError(f"Unknown snapshot {snapshot_id}")
+        if self._is_latest(snapshot):
+            ids = (row[0] for row in self.conn.execute(
+                "SELECT CAST(user_id AS INTEGER) FROM current_relations WHERE account = ? AND kind = ?",
+                (snapshot['account'], kind)
+            ))
+            return to_id_array(ids)
+        return to_id_array(self.reconstruct(snapshot_id, kind))
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        """
+        Stored profile details of a single user
+
+        Returns:
+            Dict: {'user_id', 'username', 'full_name'} or None
+        """
+        row = self.conn.execute(
+            "SELECT user_id, username, full_name FROM users WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def removed_since(self, snapshot_id: int, current_ids: Iterable[str], kind: int = FOLLOWERS) -> List[Dict]:
+        """
+        Users in the snapshot that are missing from the current list (e.g. unfollowers)
+
+        Returns:
+            List: [{'user_id', 'username', 'full_name'}]
+        """
+        with self.conn:
+            self._fill_temp('current_ids', current_ids)
+            source, params = self._snapshot_ids_sql(snapshot_id, kind)
+            rows = self.conn.execute(
+                f"SELECT u.user_id, u.username, u.full_name FROM ({source}) s "
+                "JOIN users u ON u.user_id = s.user_id "
+                "WHERE NOT EXISTS (SELECT 1 FROM temp.current_ids c WHERE c.user_id = s.user_id)",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def added_since(self, snapshot_id: int, current_ids: Iterable[str], kind: int = FOLLOWERS) -> List[str]:
+        """
+        Ids in the current list that are not in the snapshot (e.g. new followers)
+
+        Returns:
+            List: user ids
+        """
+        with self.conn:
+            self._fill_temp('current_ids', current_ids)
+            source, params = self._snapshot_ids_sql(snapshot_id, kind)
+            rows = self.conn.execute(
+                f"SELECT c.user_id FROM temp.current_ids c WHERE c.user_id NOT IN ({source})",
+                params
+            ).fetchall()
+        return [row['user_id'] for row in rows]
+
+    def _replay(self, snapshots: List[Dict]) -> Iterator[Tuple[int, Dict, int, Set[str], Set[str]]]:
+        """
+        Walk a chronological run of one account's snapshots and decode each one
+
+        Each snapshot's rows are read just before it is yielded, so the caller may
+        rewrite the rows of the yielded snapshot without affecting the replay.
+
+        Yields:
+            Tuple: (index, snapshot, kind, previous ids, current ids), FOLLOWERS before FOLLOWING
+        """
+        states = {}
+        for index, snapshot in enumerate(snapshots):
+            for kind in (FOLLOWERS, FOLLOWING):
+                if index == 0:
+                    current = self.reconstruct(snapshot['id'], kind)
+                elif snapshot['is_keyframe']:
+                    current = {row[0] for row in self.conn.execute(
+                        "SELECT user_id FROM relations WHERE snapshot_id = ? AND kind = ?", (snapshot['id'], kind)
+                    )}
+                else:
+                    current = self._apply_deltas(set(states[kind]), snapshot['id'], kind)
+                yield index, snapshot, kind, states.get(kind, set()), current
+                states[kind] = current
+
+    def compact(self, account: Optional[str] = None, keep_days: Optional[int] = None,
+                keyframe_interval: Optional[int] = None) -> Dict:
+        """
+        Apply retention and re-encode history with a keyframe every keyframe_interval snapshots
+
+        Snapshots older than keep_days are dropped (the latest snapshot is always kept),
+        together with the follow/unfollow events from before the oldest remaining one, and
+        that snapshot becomes a keyframe. Full snapshots that fall between
+        keyframes, e.g. from a version 1 database or an old JSON import, are folded into
+        deltas. The database file is vacuumed afterwards.
+
+        Args:
+            account: Only compact this username's history (optional, defaults to all)
+            keep_days: Drop snapshots older than this many days (optional, keeps everything)
+            keyframe_interval: Keyframe spacing (optional, defaults to the store's interval)
+
+        Returns:
+            Dict: {'deleted_snapshots', 'deleted_events', 'rewritten_snapshots', 'bytes_before', 'bytes_after'}
+        """
+        interval = max(1, keyframe_interval or self.keyframe_interval)
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        bytes_before = self.db_path.stat().st_size
+        deleted = deleted_events = rewritten = 0
+
+        if account is None:
+            accounts = [row[0] for row in self.conn.execute("SELECT DISTINCT account FROM snapshots")]
+        else:
+            accounts = [account]
+
+        with self.conn:
+            for acc in accounts:
+                snapshots = self.list_snapshots(acc)
+                expired = []
+                if keep_days is not None:
+                    cutoff = (datetime.now() - timedelta(days=keep_days)).isoformat()
+                    expired = [s for s in snapshots[:-1] if s['taken_at'] < cutoff]
+                kept = snapshots[len(expired):]
+
+                for index, snapshot, kind, previous, current in self._replay(kept):
+                    make_keyframe = index % interval == 0
+                    if make_keyframe != bool(snapshot['is_keyframe']):
+                        self.conn.execute("DELETE FROM relations WHERE snapshot_id = ? AND kind = ?",
+                                          (snapshot['id'], kind))
+                        if make_keyframe:
+                            rows = [(snapshot['id'], kind, uid, KEEP) for uid in current]
+                        else:
+                            rows = [(snapshot['id'], kind, uid, ADDED) for uid in current - previous] + \
+                                   [(snapshot['id'], kind, uid, REMOVED) for uid in previous - current]
+                        self.conn.executemany(
+                            "INSERT INTO relations (snapshot_id, kind, user_id, op) VALUES (?, ?, ?, ?)", rows
+                        )
+
+                    if kind == FOLLOWING and make_keyframe != bool(snapshot['is_keyframe']):
+                        self.conn.execute("UPDATE snapshots SET is_keyframe = ? WHERE id = ?",
+                                          (int(make_keyframe), snapshot['id']))
+                        rewritten += 1
+
+                self.conn.executemany("DELETE FROM snapshots WHERE id = ?", [(s['id'],) for s in expired])
+                deleted += len(expired)
+                if expired:
+                    # history/churn must not report changes from the period that was dropped
+                    deleted_events += self.conn.execute("DELETE FROM events WHERE account = ? AND ts < ?",
+                                                        (acc, kept[0]['taken_at'])).rowcount
+
+            self.conn.execute(
+                "DELETE FROM users WHERE user_id NOT IN (SELECT user_id FROM relations) "
+                "AND user_id NOT IN (SELECT user_id FROM current_relations) "
+                "AND user_id NOT IN (SELECT user_id FROM events)"
+            )
+
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            'deleted_snapshots': deleted,
+            'deleted_events': deleted_events,
+            'rewritten_snapshots': rewritten,
+            'bytes_before': bytes_before,
+            'bytes_after': self.db_path.stat().st_size
+        }
+
+    def find_user_id(self, username: str) -> Optional[str]:
+        """Resolve a stored username to its user id"""
+        row = self.conn.execute("SELECT user_id FROM users WHERE username = ?", (username.lstrip('@'),)).fetchone()
+        return row[0] if row else None
+
+    def user_history(self, account: Optional[str], user_id: str, kind: int = FOLLOWERS) -> Dict:
+        """
+        Follow/unfollow history of one user, straight from the event index
+
+        Args:
+            account: Username whose followers/following are tracked
+            user_id: User to look up
+            kind: FOLLOWERS (they follow you) or FOLLOWING (you follow them)
+
+        Returns:
+            Dict: {'user_id', 'username', 'full_name', 'first_seen', 'first_followed', 'last_unfollowed',
+                   'follows', 'unfollows', 'is_current', 'events': [{'event', 'ts'}]}
+        """
+        account = account or ''
+        rows = self.conn.execute(
+            "SELECT event, ts FROM events WHERE account = ? AND kind = ? AND user_id = ? ORDER BY ts",
+            (account, kind, str(user_id))
+        ).fetchall()
+        user = self.get_user(user_id) or {'username': None, 'full_name': None}
+        names = {FIRST_SEEN: 'first_seen', FOLLOW: 'follow', UNFOLLOW: 'unfollow'}
+
+        return {
+            'user_id': str(user_id),
+            'username': user['username'],
+            'full_name': user['full_name'],
+            'first_seen': next((ts for event, ts in rows if event != UNFOLLOW), None),
+            'first_followed': next((ts for event, ts in rows if event == FOLLOW), None),
+            'last_unfollowed': next((ts for event, ts in reversed(rows) if event == UNFOLLOW), None),
+            'follows': sum(1 for event, _ in rows if event == FOLLOW),
+            'unfollows': sum(1 for event, _ in rows if event == UNFOLLOW),
+            'is_current': bool(rows) and rows[-1][0] != UNFOLLOW,
+            'events': [{'event': names[event], 'ts': ts} for event, ts in rows]
+        }
+
+    def churn(self, account: Optional[str], since: Optional[datetime] = None, until: Optional[datetime] = None,
+              kind: int = FOLLOWERS, top: int = 10) -> Dict:
+        """
+        Follow/unfollow counts over a time range, answered from the (account, kind, ts) index
+
+        Args:
+            account: Username whose followers/following are tracked
+            since: Start of the range (optional, defaults to the beginning)
+            until: End of the range (optional, defaults to now)
+            kind: FOLLOWERS or FOLLOWING
+            top: Number of most frequent churners to return
+
+        Returns:
+            Dict: {'follows', 'unfollows', 'net', 'daily': [{'day', 'follows', 'unfollows'}],
+                   'top_churners': [{'user_id', 'username', 'unfollows'}]}
+        """
+        params = (account or '', kind, since.isoformat() if since else '', until.isoformat() if until else '9999')
+        window = "account = ? AND kind = ? AND ts >= ? AND ts <= ?"
+
+        daily = [dict(row) for row in self.conn.execute(
+            "SELECT substr(ts, 1, 10) AS day, "
+            "SUM(event = 1) AS follows, SUM(event = -1) AS unfollows "
+            f"FROM events WHERE {window} AND event != 0 GROUP BY day ORDER BY day",
+            params
+        )]
+        top_churners = [dict(row) for row in self.conn.execute(
+            "SELECT e.user_id, u.username, COUNT(*) AS unfollows FROM events e "
+            "LEFT JOIN users u ON u.user_id = e.user_id "
+            "WHERE e.account = ? AND e.kind = ? AND e.ts >= ? AND e.ts <= ? "
+            "AND e.event = -1 GROUP BY e.user_id ORDER BY unfollows DESC, e.user_id LIMIT ?",
+            params + (top,)
+        )]
+
+        follows = sum(day['follows'] for day in daily)
+        unfollows = sum(day['unfollows'] for day in daily)
+        return {
+            'follows': follows,
+            'unfollows': unfollows,
+            'net': follows - unfollows,
+            'daily': daily,
+            'top_churners': top_churners
+        }
+
+    def import_json_snapshots(self, data_dir: Path) -> int:
+        """
+        Import legacy followers_snapshot_*.json files that are not in the database yet
+
+        Args:
+            data_dir: Directory containing the JSON snapshots
+
+        Returns:
+            int: Number of imported snapshots
+        """
+        imported = 0
+        for path in sorted(Path(data_dir).glob("followers_snapshot_*.json")):
+            if self.conn.execute("SELECT 1 FROM snapshots WHERE source = ?", (path.name,)).fetchone():
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.save_snapshot(
+                    data.get('username'),
+                    data['followers'],
+                    data['following'],
+                    taken_at=datetime.fromisoformat(data['datetime']),
+                    source=path.name
+                )
+                imported += 1
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Skipping unreadable snapshot {path.name}: {str(e)}")
+
+        return imported
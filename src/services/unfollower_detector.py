@@ -1,109 +1,152 @@
-
 from datetime import datetime
-import json
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional
 from pathlib import Path
-from pkg.instagrapi import InstaClient
-from rich.console import *
+from pkg.metrics import REGISTRY
+from pkg.profiler import traced
+from services.snapshot_store import SnapshotStore, FOLLOWERS
+from services.diff_engine import UserRows, difference, to_id_array
+import numpy as np
+from rich.console import Console
+
+# Only for annotations: a client forwarding to the daemon must not need instagrapi
+if TYPE_CHECKING:
+    from pkg.instagrapi import InstaClient
+
+console = Console()
+
+SNAPSHOT_SAVE_DURATION = REGISTRY.histogram(
+    "unfollowers_snapshot_save_duration_seconds", "Time to save a followers/following snapshot", ["account"])
+SNAPSHOTS_SAVED = REGISTRY.counter("unfollowers_snapshots_saved", "Snapshots saved", ["account"])
+SNAPSHOT_SIZE = REGISTRY.gauge(
+    "unfollowers_snapshot_users", "Users in the last saved snapshot", ["account", "relation"])
+DIFF_DURATION = REGISTRY.histogram(
+    "unfollowers_diff_duration_seconds", "Time to compute a follower diff", ["diff"])
+DIFF_RESULTS = REGISTRY.gauge(
+    "unfollowers_diff_results", "Users in the last result of a follower diff", ["account", "diff"])
 
 
 class UnfollowersDetector:
-    def __init__(self, client: InstaClient):
+    def __init__(self, client: "InstaClient", data_dir: Path = Path("instagram_data")):
         self.client = client
-        self.data_dir = Path("instagram_data")
+        self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.store = SnapshotStore(self.data_dir / "snapshots.db")
+
+        # One-off migration of the old one-JSON-file-per-snapshot layout
+        imported = self.store.import_json_snapshots(self.data_dir)
+        if imported:
+            console.print(f"📦 Imported {imported} JSON snapshots into [blue]{self.store.db_path}[/blue]")
         
-    def save_followers_snapshot(self, followers: Dict, following: Dict) -> str:
-        """Save current followers/following snapshot"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = self.data_dir / f"followers_snapshot_{timestamp}.json"
+    @traced('snapshot')
+    def save_followers_snapshot(self, followers: Dict, following: Dict, incremental: bool = False) -> str:
+        """
+        Save current followers/following snapshot
         
-        snapshot = {
-            'timestamp': timestamp,
-            'datetime': datetime.now().isoformat(),
-            'username': self.client.username,
-            'followers': {uid: {'username': user.username, 'full_name': user.full_name} 
-                         for uid, user in followers.items()},
-            'following': {uid: {'username': user.username, 'full_name': user.full_name} 
-                         for uid, user in following.items()},
-            'followers_count': len(followers),
-            'following_count': len(following)
-        }
-        
-        with open(filename, 'w') as f:
-            json.dump(snapshot, f, indent=2)
+        With incremental, followers are the newest ones of an incremental sync and are
+        added to the previous snapshot's list instead of replacing it.
+        """
+        account = self.client.username
+        with SNAPSHOT_SAVE_DURATION.time(account=account):
+            snapshot_id = self.store.save_snapshot(
+                account,
+                {uid: {'username': user.username, 'full_name': user.full_name} for uid, user in followers.items()},
+                {uid: {'username': user.username, 'full_name': user.full_name} for uid, user in following.items()},
+                incremental=incremental
+            )
+        snapshot = self.store.get_snapshot(snapshot_id)
+        SNAPSHOTS_SAVED.inc(account=account)
+        SNAPSHOT_SIZE.set(snapshot['followers_count'], account=account, relation='followers')
+        SNAPSHOT_SIZE.set(snapshot['following_count'], account=account, relation='following')
             
-        console.print(f"📸 Snapshot saved: [green]{filename}[/green]")
-        return str(filename)
+        kind = " (incremental)" if incremental else ""
+        console.print(f"📸 Snapshot saved: [green]#{snapshot_id}[/green]{kind} in {self.store.db_path}")
+        return str(snapshot_id)
     
-    def load_latest_snapshot(self) -> Dict:
-        """Load the most recent snapshot"""
-        snapshots = list(self.data_dir.glob("followers_snapshot_*.json"))
-        if not snapshots:
+    @traced('snapshot')
+    def load_latest_snapshot(self) -> Optional[Dict]:
+        """
+        Load metadata of the most recent snapshot
+        
+        Follower lists stay in the database; find_unfollowers/find_new_followers diff
+        against them there. Use self.store.load_relations() for the full map.
+        """
+        latest = self.store.latest_snapshot(self.client.username)
+        if not latest:
             return None
             
-        latest = max(snapshots, key=lambda x: x.stat().st_mtime)
-        
-        with open(latest, 'r') as f:
-            data = json.load(f)
+        taken_at = datetime.fromisoformat(latest['taken_at'])
+        data = {
+            'snapshot_id': latest['id'],
+            'timestamp': taken_at.strftime("%Y%m%d_%H%M%S"),
+            'datetime': latest['taken_at'],
+            'username': latest['account'],
+            'followers_count': latest['followers_count'],
+            'following_count': latest['following_count'],
+            'sync': latest['sync']
+        }
             
-        console.print(f"📂 Loaded snapshot: [blue]{latest.name}[/blue] from {data['datetime'][:19]}")
+        console.print(f"📂 Loaded snapshot: [blue]#{latest['id']}[/blue] from {data['datetime'][:19]}")
         return data
     
-    def find_not_following_back(self, followers: Dict, following: Dict) -> List[Dict]:
+    @traced('diff')
+    def find_not_following_back(self, followers: Dict, following: Dict) -> UserRows:
         """Find users you follow who don't follow you back"""
-        follower_ids = set(followers.keys())
-        following_ids = set(following.keys())
-        
-        not_following_back = following_ids - follower_ids
+        with DIFF_DURATION.time(diff='not_following_back'):
+            follower_ids = to_id_array(followers.keys(), len(followers))
+            following_ids = to_id_array(following.keys(), len(following))
+            
+            not_following_back = difference(following_ids, follower_ids)
+        DIFF_RESULTS.set(len(not_following_back), account=self.client.username, diff='not_following_back')
         
-        return [
-            {
-                'user_id': uid,
-                'username': following[uid].username,
-                'full_name': following[uid].full_name or 'No name',
-                'is_verified': getattr(following[uid], 'is_verified', False),
-                'follower_count': getattr(following[uid], 'follower_count', 0)
-            }
-            for uid in not_following_back
-        ]
+        return UserRows(not_following_back, lambda uid: {
+            'user_id': uid,
+            'username': following[uid].username,
+            'full_name': following[uid].full_name or 'No name',
+            'is_verified': getattr(following[uid], 'is_verified', False),
+            'follower_count': getattr(following[uid], 'follower_count', 0)
+        })
     
-    def find_unfollowers(self, current_followers: Dict, previous_snapshot: Dict) -> List[Dict]:
+    @traced('diff')
+    def find_unfollowers(self, current_followers: Dict, previous_snapshot: Dict) -> UserRows:
         """Find users who unfollowed you since last snapshot"""
         if not previous_snapshot:
-            return []
+            return UserRows(np.empty(0, dtype=np.int64), dict)
             
-        previous_followers = set(previous_snapshot['followers'].keys())
-        current_follower_ids = set(current_followers.keys())
-        
-        unfollowed_ids = previous_followers - current_follower_ids
+        with DIFF_DURATION.time(diff='unfollowers'):
+            previous_followers = self.store.id_array(previous_snapshot['snapshot_id'], FOLLOWERS)
+            current_follower_ids = to_id_array(current_followers.keys(), len(current_followers))
+            
+            unfollowed_ids = difference(previous_followers, current_follower_ids)
+        DIFF_RESULTS.set(len(unfollowed_ids), account=self.client.username, diff='unfollowers')
         
-        return [
-            {
+        def build_row(uid: str) -> Dict:
+            user = self.store.get_user(uid) or {'username': uid, 'full_name': None}
+            return {
                 'user_id': uid,
-                'username': previous_snapshot['followers'][uid]['username'],
-                'full_name': previous_snapshot['followers'][uid]['full_name'] or 'No name',
+                'username': user['username'],
+                'full_name': user['full_name'] or 'No name',
                 'unfollowed_since': previous_snapshot['datetime'][:19]
             }
-            for uid in unfollowed_ids
-        ]
+        
+        return UserRows(unfollowed_ids, build_row)
     
-    def find_new_followers(self, current_followers: Dict, previous_snapshot: Dict) -> List[Dict]:
+    @traced('diff')
+    def find_new_followers(self, current_followers: Dict, previous_snapshot: Dict) -> UserRows:
         """Find new followers since last snapshot"""
         if not previous_snapshot:
-            return []
+            return UserRows(np.empty(0, dtype=np.int64), dict)
             
-        previous_followers = set(previous_snapshot['followers'].keys())
-        current_follower_ids = set(current_followers.keys())
-        
-        new_follower_ids = current_follower_ids - previous_followers
+        with DIFF_DURATION.time(diff='new_followers'):
+            previous_followers = self.store.id_array(previous_snapshot['snapshot_id'], FOLLOWERS)
+            current_follower_ids = to_id_array(current_followers.keys(), len(current_followers))
+            
+            new_follower_ids = difference(current_follower_ids, previous_followers)
+        DIFF_RESULTS.set(len(new_follower_ids), account=self.client.username, diff='new_followers')
+        followed_since = datetime.now().strftime("%Y-%m-%d %H:%M")
         
-        return [
-            {
-                'user_id': uid,
-                'username': current_followers[uid].username,
-                'full_name': current_followers[uid].full_name or 'No name',
-                'followed_since': datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-            for uid in new_follower_ids
-        ]
\ No newline at end of file
+        return UserRows(new_follower_ids, lambda uid: {
+            'user_id': uid,
+            'username': current_followers[uid].username,
+            'full_name': current_followers[uid].full_name or 'No name',
+            'followed_since': followed_since
+        })
@@ -0,0 +1,46 @@
+"""
+Column handling of the flat export formats (pkg.exporters)
+"""
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pkg.exporters import open_exporter  # noqa: E402
+
+
+def read_csv(path: Path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_csv_columns_come_from_the_first_record(tmp_path):
+    path = tmp_path / "export.csv"
+    with open_exporter('csv', path) as exporter:
+        exporter.write_many([{'a': 1, 'b': 'x'}, {'a': 2}])
+    assert read_csv(path) == [['a', 'b'], ['1', 'x'], ['2', '']]
+
+
+def test_csv_rejects_fields_outside_the_columns(tmp_path):
+    with pytest.raises(ValueError, match='previous_snapshot'):
+        with open_exporter('csv', tmp_path / "export.csv") as exporter:
+            exporter.write_many([{'username': 'a'}, {'username': 'b', 'previous_snapshot': '2024-01-01'}])
+
+
+def test_csv_with_declared_fields_keeps_late_keys(tmp_path):
+    path = tmp_path / "export.csv"
+    with open_exporter('csv', path, fields=['username', 'previous_snapshot']) as exporter:
+        exporter.write_many([{'username': 'a'}, {'username': 'b', 'previous_snapshot': '2024-01-01'}])
+    assert read_csv(path) == [['username', 'previous_snapshot'], ['a', ''], ['b', '2024-01-01']]
+
+
+def test_parquet_with_declared_fields_keeps_late_keys(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / "export.parquet"
+    with open_exporter('parquet', path, fields=['username', 'previous_snapshot']) as exporter:
+        exporter.write_many([{'username': 'a'}, {'username': 'b', 'previous_snapshot': '2024-01-01'}])
+    assert pq.read_table(path).to_pylist() == [{'username': 'a', 'previous_snapshot': None},
+                                               {'username': 'b', 'previous_snapshot': '2024-01-01'}]
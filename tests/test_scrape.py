@@ -0,0 +1,105 @@
+"""
+Batch scraper (pkg.insta_scrape.scrape_users) against the local web_profile_info stand-in
+"""
+import asyncio
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pkg.insta_scrape import HostRateLimiter, scrape_users  # noqa: E402
+from pkg.mock_backend import start_profile_server  # noqa: E402
+
+USERNAMES = [f"user{i}" for i in range(20)]
+
+
+@contextmanager
+def profile_server(**options):
+    server = start_profile_server(**options)
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def scrape(base_url: str, usernames=USERNAMES, **options):
+    """Run scrape_users to the end, returns ([(username, profile, error)], [request timestamps])"""
+    sent = []
+
+    async def record(request):
+        sent.append(time.monotonic())
+
+    async def run():
+        async with httpx.AsyncClient(event_hooks={'request': [record]}) as http:
+            return [result async for result in scrape_users(usernames, base_url=base_url, http=http, **options)]
+
+    return asyncio.run(run()), sent
+
+
+def test_every_profile_is_scraped_once():
+    with profile_server() as base_url:
+        results, sent = scrape(base_url, concurrency=5, rate=1000)
+    assert sorted(username for username, _, _ in results) == sorted(USERNAMES)
+    assert all(error is None and profile['username'] == username for username, profile, error in results)
+    assert len(sent) == len(USERNAMES)
+
+
+def test_results_match_their_usernames_in_any_order():
+    # Half the requests are throttled and retried, so results complete out of input order
+    with profile_server(throttle_rate=0.5) as base_url:
+        results, _ = scrape(base_url, concurrency=10, rate=1000, retries=50)
+    by_username = {username: profile for username, profile, error in results if error is None}
+    assert set(by_username) == set(USERNAMES)
+    assert all(profile['username'] == username for username, profile in by_username.items())
+
+
+def test_throttled_requests_are_retried_after_retry_after():
+    # The stand-in answers 429 with Retry-After: 0, exponential backoff would take seconds
+    started = time.perf_counter()
+    with profile_server(throttle_rate=0.5) as base_url:
+        results, sent = scrape(base_url, concurrency=10, rate=1000, retries=50)
+    assert all(error is None for _, _, error in results)
+    assert len(sent) > len(USERNAMES)
+    assert time.perf_counter() - started < 5
+
+
+def test_retries_are_bounded():
+    with profile_server(throttle_rate=1.0) as base_url:
+        results, sent = scrape(base_url, usernames=USERNAMES[:3], concurrency=3, rate=1000, retries=2)
+    assert len(sent) == 3 * 3
+    for _, profile, error in results:
+        assert profile is None
+        assert isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429
+
+
+def test_requests_to_a_host_are_rate_limited():
+    rate = 20.0
+    with profile_server() as base_url:
+        results, sent = scrape(base_url, usernames=USERNAMES[:10], concurrency=10, rate=rate, burst=1)
+    assert all(error is None for _, _, error in results)
+    # Burst of one: every request after the first waits for its 1/rate slot
+    assert sent[-1] - sent[0] >= (len(sent) - 1) / rate * 0.9
+
+
+def test_hosts_have_separate_budgets():
+    limiter = HostRateLimiter(rate=10.0, burst=1)
+
+    async def acquire(host: str, times: int):
+        for _ in range(times):
+            await limiter.acquire(host)
+
+    async def run():
+        await asyncio.gather(acquire('a.example', 3), acquire('b.example', 3))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    # Two waits of 0.1s per host, run side by side rather than one host after the other
+    assert elapsed == pytest.approx(0.2, abs=0.15)
+    assert set(limiter.buckets) == {'a.example', 'b.example'}
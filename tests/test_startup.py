@@ -0,0 +1,25 @@
+"""
+CLI startup budget, the pytest side of benchmarks/bench_startup.py
+
+Every measurement imports src/main.py in a fresh interpreter.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from bench_startup import import_main  # noqa: E402
+
+BUDGET_SECONDS = 0.2
+
+
+def test_import_main_loads_no_heavy_modules():
+    loaded = import_main()['loaded']
+    assert loaded == [], f"import main loaded heavy modules: {', '.join(loaded)}"
+
+
+def test_import_main_within_budget():
+    # Best of a few runs, a single one is at the mercy of a busy machine
+    seconds = min(import_main()['seconds'] for _ in range(3))
+    assert seconds <= BUDGET_SECONDS, f"import main took {seconds * 1000:.1f} ms, budget is {BUDGET_SECONDS * 1000:.0f} ms"
+